@@ -0,0 +1,167 @@
+"""
+Aggregat-Cube für Übersicht, Monatsentwicklung und Produktanalyse
+Summen pro Niederlassung × Product Family × Product Group × YTD-Aktivität werden
+einmal pro Datenstand berechnet. Die Sektionen schneiden den Cube nur noch zu und
+verdichten ihn, statt bei jedem Rerun alle Maschinen zu durchlaufen.
+"""
+
+import numpy as np
+import pandas as pd
+
+from data_prep import MONTHLY_KINDS, money_columns, build_fact_table, format_month
+
+# Dimensionen des Cubes (Aktiv = Maschine hat YTD-Kosten oder -Umsätze)
+CUBE_DIMENSIONS = ['Niederlassung', '1. Product Family', '2. Product Group', 'Aktiv']
+
+# Anzahl Maschinen pro Cube-Zelle
+COUNT_COLUMN = 'Anzahl'
+
+
+def is_active(df):
+    """Maske: Maschinen mit YTD-Aktivität (Kosten oder Umsätze ≠ 0)"""
+    return (df['Kosten YTD'] != 0) | (df['Umsätze YTD'] != 0)
+
+
+def build_cube(df):
+    """
+    Berechnet den Aggregat-Cube
+
+    Args:
+        df: Aufbereiteter DataFrame (alle Maschinen)
+
+    Returns:
+        DataFrame mit einer Zeile pro belegter Dimensions-Kombination:
+        Dimensionen, Summen aller Geldspalten (YTD + Monate) und Anzahl
+    """
+    dims = [dim for dim in CUBE_DIMENSIONS if dim in df.columns]
+    keys = [df[dim] for dim in dims] + [is_active(df).rename('Aktiv')]
+
+    grouped = df[money_columns(df.columns)].groupby(keys, observed=True, dropna=False)
+    cube = grouped.sum()
+    cube[COUNT_COLUMN] = grouped.size()
+
+    return cube.reset_index()
+
+
+def slice_cube(cube, niederlassungen=None, family=None, group=None, active_only=False):
+    """
+    Schneidet den Cube auf die Sidebar-Filter zu
+
+    Args:
+        cube: Cube aus build_cube
+        niederlassungen: Erlaubte/gewählte Niederlassungen (None = alle)
+        family: Product Family (None = alle)
+        group: Product Group (None = alle)
+        active_only: Nur Maschinen mit YTD-Aktivität
+
+    Returns:
+        Teil-Cube (gleiche Spalten)
+    """
+    mask = pd.Series(True, index=cube.index)
+
+    if niederlassungen is not None and 'Niederlassung' in cube.columns:
+        mask &= cube['Niederlassung'].isin(niederlassungen)
+    if family is not None and '1. Product Family' in cube.columns:
+        mask &= cube['1. Product Family'] == family
+    if group is not None and '2. Product Group' in cube.columns:
+        mask &= cube['2. Product Group'] == group
+    if active_only:
+        mask &= cube['Aktiv']
+
+    return cube[mask]
+
+
+def rollup(cube, by=None):
+    """
+    Verdichtet einen (Teil-)Cube
+
+    Args:
+        cube: Cube oder Teil-Cube
+        by: Dimension(en) für die Gruppierung (None = Gesamtsumme)
+
+    Returns:
+        Series mit Gesamtsummen (by=None) oder DataFrame mit einer Zeile pro
+        Ausprägung (fehlende Werte werden wie bei groupby ausgelassen)
+    """
+    measures = money_columns(cube.columns) + [COUNT_COLUMN]
+
+    if by is None:
+        return cube[measures].sum()
+
+    return cube.groupby(by, observed=True)[measures].sum().reset_index()
+
+
+class MonthlyMatrix:
+    """
+    Monatswerte als zusammenhängendes Array (Zeilen × Kennzahl × Monat)
+
+    Kennzahl-Achse in der Reihenfolge von MONTHLY_KINDS (Kosten, Umsätze, DB),
+    Monate chronologisch. Alle Monatssummen einer Auswahl entstehen in einer
+    maskierten Reduktion.
+
+    Gefüllt wird aus der Faktentabelle (data_prep.build_fact_table): deren
+    Kategorie-Codes für Monat und Kennzahl sind direkt die Array-Positionen.
+    """
+
+    def __init__(self, df):
+        """
+        Args:
+            df: DataFrame mit Monatsspalten (Maschinen-Tabelle oder Cube)
+        """
+        facts = build_fact_table(df)
+        months = facts['Monat'].cat
+
+        self.index = df.index
+        self.periods = pd.PeriodIndex(months.categories, freq='M')
+        self.labels = [format_month(period) for period in self.periods]
+        self.values = np.zeros((len(df), len(MONTHLY_KINDS), len(self.periods)), dtype='float64')
+
+        rows = df.index.get_indexer(facts['Zeile'])
+        self.values[rows, facts['Art'].cat.codes.to_numpy(), months.codes.to_numpy()] = facts['Wert'].to_numpy()
+
+    def totals(self, labels=None):
+        """
+        Summen pro Kennzahl und Monat
+
+        Args:
+            labels: Index-Labels der ausgewählten Zeilen (None = alle)
+
+        Returns:
+            Array (Kennzahl × Monat)
+        """
+        if labels is None:
+            return self.values.sum(axis=0)
+
+        mask = self.index.isin(labels)
+        return self.values.sum(axis=0, where=mask[:, None, None])
+
+    def summary(self, labels=None):
+        """
+        Monatstabelle für "Monatliche Entwicklung" und "Detaillierte Monatsdaten"
+
+        Args:
+            labels: Index-Labels der ausgewählten Zeilen (None = alle)
+
+        Returns:
+            DataFrame mit Monat, Kosten, Umsaetze, DB, Marge % und den
+            kumulierten Werten Kum_Kosten, Kum_Umsaetze, Kum_DB
+        """
+        totals = self.totals(labels)
+        kosten, umsaetze, db = totals
+        cumulative = np.cumsum(totals, axis=1)
+
+        # Wie (DB / Umsätze * 100).fillna(0): nur 0/0 wird zu 0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            marge = db / umsaetze * 100
+        marge = np.where(np.isnan(marge), 0.0, marge)
+
+        return pd.DataFrame({
+            'Monat': self.labels,
+            'Kosten': kosten,
+            'Umsaetze': umsaetze,
+            'DB': db,
+            'Marge %': marge,
+            'Kum_Kosten': cumulative[0],
+            'Kum_Umsaetze': cumulative[1],
+            'Kum_DB': cumulative[2]
+        })
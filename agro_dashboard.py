@@ -8,6 +8,7 @@ import os
 from io import BytesIO
 import json
 import hashlib
+from xlsx_reader import read_excel
 
 # ========================================
 # LOGIN-SYSTEM
@@ -138,7 +139,7 @@ with col_header3:
 def load_data():
     """Lädt Dashboard_Master_DE.xlsx direkt aus dem Repository"""
     try:
-        df = pd.read_excel("Dashboard_Master_DE.xlsx", dtype={'VH-nr.': str})
+        df = read_excel("Dashboard_Master_DE.xlsx", dtype={'VH-nr.': str})
         
         if 'VH-nr.' in df.columns:
             df['VH-nr.'] = df['VH-nr.'].astype(str).str.strip()
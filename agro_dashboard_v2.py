@@ -8,6 +8,11 @@ import os
 from io import BytesIO
 import json
 import hashlib
+from xlsx_reader import read_excel
+from data_prep import (
+    prepare_dataframe, validate_schema, schema_error, has_errors,
+    ColumnSelection, DASHBOARD_COLUMNS
+)
 
 # ============================================================================
 # GEMINI AI INTEGRATION
@@ -154,29 +159,26 @@ def check_password():
 
 @st.cache_data(ttl=3600)  # Cache für 1 Stunde
 def load_data():
-    """Lädt Dashboard_Master_DE_v2.xlsx aus dem Repository"""
+    """
+    Lädt Dashboard_Master_DE_v2.xlsx aus dem Repository
+    
+    Returns:
+        (DataFrame oder None, Fehlerliste) - angezeigt wird außerhalb des Caches
+    """
     try:
-        df = pd.read_excel("Dashboard_Master_DE_v2.xlsx", dtype={'VH-nr.': str})
-        
-        if 'VH-nr.' in df.columns:
-            df['VH-nr.'] = df['VH-nr.'].astype(str).str.strip()
-        
-        # Runde numerische Werte
-        kosten_spalten = [col for col in df.columns if 'Kosten' in col]
-        umsatz_spalten = [col for col in df.columns if 'Umsätze' in col]
-        db_spalten = [col for col in df.columns if 'DB' in col]
-        
-        for col in kosten_spalten + umsatz_spalten + db_spalten:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).round(2)
-        
-        return df
+        df = read_excel(
+            "Dashboard_Master_DE_v2.xlsx",
+            usecols=ColumnSelection(DASHBOARD_COLUMNS),
+            dtype={'VH-nr.': str}
+        )
     except FileNotFoundError:
-        st.error("❌ Dashboard_Master_DE_v2.xlsx nicht gefunden!")
-        st.stop()
+        return None, [schema_error("Dashboard_Master_DE_v2.xlsx nicht gefunden!")]
     except Exception as e:
-        st.error(f"❌ Fehler beim Laden: {e}")
-        st.stop()
+        return None, [schema_error(f"Fehler beim Laden: {e}")]
+    
+    # Schema-basierte Aufbereitung (Geldspalten in einem Durchgang)
+    df = prepare_dataframe(df)
+    return df, validate_schema(df)
 
 
 def get_file_info():
@@ -216,7 +218,16 @@ with col_info1:
 with col_info2:
     st.info(f"💾 **Dateigröße:** {file_size:.2f} MB")
 
-df = load_data()
+df, load_errors = load_data()
+
+for error in load_errors:
+    if error['level'] == 'error':
+        st.error(f"❌ {error['message']}")
+    else:
+        st.warning(f"⚠️ {error['message']}")
+
+if has_errors(load_errors):
+    st.stop()
 
 with col_info3:
     st.success(f"✅ **{len(df):,} Datensätze** geladen")
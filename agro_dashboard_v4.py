@@ -11,6 +11,15 @@ from plotly.subplots import make_subplots
 from datetime import datetime
 from io import BytesIO
 from auth_simple import SimpleAuth, show_login_page, show_user_info
+from config import CONFIG
+from xlsx_reader import read_excel
+from data_prep import (
+    prepare_dataframe, validate_schema, schema_error, has_errors,
+    ColumnSelection, DASHBOARD_COLUMNS, dataset_version
+)
+from rls import RLSViews, allowed_key
+from filters import build_dimensions, dropdown_options
+from pareto import pareto_table
 
 # ========================================
 # PAGE CONFIG
@@ -107,31 +116,61 @@ current_user = auth.get_current_user()
 # ========================================
 @st.cache_data
 def load_data():
-    """Lädt Excel-Daten"""
+    """
+    Lädt Excel-Daten
+    
+    Returns:
+        (DataFrame oder None, Fehlerliste) - angezeigt wird außerhalb des Caches
+    """
     try:
-        df = pd.read_excel('Dashboard_Master_DE_v2.xlsx')
-        
-        # VH-nr. als String
-        if 'VH-nr.' in df.columns:
-            df['VH-nr.'] = df['VH-nr.'].astype(str).str.strip()
-        
-        # Numerische Spalten konvertieren
-        kosten_spalten = [col for col in df.columns if 'Kosten' in col]
-        umsatz_spalten = [col for col in df.columns if 'Umsätze' in col]
-        db_spalten = [col for col in df.columns if 'DB' in col]
-        
-        for col in kosten_spalten + umsatz_spalten + db_spalten:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).round(2)
-        
-        return df
+        df = read_excel('Dashboard_Master_DE_v2.xlsx', usecols=ColumnSelection(DASHBOARD_COLUMNS))
     except Exception as e:
-        st.error(f"❌ Fehler beim Laden: {e}")
-        return None
+        return None, [schema_error(f"Fehler beim Laden: {e}")]
+    
+    # Schema-basierte Aufbereitung (Geldspalten in einem Durchgang)
+    df = prepare_dataframe(df)
+    dataset_version(df)  # Versions-Key in df.attrs, damit er mitgecacht wird
+    # Niederlassung ist Pflicht für die Row-Level-Security
+    return df, validate_schema(df, required=['Niederlassung'])
+
+@st.cache_resource(max_entries=2)
+def get_dimensions(_df, version):
+    """Niederlassung → Family → Group Wörterbücher für die Dropdowns - einmal pro Datenstand"""
+    return build_dimensions(_df)
+
+@st.cache_resource(max_entries=2)
+def get_rls_views(_df, version):
+    """Ein gemeinsamer View pro Niederlassungs-Menge der Benutzer - einmal pro Datenstand"""
+    users = SimpleAuth.get_users()
+    return RLSViews(_df, [user['niederlassungen'] for user in users.values()])
+
+@st.cache_data(max_entries=32)
+def get_group_stats(_df_base, version, filter_state, by, measures):
+    """Anzahl + Summen pro Product Family / Group - gecacht pro Datenstand und Filterzustand"""
+    aggregations = {'VH-nr.': 'count'}
+    aggregations.update({col: 'sum' for col in measures})
+    return _df_base.groupby(by).agg(aggregations).reset_index()
+
+@st.cache_data(max_entries=32)
+def get_no_revenue(_df_base, version, filter_state):
+    """
+    Maschinen ohne Umsatz mit ABC-Klasse nach Kosten - gecacht pro Datenstand und Filterzustand
+    
+    Returns:
+        DataFrame wie pareto.pareto_table (Klasse A = Maschinen bis 80 % der Kosten)
+    """
+    df_no_revenue = _df_base[(_df_base['Kosten YTD'] > 0) & (_df_base['Umsätze YTD'] == 0)]
+    return pareto_table(df_no_revenue, 'Kosten YTD')
+
+df, load_errors = load_data()
 
-df = load_data()
+for error in load_errors:
+    if error['level'] == 'error':
+        st.error(f"❌ {error['message']}")
+    else:
+        st.warning(f"⚠️ {error['message']}")
 
-if df is None:
+if has_errors(load_errors):
     st.stop()
 
 # ========================================
@@ -192,10 +231,11 @@ st.sidebar.markdown("### 🎯 Master-Filter")
 st.sidebar.info("Dieser Filter gilt für ALLE Auswertungen")
 
 user_niederlassungen = current_user['niederlassungen']
+dimensions = get_dimensions(df, dataset_version(df))
 
 # Filter-Optionen basierend auf Rolle
 if user_niederlassungen == ['alle']:
-    niederlassungen_list = ['Gesamt'] + sorted(df['Niederlassung'].unique().tolist())
+    niederlassungen_list = ['Gesamt'] + dimensions['branches']
 else:
     niederlassungen_list = ['Gesamt'] + user_niederlassungen
 
@@ -212,16 +252,16 @@ st.sidebar.markdown("### 📦 Produkt-Filter")
 has_product_cols = '1. Product Family' in df.columns
 
 if has_product_cols:
-    product_families = ['Alle'] + sorted([fam for fam in df['1. Product Family'].dropna().unique() if str(fam) != 'nan'])
+    # Optionen nur aus den erlaubten Niederlassungen (None = alle)
+    scope = None if allowed_key(user_niederlassungen) is None else user_niederlassungen
+    
+    families, _ = dropdown_options(dimensions, scope)
+    product_families = ['Alle'] + families
     selected_family = st.sidebar.selectbox("Product Family", product_families, key='product_family')
     
     # Product Group - dynamisch basierend auf Family
-    if selected_family != 'Alle':
-        df_filtered_for_group = df[df['1. Product Family'] == selected_family]
-    else:
-        df_filtered_for_group = df
-    
-    product_groups = ['Alle'] + sorted([grp for grp in df_filtered_for_group['2. Product Group'].dropna().unique() if str(grp) != 'nan'])
+    _, groups = dropdown_options(dimensions, scope, selected_family if selected_family != 'Alle' else None)
+    product_groups = ['Alle'] + groups
     selected_group = st.sidebar.selectbox("Product Group", product_groups, key='product_group')
 else:
     selected_family = 'Alle'
@@ -235,11 +275,8 @@ show_active = st.sidebar.checkbox("✅ Nur Maschinen mit YTD-Aktivität", value=
 # ========================================
 # BASIS-FILTERUNG ANWENDEN
 # ========================================
-df_base = df.copy()
-
-# User-Rechte filtern
-if user_niederlassungen != ['alle']:
-    df_base = df_base[df_base['Niederlassung'].isin(user_niederlassungen)]
+# User-Rechte: gemeinsamer, vorgefilterter View (nicht verändern - nur weiter filtern)
+df_base = get_rls_views(df, dataset_version(df)).view(user_niederlassungen)
 
 # Aktivitäts-Filter
 if show_active:
@@ -256,6 +293,9 @@ if has_product_cols:
     if selected_group != 'Alle':
         df_base = df_base[df_base['2. Product Group'] == selected_group]
 
+# Filterzustand als Cache-Key für die schweren Sektionen
+filter_state = (allowed_key(user_niederlassungen), master_nl_filter, selected_family, selected_group, show_active)
+
 # SIDEBAR METRIKEN
 st.sidebar.markdown("---")
 st.sidebar.markdown("### 📊 Gefilterte Daten")
@@ -555,201 +595,211 @@ st.markdown("---")
 # ========================================
 # PRODUKTANALYSE
 # ========================================
-if has_product_cols:
-    st.header("📦 Produktanalyse")
+def product_section():
+    if has_product_cols:
+        st.header("📦 Produktanalyse")
     
-    df_products = df_base.copy()
+        df_products = df_base
     
-    if len(df_products) > 0 and '1. Product Family' in df_products.columns:
-        # PRODUCT FAMILY STATS
-        product_family_stats = df_products.groupby('1. Product Family').agg({
-            'VH-nr.': 'count',
-            'Kosten YTD': 'sum',
-            'Umsätze YTD': 'sum',
-            'DB YTD': 'sum'
-        }).reset_index()
+        if len(df_products) > 0 and '1. Product Family' in df_products.columns:
+            # PRODUCT FAMILY STATS
+            product_family_stats = get_group_stats(
+                df_products, dataset_version(df), filter_state,
+                '1. Product Family', ('Kosten YTD', 'Umsätze YTD', 'DB YTD')
+            )
         
-        product_family_stats.columns = ['Product Family', 'Anzahl', 'Kosten YTD', 'Umsätze YTD', 'DB YTD']
-        product_family_stats['Marge %'] = (product_family_stats['DB YTD'] / product_family_stats['Umsätze YTD'] * 100).fillna(0)
+            product_family_stats.columns = ['Product Family', 'Anzahl', 'Kosten YTD', 'Umsätze YTD', 'DB YTD']
+            product_family_stats['Marge %'] = (product_family_stats['DB YTD'] / product_family_stats['Umsätze YTD'] * 100).fillna(0)
         
-        st.markdown("### 🔽 Sortieren nach:")
-        sort_product_mix = st.selectbox(
-            "Wähle Sortierung für Produkt-Mix:",
-            ["Umsätze YTD (Höchster)", "DB YTD (Höchster Gewinn)", "Marge % (Beste)", "Anzahl (Meiste Maschinen)", "Kosten YTD (Höchste)"],
-            key='sort_product_mix'
-        )
+            st.markdown("### 🔽 Sortieren nach:")
+            sort_product_mix = st.selectbox(
+                "Wähle Sortierung für Produkt-Mix:",
+                ["Umsätze YTD (Höchster)", "DB YTD (Höchster Gewinn)", "Marge % (Beste)", "Anzahl (Meiste Maschinen)", "Kosten YTD (Höchste)"],
+                key='sort_product_mix'
+            )
         
-        if "Umsätze YTD" in sort_product_mix:
-            product_family_stats = product_family_stats.sort_values('Umsätze YTD', ascending=False)
-        elif "DB YTD" in sort_product_mix:
-            product_family_stats = product_family_stats.sort_values('DB YTD', ascending=False)
-        elif "Marge %" in sort_product_mix:
-            product_family_stats = product_family_stats.sort_values('Marge %', ascending=False)
-        elif "Anzahl" in sort_product_mix:
-            product_family_stats = product_family_stats.sort_values('Anzahl', ascending=False)
-        else:
-            product_family_stats = product_family_stats.sort_values('Kosten YTD', ascending=False)
+            if "Umsätze YTD" in sort_product_mix:
+                product_family_stats = product_family_stats.sort_values('Umsätze YTD', ascending=False)
+            elif "DB YTD" in sort_product_mix:
+                product_family_stats = product_family_stats.sort_values('DB YTD', ascending=False)
+            elif "Marge %" in sort_product_mix:
+                product_family_stats = product_family_stats.sort_values('Marge %', ascending=False)
+            elif "Anzahl" in sort_product_mix:
+                product_family_stats = product_family_stats.sort_values('Anzahl', ascending=False)
+            else:
+                product_family_stats = product_family_stats.sort_values('Kosten YTD', ascending=False)
         
-        display_products = product_family_stats.copy()
-        display_products['Anzahl'] = display_products['Anzahl'].apply(lambda x: f"{x:,}")
-        display_products['Kosten YTD'] = display_products['Kosten YTD'].apply(lambda x: f"€ {x:,.0f}")
-        display_products['Umsätze YTD'] = display_products['Umsätze YTD'].apply(lambda x: f"€ {x:,.0f}")
-        display_products['DB YTD'] = display_products['DB YTD'].apply(lambda x: f"€ {x:,.0f}")
-        display_products['Marge %'] = display_products['Marge %'].apply(lambda x: f"{x:.1f}%")
+            display_products = product_family_stats.copy()
+            display_products['Anzahl'] = display_products['Anzahl'].apply(lambda x: f"{x:,}")
+            display_products['Kosten YTD'] = display_products['Kosten YTD'].apply(lambda x: f"€ {x:,.0f}")
+            display_products['Umsätze YTD'] = display_products['Umsätze YTD'].apply(lambda x: f"€ {x:,.0f}")
+            display_products['DB YTD'] = display_products['DB YTD'].apply(lambda x: f"€ {x:,.0f}")
+            display_products['Marge %'] = display_products['Marge %'].apply(lambda x: f"{x:.1f}%")
         
-        st.dataframe(display_products, hide_index=True, use_container_width=False)
+            st.dataframe(display_products, hide_index=True, use_container_width=False)
         
-        st.download_button(
-            label="📥 Export Produktanalyse (Excel)",
-            data=to_excel(product_family_stats),
-            file_name=f'produktanalyse_{master_nl_filter}_{pd.Timestamp.now().strftime("%Y%m%d")}.xlsx',
-            mime='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        )
+            st.download_button(
+                label="📥 Export Produktanalyse (Excel)",
+                data=to_excel(product_family_stats),
+                file_name=f'produktanalyse_{master_nl_filter}_{pd.Timestamp.now().strftime("%Y%m%d")}.xlsx',
+                mime='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+            )
         
-        # TOP 20 PRODUCT GROUPS
-        if '2. Product Group' in df_products.columns:
-            st.markdown("---")
-            st.markdown("#### 🏅 Top 20 Product Groups")
+            # TOP 20 PRODUCT GROUPS
+            if '2. Product Group' in df_products.columns:
+                st.markdown("---")
+                st.markdown("#### 🏅 Top 20 Product Groups")
             
-            st.markdown("### 🔽 Sortieren nach:")
-            sort_groups = st.selectbox(
-                "Wähle Sortierung für Product Groups:",
-                ["Umsätze YTD (Höchster)", "DB YTD (Höchster Gewinn)", "Marge % (Beste)", "Anzahl (Meiste Maschinen)"],
-                key='sort_product_groups'
-            )
+                st.markdown("### 🔽 Sortieren nach:")
+                sort_groups = st.selectbox(
+                    "Wähle Sortierung für Product Groups:",
+                    ["Umsätze YTD (Höchster)", "DB YTD (Höchster Gewinn)", "Marge % (Beste)", "Anzahl (Meiste Maschinen)"],
+                    key='sort_product_groups'
+                )
             
-            product_group_stats = df_products.groupby('2. Product Group').agg({
-                'VH-nr.': 'count',
-                'Umsätze YTD': 'sum',
-                'DB YTD': 'sum'
-            }).reset_index()
+                product_group_stats = get_group_stats(
+                    df_products, dataset_version(df), filter_state,
+                    '2. Product Group', ('Umsätze YTD', 'DB YTD')
+                )
             
-            product_group_stats.columns = ['Product Group', 'Anzahl', 'Umsätze YTD', 'DB YTD']
-            product_group_stats['Marge %'] = (product_group_stats['DB YTD'] / product_group_stats['Umsätze YTD'] * 100).fillna(0)
+                product_group_stats.columns = ['Product Group', 'Anzahl', 'Umsätze YTD', 'DB YTD']
+                product_group_stats['Marge %'] = (product_group_stats['DB YTD'] / product_group_stats['Umsätze YTD'] * 100).fillna(0)
             
-            if "Umsätze YTD" in sort_groups:
-                product_group_stats = product_group_stats.sort_values('Umsätze YTD', ascending=False).head(20)
-            elif "DB YTD" in sort_groups:
-                product_group_stats = product_group_stats.sort_values('DB YTD', ascending=False).head(20)
-            elif "Marge %" in sort_groups:
-                product_group_stats = product_group_stats.sort_values('Marge %', ascending=False).head(20)
-            else:
-                product_group_stats = product_group_stats.sort_values('Anzahl', ascending=False).head(20)
+                if "Umsätze YTD" in sort_groups:
+                    product_group_stats = product_group_stats.sort_values('Umsätze YTD', ascending=False).head(20)
+                elif "DB YTD" in sort_groups:
+                    product_group_stats = product_group_stats.sort_values('DB YTD', ascending=False).head(20)
+                elif "Marge %" in sort_groups:
+                    product_group_stats = product_group_stats.sort_values('Marge %', ascending=False).head(20)
+                else:
+                    product_group_stats = product_group_stats.sort_values('Anzahl', ascending=False).head(20)
             
-            col1, col2 = st.columns([1, 1])
+                col1, col2 = st.columns([1, 1])
             
-            with col1:
-                display_groups = product_group_stats.copy()
-                display_groups['Anzahl'] = display_groups['Anzahl'].apply(lambda x: f"{x:,}")
-                display_groups['Umsätze YTD'] = display_groups['Umsätze YTD'].apply(lambda x: f"€ {x:,.0f}")
-                display_groups['DB YTD'] = display_groups['DB YTD'].apply(lambda x: f"€ {x:,.0f}")
-                display_groups['Marge %'] = display_groups['Marge %'].apply(lambda x: f"{x:.1f}%")
+                with col1:
+                    display_groups = product_group_stats.copy()
+                    display_groups['Anzahl'] = display_groups['Anzahl'].apply(lambda x: f"{x:,}")
+                    display_groups['Umsätze YTD'] = display_groups['Umsätze YTD'].apply(lambda x: f"€ {x:,.0f}")
+                    display_groups['DB YTD'] = display_groups['DB YTD'].apply(lambda x: f"€ {x:,.0f}")
+                    display_groups['Marge %'] = display_groups['Marge %'].apply(lambda x: f"{x:.1f}%")
                 
-                st.dataframe(display_groups, hide_index=True, height=400, use_container_width=False)
+                    st.dataframe(display_groups, hide_index=True, height=400, use_container_width=False)
             
-            with col2:
-                fig_groups = go.Figure()
+                with col2:
+                    fig_groups = go.Figure()
                 
-                fig_groups.add_trace(go.Bar(
-                    y=product_group_stats['Product Group'],
-                    x=product_group_stats['Umsätze YTD'],
-                    orientation='h',
-                    marker_color='#3b82f6',
-                    text=product_group_stats['Umsätze YTD'].apply(lambda x: f'€{x/1000:.0f}k'),
-                    textposition='outside'
-                ))
+                    fig_groups.add_trace(go.Bar(
+                        y=product_group_stats['Product Group'],
+                        x=product_group_stats['Umsätze YTD'],
+                        orientation='h',
+                        marker_color='#3b82f6',
+                        text=product_group_stats['Umsätze YTD'].apply(lambda x: f'€{x/1000:.0f}k'),
+                        textposition='outside'
+                    ))
                 
-                fig_groups.update_layout(
-                    height=400,
-                    xaxis_title='Umsatz (€)',
-                    yaxis=dict(autorange='reversed'),
-                    showlegend=False
-                )
+                    fig_groups.update_layout(
+                        height=400,
+                        xaxis_title='Umsatz (€)',
+                        yaxis=dict(autorange='reversed'),
+                        showlegend=False
+                    )
                 
-                st.plotly_chart(fig_groups, use_container_width=True)
-    else:
-        st.info("Keine Daten für Produktanalyse verfügbar.")
-
-st.markdown("---")
+                    st.plotly_chart(fig_groups, use_container_width=True)
+        else:
+            st.info("Keine Daten für Produktanalyse verfügbar.")
 
 # ========================================
 # MASCHINEN OHNE UMSÄTZE (PARETO)
 # ========================================
-st.header("⚠️ Maschinen ohne Umsätze (nur Kosten)")
-st.markdown("Diese Maschinen verursachen Kosten aber generieren keinen Umsatz")
-
-df_no_revenue = df_base[(df_base['Kosten YTD'] > 0) & (df_base['Umsätze YTD'] == 0)].copy()
-df_no_revenue = df_no_revenue.sort_values('Kosten YTD', ascending=False)
-
-total_cost = df_no_revenue['Kosten YTD'].sum()
-target_cost = total_cost * 0.8
-
-cumulative_cost = 0
-pareto_count = 0
-for idx, cost in enumerate(df_no_revenue['Kosten YTD']):
-    cumulative_cost += cost
-    pareto_count = idx + 1
-    if cumulative_cost >= target_cost:
-        break
-
-df_no_revenue_pareto = df_no_revenue.head(pareto_count)
-df_no_revenue_display = df_no_revenue_pareto[['VH-nr.', 'Code', 'Omschrijving', 'Kosten YTD', 'Niederlassung']].copy()
-
-col_sum1, col_sum2, col_sum3, col_sum4 = st.columns(4)
-with col_sum1:
-    st.metric("📊 Gesamt Maschinen", len(df_no_revenue))
-with col_sum2:
-    st.metric("💰 Gesamtkosten", f"€ {total_cost:,.0f}")
-with col_sum3:
-    pareto_percentage = (pareto_count / len(df_no_revenue) * 100) if len(df_no_revenue) > 0 else 0
-    st.metric("🎯 Top Maschinen (80/20)", f"{pareto_count} ({pareto_percentage:.0f}%)")
-with col_sum4:
-    pareto_cost = df_no_revenue_pareto['Kosten YTD'].sum()
-    pareto_cost_percentage = (pareto_cost / total_cost * 100) if total_cost > 0 else 0
-    st.metric("💸 Deren Kosten", f"€ {pareto_cost:,.0f} ({pareto_cost_percentage:.0f}%)")
-
-if len(df_no_revenue_pareto) > 0:
-    col1, col2 = st.columns([1, 1])
+def no_revenue_section():
+    st.header("⚠️ Maschinen ohne Umsätze (nur Kosten)")
+    st.markdown("Diese Maschinen verursachen Kosten aber generieren keinen Umsatz")
+
+    df_no_revenue = get_no_revenue(df_base, dataset_version(df), filter_state)
+
+    total_cost = df_no_revenue['Kosten YTD'].sum()
+
+    # Klasse A = Maschinen, die zusammen 80 % der Kosten verursachen
+    df_no_revenue_pareto = df_no_revenue[df_no_revenue['Klasse'] == 'A']
+    pareto_count = len(df_no_revenue_pareto)
+    df_no_revenue_display = df_no_revenue_pareto[['VH-nr.', 'Code', 'Omschrijving', 'Kosten YTD', 'Niederlassung']].copy()
+
+    col_sum1, col_sum2, col_sum3, col_sum4 = st.columns(4)
+    with col_sum1:
+        st.metric("📊 Gesamt Maschinen", len(df_no_revenue))
+    with col_sum2:
+        st.metric("💰 Gesamtkosten", f"€ {total_cost:,.0f}")
+    with col_sum3:
+        pareto_percentage = (pareto_count / len(df_no_revenue) * 100) if len(df_no_revenue) > 0 else 0
+        st.metric("🎯 Top Maschinen (80/20)", f"{pareto_count} ({pareto_percentage:.0f}%)")
+    with col_sum4:
+        pareto_cost = df_no_revenue_pareto['Kosten YTD'].sum()
+        pareto_cost_percentage = (pareto_cost / total_cost * 100) if total_cost > 0 else 0
+        st.metric("💸 Deren Kosten", f"€ {pareto_cost:,.0f} ({pareto_cost_percentage:.0f}%)")
+
+    if len(df_no_revenue_pareto) > 0:
+        col1, col2 = st.columns([1, 1])
     
-    with col1:
-        display_no_rev = df_no_revenue_display.copy()
-        display_no_rev['VH-nr.'] = display_no_rev['VH-nr.'].astype(str)
-        display_no_rev['Kosten YTD'] = display_no_rev['Kosten YTD'].apply(lambda x: f"€ {x:,.2f}")
+        with col1:
+            display_no_rev = df_no_revenue_display.copy()
+            display_no_rev['VH-nr.'] = display_no_rev['VH-nr.'].astype(str)
+            display_no_rev['Kosten YTD'] = display_no_rev['Kosten YTD'].apply(lambda x: f"€ {x:,.2f}")
         
-        st.dataframe(display_no_rev, hide_index=True, height=400, use_container_width=False)
+            st.dataframe(display_no_rev, hide_index=True, height=400, use_container_width=False)
         
-        st.download_button(
-            label="📥 Export Maschinen ohne Umsätze (Excel)",
-            data=to_excel(df_no_revenue_display),
-            file_name=f'maschinen_ohne_umsaetze_{master_nl_filter}_{pd.Timestamp.now().strftime("%Y%m%d")}.xlsx',
-            mime='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-            use_container_width=True
-        )
+            st.download_button(
+                label="📥 Export Maschinen ohne Umsätze (Excel)",
+                data=to_excel(df_no_revenue_display),
+                file_name=f'maschinen_ohne_umsaetze_{master_nl_filter}_{pd.Timestamp.now().strftime("%Y%m%d")}.xlsx',
+                mime='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+                use_container_width=True
+            )
     
-    with col2:
-        fig_pareto = go.Figure()
+        with col2:
+            fig_pareto = go.Figure()
         
-        df_no_revenue_pareto_sorted = df_no_revenue_pareto.sort_values('Kosten YTD', ascending=True)
-        y_labels_pareto = df_no_revenue_pareto_sorted['VH-nr.'].astype(str) + ' | ' + df_no_revenue_pareto_sorted['Code'].astype(str)
+            df_no_revenue_pareto_sorted = df_no_revenue_pareto.sort_values('Kosten YTD', ascending=True)
+            y_labels_pareto = df_no_revenue_pareto_sorted['VH-nr.'].astype(str) + ' | ' + df_no_revenue_pareto_sorted['Code'].astype(str)
         
-        fig_pareto.add_trace(go.Bar(
-            y=y_labels_pareto,
-            x=df_no_revenue_pareto_sorted['Kosten YTD'],
-            orientation='h',
-            marker_color='#ef4444',
-            text=df_no_revenue_pareto_sorted['Kosten YTD'].apply(lambda x: f'€{x/1000:.0f}k'),
-            textposition='outside'
-        ))
+            fig_pareto.add_trace(go.Bar(
+                y=y_labels_pareto,
+                x=df_no_revenue_pareto_sorted['Kosten YTD'],
+                orientation='h',
+                marker_color='#ef4444',
+                text=df_no_revenue_pareto_sorted['Kosten YTD'].apply(lambda x: f'€{x/1000:.0f}k'),
+                textposition='outside'
+            ))
         
-        fig_pareto.update_layout(
-            height=400,
-            xaxis_title='Kosten (€)',
-            showlegend=False
-        )
+            fig_pareto.update_layout(
+                height=400,
+                xaxis_title='Kosten (€)',
+                showlegend=False
+            )
         
-        st.plotly_chart(fig_pareto, use_container_width=True)
+            st.plotly_chart(fig_pareto, use_container_width=True)
+    else:
+        st.success("✅ Keine Maschinen ohne Umsätze gefunden!")
+
+# ========================================
+# SCHWERE SEKTIONEN (Layout "scroll" = untereinander, "tabs" = nur die gewählte)
+# ========================================
+HEAVY_SECTIONS = {
+    "📦 Produktanalyse": product_section,
+    "⚠️ Maschinen ohne Umsätze": no_revenue_section
+}
+
+if CONFIG.get('layout', 'scroll') == 'tabs':
+    # st.tabs würde alle Tabs berechnen - die Auswahl führt nur die geöffnete Sektion aus
+    selected_section = st.radio(
+        "Auswertung", list(HEAVY_SECTIONS), horizontal=True,
+        key='heavy_section', label_visibility='collapsed'
+    )
+    HEAVY_SECTIONS[selected_section]()
 else:
-    st.success("✅ Keine Maschinen ohne Umsätze gefunden!")
+    for position, section in enumerate(HEAVY_SECTIONS.values()):
+        if position > 0:
+            st.markdown("---")
+        section()
 
 # ========================================
 # FOOTER
@@ -4,37 +4,85 @@ Alle Features aus agro_dashboard_v2.py
 """
 
 import streamlit as st
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from datetime import datetime
 from io import BytesIO
 from auth import google_login, logout, get_credentials, get_user_email
-from data_loader import get_data
+from config import CONFIG
+from data_loader import get_data, clear_data_cache
+from data_prep import dataset_version, ColumnSelection, DASHBOARD_COLUMNS
+from aggregates import build_cube, slice_cube, MonthlyMatrix
+from filters import FilterIndex, build_dimensions, dropdown_options, take
+from ranking import RankingIndex
+from query_backend import create_backend, check_parity
+from machine_index import MachineIndex
+from figure_cache import FigureCache, figure_key
+from display_format import (
+    show_table, column_formats, excel_formats, style_table, cell_classes,
+    apply_excel_styles, apply_excel_formats, marge_classes, sign_classes
+)
+from rls import RLSViews
 from users import (
     get_user_info, 
     is_admin, 
     get_allowed_niederlassungen,
     get_niederlassung_options,
     get_user_display_name,
+    get_allowed_sets,
     filter_dataframe_by_user
 )
 
+# Relevanz-Schwellen für Top 10 (≥ 1.000 € Umsatz) und Worst 10 (≥ 1.000 € Kosten)
+TOP_MIN_VALUES = {'Umsätze YTD': 1000}
+WORST_MIN_VALUES = {'Kosten YTD': 1000}
+
+# Spaltenformate der Maschinen-Listen (Anzeige und Excel-Export)
+MACHINE_FORMATS = dict(money=['Kosten YTD', 'Umsätze YTD', 'DB YTD'], percent=['Marge YTD %'])
+
 # ============================================================================
 # HELPER FUNCTIONS
 # ============================================================================
 
-def to_excel(df):
-    """Konvertiert DataFrame zu Excel-Bytes für Download"""
+def to_excel(df, styles=None, formats=None):
+    """
+    Konvertiert DataFrame zu Excel-Bytes für Download
+    
+    styles: optionale Zell-Klassen (display_format.cell_classes) für bedingte Hervorhebung
+    formats: optionale Zahlenformate (display_format.excel_formats), z.B. € mit Tausendertrennzeichen
+    """
     output = BytesIO()
     with pd.ExcelWriter(output, engine='openpyxl') as writer:
         df.to_excel(writer, index=False, sheet_name='Daten')
         worksheet = writer.sheets['Daten']
+        if formats is not None:
+            apply_excel_formats(worksheet, df, formats)
+        if styles is not None:
+            apply_excel_styles(worksheet, styles)
         for idx, col in enumerate(df.columns):
             max_length = max(df[col].astype(str).map(len).max(), len(str(col)))
             worksheet.column_dimensions[chr(65 + idx)].width = min(max_length + 2, 50)
     return output.getvalue()
 
+def open_clicked_machine(event, chart_key, machine_index):
+    """
+    Übernimmt einen Klick auf einen Balken (customdata = Zeilenposition) in die Maschinen-Einzelansicht
+    
+    Nur neue Klicks zählen - eine bestehende Chart-Auswahl überschreibt keine spätere Suche.
+    """
+    points = event.selection.points if event else []
+    position = int(np.ravel(points[0]['customdata'])[0]) if points and 'customdata' in points[0] else None
+    if position == st.session_state.get(f'{chart_key}_clicked'):
+        return
+    st.session_state[f'{chart_key}_clicked'] = position
+    if position is not None:
+        st.session_state['detail_query'] = str(machine_index.record(position)['VH-nr.'])
+        st.session_state['detail_position'] = position
+        # Charts laufen in einem Fragment → ganze App neu, damit die Einzelansicht folgt
+        st.rerun()
+
 # ============================================================================
 # PAGE CONFIG
 # ============================================================================
@@ -85,39 +133,134 @@ st.markdown("---")
 # DATEN LADEN
 # ============================================================================
 
-@st.cache_data(ttl=3600)
+# Nur die Spalten laden, die dieses Dashboard nutzt (+ alle Monatsspalten)
+APP_COLUMNS = ColumnSelection(DASHBOARD_COLUMNS)
+
 def load_and_prepare_data(_credentials):
-    """Lädt Daten von Google Drive und bereitet sie auf"""
+    """
+    Lädt Daten von Google Drive (bereits aufbereitet, ggf. aus Snapshot)
+    
+    Kein eigener st.cache_data: der gemeinsame Datensatz-Cache im data_loader
+    liefert sofort den aktuellen Stand und aktualisiert im Hintergrund.
+    """
     # Temporär credentials in session state setzen für get_data()
     st.session_state['credentials'] = _credentials
     
-    df = get_data()
+    df = get_data(APP_COLUMNS)
     
     if df is None or df.empty:
         st.error("❌ Keine Daten geladen!")
         st.stop()
     
-    # VH-nr. als String
-    if 'VH-nr.' in df.columns:
-        df['VH-nr.'] = df['VH-nr.'].astype(str).str.strip()
-    
-    # Numerische Spalten konvertieren
-    kosten_spalten = [col for col in df.columns if 'Kosten' in col]
-    umsatz_spalten = [col for col in df.columns if 'Umsätze' in col]
-    db_spalten = [col for col in df.columns if 'DB' in col]
-    
-    for col in kosten_spalten + umsatz_spalten + db_spalten:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).round(2)
-    
     return df
 
+@st.cache_resource(max_entries=2)
+def get_cube(_df, version):
+    """Aggregat-Cube (NL × Family × Group × Aktiv) - einmal pro Datenstand"""
+    return build_cube(_df)
+
+@st.cache_resource(max_entries=2)
+def get_monthly_matrix(_cube, version):
+    """Monatswerte des Cubes als (Zellen × Kennzahl × Monat)-Array - einmal pro Datenstand"""
+    return MonthlyMatrix(_cube)
+
+@st.cache_resource(max_entries=2)
+def get_rls_views(_df, version):
+    """Ein gemeinsamer View pro Niederlassungs-Menge aus USERS - einmal pro Datenstand"""
+    return RLSViews(_df, get_allowed_sets())
+
+@st.cache_resource(max_entries=2)
+def get_filter_index(_df, version):
+    """Bitmaps für die Sidebar-Filter - einmal pro Datenstand"""
+    return FilterIndex(_df)
+
+@st.cache_resource(max_entries=2)
+def get_dimensions(_df, version):
+    """Niederlassung → Family → Group Wörterbücher für die Dropdowns - einmal pro Datenstand"""
+    return build_dimensions(_df)
+
+@st.cache_resource(max_entries=2)
+def get_machine_index(_df, version):
+    """Hash-Index VH-nr./Code → Zeile + Monatsverlauf pro Maschine - einmal pro Datenstand"""
+    return MachineIndex(_df)
+
+@st.cache_resource
+def get_figure_cache():
+    """Gemeinsamer LRU-Cache für Plotly-Figures (alle Sessions, Key enthält den Datenstand)"""
+    return FigureCache(CONFIG.get('figure_cache_size', 64))
+
+@st.cache_resource(max_entries=2)
+def get_ranking_index(_df, version):
+    """Vorsortierte Top/Worst-Läufe pro Kennzahl × Niederlassung - einmal pro Datenstand"""
+    return RankingIndex(_df, get_filter_index(_df, version))
+
+@st.cache_resource(max_entries=2)
+def get_query_backend(_df, version):
+    """Abfrage-Backend aus CONFIG['query_backend'] ("pandas" oder "duckdb") - einmal pro Datenstand"""
+    return create_backend(
+        CONFIG.get('query_backend', 'pandas'), _df,
+        cube=get_cube(_df, version),
+        filter_index=get_filter_index(_df, version),
+        ranking_index=get_ranking_index(_df, version)
+    )
+
+@st.cache_data(max_entries=32)
+def get_backend_parity(_df, _backend, version, filters):
+    """Abweichungen des konfigurierten Backends gegenüber pandas (nur Debug-Modus)"""
+    reference = create_backend(
+        'pandas', _df,
+        cube=get_cube(_df, version),
+        filter_index=get_filter_index(_df, version),
+        ranking_index=get_ranking_index(_df, version)
+    )
+    # Mit den Schwellen von Top 10 und Worst 10 - nur diese top_n-Pfade nutzt die App
+    # (dict.fromkeys: übrige Sektionen werden pro Schwelle verglichen, aber nur einmal gemeldet)
+    return list(dict.fromkeys(
+        difference
+        for min_values in (TOP_MIN_VALUES, WORST_MIN_VALUES)
+        for difference in check_parity(
+            reference, _backend, filters,
+            ['VH-nr.', 'Code', 'Omschrijving', 'Kosten YTD', 'Umsätze YTD', 'DB YTD', 'Marge YTD %'],
+            ['VH-nr.', 'Code', 'Omschrijving', 'Kosten YTD', 'Niederlassung'],
+            min_values=min_values
+        )
+    ))
+
+@st.cache_data(max_entries=32)
+def get_monthly_summary(_matrix, _labels, version, filters):
+    """Monatstabelle (Summen, Marge, kumuliert) - gecacht pro Datenstand und Filterzustand"""
+    return _matrix.summary(_labels)
+
+@st.cache_data(max_entries=64)
+def get_product_stats(_backend, version, by, filters):
+    """Summen pro Product Family / Group - gecacht pro Datenstand und Filterzustand"""
+    return _backend.product_stats(by, filters)
+
+@st.cache_data(max_entries=32)
+def get_no_revenue_pareto(_backend, version, filters):
+    """
+    Pareto-Tabelle der Maschinen ohne Umsatz (nach Kosten YTD)
+    
+    Gecacht pro Datenstand und Filterzustand.
+    """
+    return _backend.no_revenue_pareto(['VH-nr.', 'Code', 'Omschrijving', 'Kosten YTD', 'Niederlassung'], filters)
+
 with st.spinner("🔄 Lade Daten von Google Drive..."):
     credentials = get_credentials()
-    df = load_and_prepare_data(credentials)
+    df_all = load_and_prepare_data(credentials)
+
+cube = get_cube(df_all, dataset_version(df_all))
+monthly_matrix = get_monthly_matrix(cube, dataset_version(df_all))
+filter_index = get_filter_index(df_all, dataset_version(df_all))
+query_backend = get_query_backend(df_all, dataset_version(df_all))
+dimensions = get_dimensions(df_all, dataset_version(df_all))
+machine_index = get_machine_index(df_all, dataset_version(df_all))
+figure_cache = get_figure_cache()
 
 # WICHTIG: Daten nach User-Rechten filtern!
-df = filter_dataframe_by_user(df, user_email)
+df = filter_dataframe_by_user(df_all, user_email, get_rls_views(df_all, dataset_version(df_all)))
+allowed_nl = get_allowed_niederlassungen(user_email)
+allowed_mask = filter_index.mask(niederlassungen=allowed_nl)
 
 if df.empty:
     st.error("❌ Keine Daten verfügbar für deine Niederlassung(en)!")
@@ -135,18 +278,11 @@ with col_info3:
     st.success(f"✅ **{len(df):,} Datensätze** geladen")
 
 if st.button("🔄 Daten neu laden"):
-    st.cache_data.clear()
+    clear_data_cache()
     st.rerun()
 
 st.markdown("---")
 
-# ============================================================================
-# MONATE EXTRAHIEREN
-# ============================================================================
-
-cost_cols = [col for col in df.columns if col.startswith('Kosten ') and 'YTD' not in col]
-months = [col.replace('Kosten ', '') for col in cost_cols]
-
 # ============================================================================
 # SIDEBAR - FILTER
 # ============================================================================
@@ -157,8 +293,6 @@ st.sidebar.header("⚙️ Filter")
 st.sidebar.markdown("### 🎯 Master-Filter")
 st.sidebar.info("Dieser Filter gilt für ALLE Auswertungen")
 
-has_nl = 'Niederlassung' in df.columns
-
 # Niederlassungs-Optionen basierend auf User-Rolle
 nl_options = get_niederlassung_options(user_email)
 
@@ -179,16 +313,13 @@ st.sidebar.markdown("### 📦 Produkt-Filter")
 has_product_cols = '1. Product Family' in df.columns
 
 if has_product_cols:
-    product_families = ['Alle'] + sorted([fam for fam in df['1. Product Family'].dropna().unique() if str(fam) != 'nan'])
+    families, _ = dropdown_options(dimensions, allowed_nl)
+    product_families = ['Alle'] + families
     selected_family = st.sidebar.selectbox("Product Family", product_families, key='product_family')
     
     # Product Group - dynamisch basierend auf Family
-    if selected_family != 'Alle':
-        df_filtered_for_group = df[df['1. Product Family'] == selected_family]
-    else:
-        df_filtered_for_group = df
-    
-    product_groups = ['Alle'] + sorted([grp for grp in df_filtered_for_group['2. Product Group'].dropna().unique() if str(grp) != 'nan'])
+    _, groups = dropdown_options(dimensions, allowed_nl, selected_family if selected_family != 'Alle' else None)
+    product_groups = ['Alle'] + groups
     selected_group = st.sidebar.selectbox("Product Group", product_groups, key='product_group')
 else:
     selected_family = 'Alle'
@@ -203,32 +334,44 @@ show_active = st.sidebar.checkbox("✅ Nur Maschinen mit YTD-Aktivität", value=
 # BASIS-FILTERUNG ANWENDEN
 # ============================================================================
 
-df_base = df.copy()
+base_filters = dict(
+    # "Gesamt" = alle Niederlassungen des Users, sonst nur die gewählte
+    niederlassungen=allowed_nl if master_nl_filter == 'Gesamt' else [master_nl_filter],
+    family=selected_family if has_product_cols and selected_family != 'Alle' else None,
+    group=selected_group if has_product_cols and selected_group != 'Alle' else None,
+    active_only=show_active
+)
 
-# Aktivitäts-Filter
-if show_active:
-    df_base = df_base[(df_base['Kosten YTD'] != 0) | (df_base['Umsätze YTD'] != 0)]
+# Zeilenpositionen in df_all (keine Kopie) + gleiche Filter auf dem Cube
+base_rows = filter_index.select(**base_filters)
+cube_base = slice_cube(cube, **base_filters)
 
-# Niederlassungs-Filter (nur wenn Admin "Gesamt" gewählt hat)
-if master_nl_filter != 'Gesamt' and has_nl:
-    df_base = df_base[df_base['Niederlassung'] == master_nl_filter]
-# Wenn "Gesamt": df_base bleibt wie es ist (bereits gefiltert nach User-Rechten)
+# Monatssummen, Margen und kumulierte Werte in einer Reduktion (Monatsentwicklung + Monatstabelle)
+df_monthly = get_monthly_summary(monthly_matrix, cube_base.index, dataset_version(df_all), base_filters)
 
-# Produkt-Filter
-if has_product_cols:
-    if selected_family != 'Alle':
-        df_base = df_base[df_base['1. Product Family'] == selected_family]
-    if selected_group != 'Alle':
-        df_base = df_base[df_base['2. Product Group'] == selected_group]
+# Spalten der Top/Worst-Listen
+ranking_columns = ['VH-nr.', 'Code', 'Omschrijving', 'Kosten YTD', 'Umsätze YTD', 'DB YTD', 'Marge YTD %']
+
+# Die Sektionen unten laufen als st.fragment auf dieser gemeinsamen Auswahl:
+# Widgets einer Sektion (z.B. Sortierung) führen nur die Sektion neu aus,
+# Änderungen in der Sidebar lösen einen kompletten Rerun aus.
 
 # SIDEBAR METRIKEN
 st.sidebar.markdown("---")
 st.sidebar.markdown("### 📊 Gefilterte Daten")
-st.sidebar.metric("Gefilterte Maschinen", f"{len(df_base):,}")
+st.sidebar.metric("Gefilterte Maschinen", f"{len(base_rows):,}")
 st.sidebar.metric("Ausgewählte NL", master_nl_filter)
 if has_product_cols and selected_family != 'Alle':
     st.sidebar.metric("Produkt-Filter", f"{selected_family}")
 
+# Paritätsprüfung des Abfrage-Backends gegen pandas (nur Debug)
+if CONFIG["show_debug"] and query_backend.name != 'pandas':
+    parity_differences = get_backend_parity(df_all, query_backend, dataset_version(df_all), base_filters)
+    if parity_differences:
+        st.sidebar.error(f"❌ Backend '{query_backend.name}' weicht ab: {', '.join(parity_differences)}")
+    else:
+        st.sidebar.caption(f"✅ Backend '{query_backend.name}' = pandas")
+
 # EXPORT ALLE MASCHINEN
 st.sidebar.markdown("---")
 st.sidebar.markdown("### 📥 Daten Export")
@@ -237,12 +380,12 @@ export_columns = ['VH-nr.', 'Code', 'Omschrijving', 'Niederlassung',
                   'Kosten YTD', 'Umsätze YTD', 'DB YTD', 'Marge YTD %']
 
 # Nur Spalten exportieren, die auch existieren
-export_cols_available = [col for col in export_columns if col in df_base.columns]
-df_export_all = df_base[export_cols_available].copy()
+export_cols_available = [col for col in export_columns if col in df_all.columns]
+df_export_all = take(df_all, base_rows, export_cols_available)
 
 st.sidebar.download_button(
-    label=f"📥 Alle Maschinen ({len(df_base):,})",
-    data=to_excel(df_export_all),
+    label=f"📥 Alle Maschinen ({len(base_rows):,})",
+    data=to_excel(df_export_all, formats=excel_formats(**MACHINE_FORMATS)),
     file_name=f'alle_maschinen_{master_nl_filter}_{pd.Timestamp.now().strftime("%Y%m%d_%H%M")}.xlsx',
     mime='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
     use_container_width=True,
@@ -253,24 +396,28 @@ st.sidebar.download_button(
 # ÜBERSICHT SEKTION
 # ============================================================================
 
-st.header("📊 Übersicht")
+@st.fragment
+def overview_section():
+    st.header("📊 Übersicht")
+
+    overview_totals = query_backend.overview(base_filters)
 
-df_overview = df_base.copy()
+    ytd_kosten = overview_totals['Kosten YTD']
+    ytd_umsaetze = overview_totals['Umsätze YTD']
+    ytd_db = overview_totals['DB YTD']
+    ytd_marge = (ytd_db / ytd_umsaetze * 100) if ytd_umsaetze != 0 else 0
 
-ytd_kosten = df_overview['Kosten YTD'].sum()
-ytd_umsaetze = df_overview['Umsätze YTD'].sum()
-ytd_db = df_overview['DB YTD'].sum()
-ytd_marge = (ytd_db / ytd_umsaetze * 100) if ytd_umsaetze != 0 else 0
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("💰 YTD Kosten", f"€ {ytd_kosten:,.0f}")
+    with col2:
+        st.metric("💵 YTD Umsätze", f"€ {ytd_umsaetze:,.0f}")
+    with col3:
+        st.metric("💎 YTD Deckungsbeitrag", f"€ {ytd_db:,.0f}", delta=f"{ytd_marge:.1f}%")
+    with col4:
+        st.metric("📊 YTD Marge", f"{ytd_marge:.1f}%")
 
-col1, col2, col3, col4 = st.columns(4)
-with col1:
-    st.metric("💰 YTD Kosten", f"€ {ytd_kosten:,.0f}")
-with col2:
-    st.metric("💵 YTD Umsätze", f"€ {ytd_umsaetze:,.0f}")
-with col3:
-    st.metric("💎 YTD Deckungsbeitrag", f"€ {ytd_db:,.0f}", delta=f"{ytd_marge:.1f}%")
-with col4:
-    st.metric("📊 YTD Marge", f"{ytd_marge:.1f}%")
+overview_section()
 
 st.markdown("---")
 
@@ -278,80 +425,72 @@ st.markdown("---")
 # MONATLICHE ENTWICKLUNG (4 CHARTS)
 # ============================================================================
 
-st.header("📈 Monatliche Entwicklung")
-
-df_monthly_base = df_base.copy()
+@st.fragment
+def monthly_section():
+    st.header("📈 Monatliche Entwicklung")
 
-monthly_data = []
-for month in months:
-    monthly_data.append({
-        'Monat': month,
-        'Kosten': df_monthly_base[f'Kosten {month}'].sum(),
-        'Umsaetze': df_monthly_base[f'Umsätze {month}'].sum(),
-        'DB': df_monthly_base[f'DB {month}'].sum()
-    })
-
-df_monthly = pd.DataFrame(monthly_data)
-df_monthly['Marge %'] = (df_monthly['DB'] / df_monthly['Umsaetze'] * 100).fillna(0)
-
-# 4 Subplots
-fig = make_subplots(
-    rows=2, cols=2,
-    subplot_titles=('Umsätze & Kosten pro Monat', 'Deckungsbeitrag pro Monat (€)', 
-                    'Deckungsbeitrag pro Monat (%)', 'Kumulative Entwicklung'),
-    specs=[[{"secondary_y": False}, {"secondary_y": False}],
-           [{"secondary_y": False}, {"secondary_y": False}]]
-)
+    # Charts werden nur gebaut, wenn sie für Datenstand + Filter noch nicht im Figure-Cache liegen
+    def build_monthly_chart():
+        # 4 Subplots
+        fig = make_subplots(
+            rows=2, cols=2,
+            subplot_titles=('Umsätze & Kosten pro Monat', 'Deckungsbeitrag pro Monat (€)', 
+                            'Deckungsbeitrag pro Monat (%)', 'Kumulative Entwicklung'),
+            specs=[[{"secondary_y": False}, {"secondary_y": False}],
+                   [{"secondary_y": False}, {"secondary_y": False}]]
+        )
 
-# Chart 1: Umsätze & Kosten
-fig.add_trace(go.Bar(name='Umsätze', x=df_monthly['Monat'], y=df_monthly['Umsaetze'], 
-                     marker_color='#22c55e', text=df_monthly['Umsaetze'].apply(lambda x: f'€{x/1000:.0f}k'),
-                     textposition='outside'), row=1, col=1)
-fig.add_trace(go.Bar(name='Kosten', x=df_monthly['Monat'], y=df_monthly['Kosten'], 
-                     marker_color='#ef4444', text=df_monthly['Kosten'].apply(lambda x: f'€{x/1000:.0f}k'),
-                     textposition='outside'), row=1, col=1)
-
-# Chart 2: DB (€) mit Farben
-colors_db = ['#22c55e' if x >= 0 else '#ef4444' for x in df_monthly['DB']]
-fig.add_trace(go.Bar(name='DB (€)', x=df_monthly['Monat'], y=df_monthly['DB'], 
-                     marker_color=colors_db, showlegend=False,
-                     text=df_monthly['DB'].apply(lambda x: f'€{x/1000:.0f}k'),
-                     textposition='outside'), row=1, col=2)
-
-min_db = df_monthly['DB'].min()
-max_db = df_monthly['DB'].max()
-y_range_db = [min_db * 1.2 if min_db < 0 else 0, max_db * 1.15]
-fig.update_yaxes(range=y_range_db, row=1, col=2)
-
-# Chart 3: Marge % mit Farben
-colors_marge = ['#22c55e' if x >= 10 else '#f59e0b' if x >= 5 else '#ef4444' for x in df_monthly['Marge %']]
-fig.add_trace(go.Bar(name='Marge %', x=df_monthly['Monat'], y=df_monthly['Marge %'], 
-                     marker_color=colors_marge, showlegend=False,
-                     text=df_monthly['Marge %'].apply(lambda x: f'{x:.1f}%'),
-                     textposition='outside'), row=2, col=1)
-
-min_marge = df_monthly['Marge %'].min()
-max_marge = df_monthly['Marge %'].max()
-y_range_marge = [min_marge * 1.2 if min_marge < 0 else 0, max_marge * 1.15]
-fig.update_yaxes(range=y_range_marge, row=2, col=1)
-
-# Chart 4: Kumulative Entwicklung
-df_monthly['Kum_Umsaetze'] = df_monthly['Umsaetze'].cumsum()
-df_monthly['Kum_DB'] = df_monthly['DB'].cumsum()
-fig.add_trace(go.Scatter(name='Kum. Umsätze', x=df_monthly['Monat'], y=df_monthly['Kum_Umsaetze'],
-                         mode='lines+markers', line=dict(color='#22c55e', width=3)), row=2, col=2)
-fig.add_trace(go.Scatter(name='Kum. DB', x=df_monthly['Monat'], y=df_monthly['Kum_DB'],
-                         mode='lines+markers', line=dict(color='#3b82f6', width=3)), row=2, col=2)
-
-fig.update_layout(height=800, showlegend=True, barmode='group')
-fig.update_xaxes(title_text="Monat", row=2, col=1)
-fig.update_xaxes(title_text="Monat", row=2, col=2)
-fig.update_yaxes(title_text="Euro (€)", row=1, col=1)
-fig.update_yaxes(title_text="Euro (€)", row=1, col=2)
-fig.update_yaxes(title_text="Marge (%)", row=2, col=1)
-fig.update_yaxes(title_text="Euro (€)", row=2, col=2)
-
-st.plotly_chart(fig, use_container_width=True)
+        # Chart 1: Umsätze & Kosten
+        fig.add_trace(go.Bar(name='Umsätze', x=df_monthly['Monat'], y=df_monthly['Umsaetze'], 
+                             marker_color='#22c55e', text=df_monthly['Umsaetze'].apply(lambda x: f'€{x/1000:.0f}k'),
+                             textposition='outside'), row=1, col=1)
+        fig.add_trace(go.Bar(name='Kosten', x=df_monthly['Monat'], y=df_monthly['Kosten'], 
+                             marker_color='#ef4444', text=df_monthly['Kosten'].apply(lambda x: f'€{x/1000:.0f}k'),
+                             textposition='outside'), row=1, col=1)
+
+        # Chart 2: DB (€) mit Farben
+        colors_db = ['#22c55e' if x >= 0 else '#ef4444' for x in df_monthly['DB']]
+        fig.add_trace(go.Bar(name='DB (€)', x=df_monthly['Monat'], y=df_monthly['DB'], 
+                             marker_color=colors_db, showlegend=False,
+                             text=df_monthly['DB'].apply(lambda x: f'€{x/1000:.0f}k'),
+                             textposition='outside'), row=1, col=2)
+
+        min_db = df_monthly['DB'].min()
+        max_db = df_monthly['DB'].max()
+        y_range_db = [min_db * 1.2 if min_db < 0 else 0, max_db * 1.15]
+        fig.update_yaxes(range=y_range_db, row=1, col=2)
+
+        # Chart 3: Marge % mit Farben
+        colors_marge = ['#22c55e' if x >= 10 else '#f59e0b' if x >= 5 else '#ef4444' for x in df_monthly['Marge %']]
+        fig.add_trace(go.Bar(name='Marge %', x=df_monthly['Monat'], y=df_monthly['Marge %'], 
+                             marker_color=colors_marge, showlegend=False,
+                             text=df_monthly['Marge %'].apply(lambda x: f'{x:.1f}%'),
+                             textposition='outside'), row=2, col=1)
+
+        min_marge = df_monthly['Marge %'].min()
+        max_marge = df_monthly['Marge %'].max()
+        y_range_marge = [min_marge * 1.2 if min_marge < 0 else 0, max_marge * 1.15]
+        fig.update_yaxes(range=y_range_marge, row=2, col=1)
+
+        # Chart 4: Kumulative Entwicklung
+        fig.add_trace(go.Scatter(name='Kum. Umsätze', x=df_monthly['Monat'], y=df_monthly['Kum_Umsaetze'],
+                                 mode='lines+markers', line=dict(color='#22c55e', width=3)), row=2, col=2)
+        fig.add_trace(go.Scatter(name='Kum. DB', x=df_monthly['Monat'], y=df_monthly['Kum_DB'],
+                                 mode='lines+markers', line=dict(color='#3b82f6', width=3)), row=2, col=2)
+
+        fig.update_layout(height=800, showlegend=True, barmode='group')
+        fig.update_xaxes(title_text="Monat", row=2, col=1)
+        fig.update_xaxes(title_text="Monat", row=2, col=2)
+        fig.update_yaxes(title_text="Euro (€)", row=1, col=1)
+        fig.update_yaxes(title_text="Euro (€)", row=1, col=2)
+        fig.update_yaxes(title_text="Marge (%)", row=2, col=1)
+        fig.update_yaxes(title_text="Euro (€)", row=2, col=2)
+        return fig
+
+    st.plotly_chart(figure_cache.figure(figure_key('monthly', dataset_version(df_all), base_filters),
+                                       build_monthly_chart), use_container_width=True)
+
+monthly_section()
 
 st.markdown("---")
 
@@ -359,81 +498,88 @@ st.markdown("---")
 # TOP 10 PERFORMER
 # ============================================================================
 
-st.header("🏆 Top 10 Maschinen (YTD)")
+@st.fragment
+def top_section():
+    st.header("🏆 Top 10 Maschinen (YTD)")
 
-st.markdown("### 🔽 Sortieren nach:")
-sort_top = st.selectbox(
-    "Wähle Sortierung für Top 10:",
-    ["DB YTD (Höchster Gewinn)", "Umsätze YTD (Höchster Umsatz)", "Marge YTD % (Beste Marge)", "Kosten YTD (Höchste Kosten)"],
-    key='sort_top_10'
-)
+    st.markdown("### 🔽 Sortieren nach:")
+    sort_top = st.selectbox(
+        "Wähle Sortierung für Top 10:",
+        ["DB YTD (Höchster Gewinn)", "Umsätze YTD (Höchster Umsatz)", "Marge YTD % (Beste Marge)", "Kosten YTD (Höchste Kosten)"],
+        key='sort_top_10'
+    )
 
-df_top = df_base.copy()
-df_top_relevant = df_top[df_top['Umsätze YTD'] >= 1000]
+    if "DB YTD" in sort_top:
+        top_metric = 'DB YTD'
+    elif "Umsätze YTD" in sort_top:
+        top_metric = 'Umsätze YTD'
+    elif "Marge YTD %" in sort_top:
+        top_metric = 'Marge YTD %'
+    else:
+        top_metric = 'Kosten YTD'
 
-if "DB YTD" in sort_top:
-    top_10 = df_top_relevant.nlargest(10, 'DB YTD')
-elif "Umsätze YTD" in sort_top:
-    top_10 = df_top_relevant.nlargest(10, 'Umsätze YTD')
-elif "Marge YTD %" in sort_top:
-    top_10 = df_top_relevant.nlargest(10, 'Marge YTD %')
-else:
-    top_10 = df_top_relevant.nlargest(10, 'Kosten YTD')
+    # Nur relevante Maschinen (≥ 1.000 € Umsatz)
+    top_10 = query_backend.top_n(top_metric, ranking_columns, 10, base_filters, min_values=TOP_MIN_VALUES)
 
-top_10_display = top_10[['VH-nr.', 'Code', 'Omschrijving', 'Kosten YTD', 'Umsätze YTD', 'DB YTD', 'Marge YTD %']].copy()
-top_10_display = top_10_display.sort_values('DB YTD', ascending=False)
+    top_10_display = top_10[ranking_columns].copy()
+    top_10_display = top_10_display.sort_values('DB YTD', ascending=False)
 
-st.markdown("#### 📊 Tabelle & Chart")
+    st.markdown("#### 📊 Tabelle & Chart")
 
-col1, col2 = st.columns([1, 1])
+    col1, col2 = st.columns([1, 1])
 
-with col1:
-    top_display = top_10_display.copy()
-    top_display['VH-nr.'] = top_display['VH-nr.'].astype(str)
-    top_display['Kosten YTD'] = top_display['Kosten YTD'].apply(lambda x: f"€ {x:,.2f}")
-    top_display['Umsätze YTD'] = top_display['Umsätze YTD'].apply(lambda x: f"€ {x:,.2f}")
-    top_display['DB YTD'] = top_display['DB YTD'].apply(lambda x: f"€ {x:,.2f}")
-    top_display['Marge YTD %'] = top_display['Marge YTD %'].apply(lambda x: f"{x:.1f}%")
-    st.dataframe(top_display, use_container_width=True, hide_index=True, height=400)
+    with col1:
+        show_table(top_10_display, **MACHINE_FORMATS, height=400)
     
-    st.download_button(
-        label="📥 Export Top 10 (Excel)",
-        data=to_excel(top_10_display),
-        file_name=f'top_10_maschinen_{master_nl_filter}_{pd.Timestamp.now().strftime("%Y%m%d")}.xlsx',
-        mime='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-        use_container_width=True
-    )
+        st.download_button(
+            label="📥 Export Top 10 (Excel)",
+            data=to_excel(top_10_display, formats=excel_formats(**MACHINE_FORMATS)),
+            file_name=f'top_10_maschinen_{master_nl_filter}_{pd.Timestamp.now().strftime("%Y%m%d")}.xlsx',
+            mime='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+            use_container_width=True
+        )
 
-with col2:
-    fig_top = go.Figure()
-    y_labels = top_10_display['VH-nr.'].astype(str) + ' | ' + top_10_display['Code'].astype(str)
+    with col2:
+        def build_top_chart():
+            fig_top = go.Figure()
+            y_labels = top_10_display['VH-nr.'].astype(str) + ' | ' + top_10_display['Code'].astype(str)
+            # Zeilenposition pro Balken → Klick öffnet die Maschine in der Einzelansicht
+            top_positions = df_all.index.get_indexer(top_10_display.index)
     
-    fig_top.add_trace(go.Bar(
-        name='Kosten', y=y_labels, x=top_10_display['Kosten YTD'], orientation='h',
-        marker_color='#ef4444', text=top_10_display['Kosten YTD'].apply(lambda x: f'€{x/1000:.0f}k'),
-        textposition='inside'
-    ))
+            fig_top.add_trace(go.Bar(
+                name='Kosten', y=y_labels, x=top_10_display['Kosten YTD'], orientation='h',
+                marker_color='#ef4444', text=top_10_display['Kosten YTD'].apply(lambda x: f'€{x/1000:.0f}k'),
+                textposition='inside', customdata=top_positions
+            ))
     
-    fig_top.add_trace(go.Bar(
-        name='DB', y=y_labels, x=top_10_display['DB YTD'], orientation='h',
-        marker_color='#22c55e', text=top_10_display['DB YTD'].apply(lambda x: f'€{x/1000:.0f}k'),
-        textposition='inside'
-    ))
+            fig_top.add_trace(go.Bar(
+                name='DB', y=y_labels, x=top_10_display['DB YTD'], orientation='h',
+                marker_color='#22c55e', text=top_10_display['DB YTD'].apply(lambda x: f'€{x/1000:.0f}k'),
+                textposition='inside', customdata=top_positions
+            ))
     
-    for idx, row in top_10_display.iterrows():
-        y_label = str(row['VH-nr.']) + ' | ' + str(row['Code'])
-        fig_top.add_annotation(
-            x=row['Umsätze YTD'], y=y_label, text=f"{row['Marge YTD %']:.1f}%",
-            showarrow=False, xanchor='left', xshift=5,
-            font=dict(size=12, color='#059669' if row['Marge YTD %'] >= 10 else '#d97706')
-        )
+            for idx, row in top_10_display.iterrows():
+                y_label = str(row['VH-nr.']) + ' | ' + str(row['Code'])
+                fig_top.add_annotation(
+                    x=row['Umsätze YTD'], y=y_label, text=f"{row['Marge YTD %']:.1f}%",
+                    showarrow=False, xanchor='left', xshift=5,
+                    font=dict(size=12, color='#059669' if row['Marge YTD %'] >= 10 else '#d97706')
+                )
     
-    fig_top.update_layout(
-        barmode='stack', height=400, xaxis_title='Euro (€)',
-        yaxis=dict(autorange='reversed'), showlegend=True,
-        legend=dict(orientation='h', yanchor='bottom', y=1.02, xanchor='right', x=1)
-    )
-    st.plotly_chart(fig_top, use_container_width=True)
+            fig_top.update_layout(
+                barmode='stack', height=400, xaxis_title='Euro (€)',
+                yaxis=dict(autorange='reversed'), showlegend=True,
+                legend=dict(orientation='h', yanchor='bottom', y=1.02, xanchor='right', x=1)
+            )
+            return fig_top
+
+        fig_top = figure_cache.figure(figure_key('top_10', dataset_version(df_all), base_filters, metric=top_metric),
+                                      build_top_chart)
+        top_event = st.plotly_chart(fig_top, use_container_width=True, on_select='rerun',
+                                    selection_mode='points', key='chart_top_10')
+        open_clicked_machine(top_event, 'chart_top_10', machine_index)
+
+top_section()
 
 st.markdown("---")
 
@@ -441,83 +587,152 @@ st.markdown("---")
 # WORST 10 PERFORMER
 # ============================================================================
 
-st.header("📉 Worst 10 Maschinen (YTD)")
+@st.fragment
+def worst_section():
+    st.header("📉 Worst 10 Maschinen (YTD)")
 
-st.markdown("### 🔽 Sortieren nach:")
-sort_worst = st.selectbox(
-    "Wähle Sortierung für Worst 10:",
-    ["DB YTD (Niedrigster/Negativster)", "Marge YTD % (Schlechteste Marge)", "Kosten YTD (Höchste Kosten)", "Umsätze YTD (Niedrigster Umsatz)"],
-    key='sort_worst_10'
-)
+    st.markdown("### 🔽 Sortieren nach:")
+    sort_worst = st.selectbox(
+        "Wähle Sortierung für Worst 10:",
+        ["DB YTD (Niedrigster/Negativster)", "Marge YTD % (Schlechteste Marge)", "Kosten YTD (Höchste Kosten)", "Umsätze YTD (Niedrigster Umsatz)"],
+        key='sort_worst_10'
+    )
 
-df_worst = df_base.copy()
-df_worst_relevant = df_worst[df_worst['Kosten YTD'] >= 1000]
+    if "DB YTD" in sort_worst:
+        worst_metric, worst_ascending = 'DB YTD', True
+    elif "Marge YTD %" in sort_worst:
+        worst_metric, worst_ascending = 'Marge YTD %', True
+    elif "Kosten YTD" in sort_worst:
+        worst_metric, worst_ascending = 'Kosten YTD', False
+    else:
+        worst_metric, worst_ascending = 'Umsätze YTD', True
 
-if "DB YTD" in sort_worst:
-    worst_10 = df_worst_relevant.nsmallest(10, 'DB YTD')
-elif "Marge YTD %" in sort_worst:
-    worst_10 = df_worst_relevant.nsmallest(10, 'Marge YTD %')
-elif "Kosten YTD" in sort_worst:
-    worst_10 = df_worst_relevant.nlargest(10, 'Kosten YTD')
-else:
-    worst_10 = df_worst_relevant.nsmallest(10, 'Umsätze YTD')
+    # Nur relevante Maschinen (≥ 1.000 € Kosten)
+    worst_10 = query_backend.top_n(
+        worst_metric, ranking_columns, 10, base_filters, ascending=worst_ascending, min_values=WORST_MIN_VALUES
+    )
 
-worst_10_display = worst_10[['VH-nr.', 'Code', 'Omschrijving', 'Kosten YTD', 'Umsätze YTD', 'DB YTD', 'Marge YTD %']].copy()
-worst_10_display = worst_10_display.sort_values('DB YTD', ascending=True)
+    worst_10_display = worst_10[ranking_columns].copy()
+    worst_10_display = worst_10_display.sort_values('DB YTD', ascending=True)
 
-st.markdown("#### 📊 Tabelle & Chart")
+    st.markdown("#### 📊 Tabelle & Chart")
 
-col1, col2 = st.columns([1, 1])
+    col1, col2 = st.columns([1, 1])
 
-with col1:
-    worst_display = worst_10_display.copy()
-    worst_display['VH-nr.'] = worst_display['VH-nr.'].astype(str)
-    worst_display['Kosten YTD'] = worst_display['Kosten YTD'].apply(lambda x: f"€ {x:,.2f}")
-    worst_display['Umsätze YTD'] = worst_display['Umsätze YTD'].apply(lambda x: f"€ {x:,.2f}")
-    worst_display['DB YTD'] = worst_display['DB YTD'].apply(lambda x: f"€ {x:,.2f}")
-    worst_display['Marge YTD %'] = worst_display['Marge YTD %'].apply(lambda x: f"{x:.1f}%")
-    st.dataframe(worst_display, use_container_width=True, hide_index=True, height=400)
+    with col1:
+        show_table(worst_10_display, **MACHINE_FORMATS, height=400)
     
-    st.download_button(
-        label="📥 Export Worst 10 (Excel)",
-        data=to_excel(worst_10_display),
-        file_name=f'worst_10_maschinen_{master_nl_filter}_{pd.Timestamp.now().strftime("%Y%m%d")}.xlsx',
-        mime='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-        use_container_width=True
-    )
+        st.download_button(
+            label="📥 Export Worst 10 (Excel)",
+            data=to_excel(worst_10_display, formats=excel_formats(**MACHINE_FORMATS)),
+            file_name=f'worst_10_maschinen_{master_nl_filter}_{pd.Timestamp.now().strftime("%Y%m%d")}.xlsx',
+            mime='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+            use_container_width=True
+        )
 
-with col2:
-    fig_worst = go.Figure()
-    y_labels_worst = worst_10_display['VH-nr.'].astype(str) + ' | ' + worst_10_display['Code'].astype(str)
+    with col2:
+        def build_worst_chart():
+            fig_worst = go.Figure()
+            y_labels_worst = worst_10_display['VH-nr.'].astype(str) + ' | ' + worst_10_display['Code'].astype(str)
+            worst_positions = df_all.index.get_indexer(worst_10_display.index)
     
-    fig_worst.add_trace(go.Bar(
-        name='Kosten', y=y_labels_worst, x=worst_10_display['Kosten YTD'], orientation='h',
-        marker_color='#ef4444', text=worst_10_display['Kosten YTD'].apply(lambda x: f'€{x/1000:.0f}k' if x != 0 else ''),
-        textposition='inside'
-    ))
+            fig_worst.add_trace(go.Bar(
+                name='Kosten', y=y_labels_worst, x=worst_10_display['Kosten YTD'], orientation='h',
+                marker_color='#ef4444', text=worst_10_display['Kosten YTD'].apply(lambda x: f'€{x/1000:.0f}k' if x != 0 else ''),
+                textposition='inside', customdata=worst_positions
+            ))
     
-    fig_worst.add_trace(go.Bar(
-        name='DB', y=y_labels_worst, x=worst_10_display['DB YTD'], orientation='h',
-        marker_color='#22c55e' if worst_10_display['DB YTD'].min() >= 0 else '#ef4444',
-        text=worst_10_display['DB YTD'].apply(lambda x: f'€{x/1000:.0f}k' if x != 0 else ''),
-        textposition='inside'
-    ))
+            fig_worst.add_trace(go.Bar(
+                name='DB', y=y_labels_worst, x=worst_10_display['DB YTD'], orientation='h',
+                marker_color='#22c55e' if worst_10_display['DB YTD'].min() >= 0 else '#ef4444',
+                text=worst_10_display['DB YTD'].apply(lambda x: f'€{x/1000:.0f}k' if x != 0 else ''),
+                textposition='inside', customdata=worst_positions
+            ))
+    
+            for idx, row in worst_10_display.iterrows():
+                y_label = str(row['VH-nr.']) + ' | ' + str(row['Code'])
+                fig_worst.add_annotation(
+                    x=row['Umsätze YTD'] if row['Umsätze YTD'] > 0 else row['Kosten YTD'],
+                    y=y_label, text=f"{row['Marge YTD %']:.1f}%",
+                    showarrow=False, xanchor='left', xshift=5,
+                    font=dict(size=12, color='#dc2626')
+                )
     
-    for idx, row in worst_10_display.iterrows():
-        y_label = str(row['VH-nr.']) + ' | ' + str(row['Code'])
-        fig_worst.add_annotation(
-            x=row['Umsätze YTD'] if row['Umsätze YTD'] > 0 else row['Kosten YTD'],
-            y=y_label, text=f"{row['Marge YTD %']:.1f}%",
-            showarrow=False, xanchor='left', xshift=5,
-            font=dict(size=12, color='#dc2626')
+            fig_worst.update_layout(
+                barmode='stack', height=400, xaxis_title='Euro (€)',
+                yaxis=dict(autorange='reversed'), showlegend=True,
+                legend=dict(orientation='h', yanchor='bottom', y=1.02, xanchor='right', x=1)
+            )
+            return fig_worst
+
+        fig_worst = figure_cache.figure(
+            figure_key('worst_10', dataset_version(df_all), base_filters, metric=worst_metric, ascending=worst_ascending),
+            build_worst_chart
         )
+        worst_event = st.plotly_chart(fig_worst, use_container_width=True, on_select='rerun',
+                                      selection_mode='points', key='chart_worst_10')
+        open_clicked_machine(worst_event, 'chart_worst_10', machine_index)
+
+worst_section()
+
+st.markdown("---")
+
+# ============================================================================
+# MASCHINEN-DETAIL
+# ============================================================================
+
+@st.fragment
+def detail_section():
+    st.header("🔍 Maschinen-Detail")
+    st.caption("VH-nr. oder Code eingeben - oder einen Balken in Top 10 / Worst 10 anklicken")
+
+    detail_query = st.text_input("VH-nr. oder Code", key='detail_query')
+    # Nur Maschinen der eigenen Niederlassung(en)
+    detail_positions = [int(pos) for pos in machine_index.lookup(detail_query, allowed=allowed_mask)]
+
+    if detail_query and not detail_positions:
+        st.warning("⚠️ Keine Maschine gefunden (oder nicht in deinen Niederlassungen)")
+    elif detail_positions:
+        # VH-nr. ist nicht eindeutig → bei mehreren Treffern auswählen
+        if st.session_state.get('detail_position') not in detail_positions:
+            st.session_state['detail_position'] = detail_positions[0]
+        if len(detail_positions) > 1:
+            detail_position = st.selectbox(
+                f"{len(detail_positions)} Treffer", detail_positions,
+                format_func=machine_index.label, key='detail_position'
+            )
+        else:
+            detail_position = detail_positions[0]
     
-    fig_worst.update_layout(
-        barmode='stack', height=400, xaxis_title='Euro (€)',
-        yaxis=dict(autorange='reversed'), showlegend=True,
-        legend=dict(orientation='h', yanchor='bottom', y=1.02, xanchor='right', x=1)
-    )
-    st.plotly_chart(fig_worst, use_container_width=True)
+        machine = machine_index.record(detail_position)
+        st.markdown(f"**{machine_index.label(detail_position)}** · {machine.get('Niederlassung', '')}")
+    
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("💰 YTD Kosten", f"€ {machine['Kosten YTD']:,.2f}")
+        with col2:
+            st.metric("💵 YTD Umsätze", f"€ {machine['Umsätze YTD']:,.2f}")
+        with col3:
+            st.metric("💎 YTD Deckungsbeitrag", f"€ {machine['DB YTD']:,.2f}")
+        with col4:
+            st.metric("📊 YTD Marge", f"{machine['Marge YTD %']:.1f}%")
+    
+        # Monatsverlauf direkt aus der vorberechneten Zeile
+        machine_history = machine_index.history(detail_position)
+        fig_machine = go.Figure()
+        fig_machine.add_trace(go.Scatter(name='Umsätze', x=machine_history['Monat'], y=machine_history['Umsaetze'],
+                                         mode='lines+markers', line=dict(color='#22c55e', width=2)))
+        fig_machine.add_trace(go.Scatter(name='Kosten', x=machine_history['Monat'], y=machine_history['Kosten'],
+                                         mode='lines+markers', line=dict(color='#ef4444', width=2)))
+        fig_machine.add_trace(go.Scatter(name='DB', x=machine_history['Monat'], y=machine_history['DB'],
+                                         mode='lines+markers', line=dict(color='#3b82f6', width=2, dash='dot')))
+        fig_machine.update_layout(
+            height=250, margin=dict(l=10, r=10, t=30, b=10), yaxis_title='Euro (€)',
+            legend=dict(orientation='h', yanchor='bottom', y=1.02, xanchor='right', x=1)
+        )
+        st.plotly_chart(fig_machine, use_container_width=True)
+
+detail_section()
 
 st.markdown("---")
 
@@ -525,297 +740,279 @@ st.markdown("---")
 # PRODUKTANALYSE
 # ============================================================================
 
-if has_product_cols:
-    st.header("📦 Produktanalyse")
-    
-    df_products = df_base.copy()
+@st.fragment
+def product_section():
+    if has_product_cols:
+        st.header("📦 Produktanalyse")
     
-    if len(df_products) > 0 and '1. Product Family' in df_products.columns:
-        # PRODUCT FAMILY STATS
-        product_family_stats = df_products.groupby('1. Product Family').agg({
-            'VH-nr.': 'count',
-            'Kosten YTD': 'sum',
-            'Umsätze YTD': 'sum',
-            'DB YTD': 'sum'
-        }).reset_index()
-        
-        product_family_stats.columns = ['Product Family', 'Anzahl', 'Kosten YTD', 'Umsätze YTD', 'DB YTD']
-        product_family_stats['Marge %'] = (product_family_stats['DB YTD'] / product_family_stats['Umsätze YTD'] * 100).fillna(0)
+        if len(base_rows) > 0 and '1. Product Family' in cube_base.columns:
+            # PRODUCT FAMILY STATS
+            product_family_stats = get_product_stats(query_backend, dataset_version(df_all), '1. Product Family', base_filters)[
+                ['1. Product Family', 'Anzahl', 'Kosten YTD', 'Umsätze YTD', 'DB YTD']
+            ]
         
-        st.markdown("### 🔽 Sortieren nach:")
-        sort_product_mix = st.selectbox(
-            "Wähle Sortierung für Produkt-Mix:",
-            ["Umsätze YTD (Höchster)", "DB YTD (Höchster Gewinn)", "Marge % (Beste)", "Anzahl (Meiste Maschinen)", "Kosten YTD (Höchste)"],
-            key='sort_product_mix'
-        )
+            product_family_stats.columns = ['Product Family', 'Anzahl', 'Kosten YTD', 'Umsätze YTD', 'DB YTD']
+            product_family_stats['Marge %'] = (product_family_stats['DB YTD'] / product_family_stats['Umsätze YTD'] * 100).fillna(0)
         
-        if "Umsätze YTD" in sort_product_mix:
-            product_family_stats = product_family_stats.sort_values('Umsätze YTD', ascending=False)
-        elif "DB YTD" in sort_product_mix:
-            product_family_stats = product_family_stats.sort_values('DB YTD', ascending=False)
-        elif "Marge %" in sort_product_mix:
-            product_family_stats = product_family_stats.sort_values('Marge %', ascending=False)
-        elif "Anzahl" in sort_product_mix:
-            product_family_stats = product_family_stats.sort_values('Anzahl', ascending=False)
-        else:
-            product_family_stats = product_family_stats.sort_values('Kosten YTD', ascending=False)
+            st.markdown("### 🔽 Sortieren nach:")
+            sort_product_mix = st.selectbox(
+                "Wähle Sortierung für Produkt-Mix:",
+                ["Umsätze YTD (Höchster)", "DB YTD (Höchster Gewinn)", "Marge % (Beste)", "Anzahl (Meiste Maschinen)", "Kosten YTD (Höchste)"],
+                key='sort_product_mix'
+            )
         
-        display_products = product_family_stats.copy()
-        display_products['Anzahl'] = display_products['Anzahl'].apply(lambda x: f"{x:,}")
-        display_products['Kosten YTD'] = display_products['Kosten YTD'].apply(lambda x: f"€ {x:,.0f}")
-        display_products['Umsätze YTD'] = display_products['Umsätze YTD'].apply(lambda x: f"€ {x:,.0f}")
-        display_products['DB YTD'] = display_products['DB YTD'].apply(lambda x: f"€ {x:,.0f}")
-        display_products['Marge %'] = display_products['Marge %'].apply(lambda x: f"{x:.1f}%")
+            if "Umsätze YTD" in sort_product_mix:
+                product_family_stats = product_family_stats.sort_values('Umsätze YTD', ascending=False)
+            elif "DB YTD" in sort_product_mix:
+                product_family_stats = product_family_stats.sort_values('DB YTD', ascending=False)
+            elif "Marge %" in sort_product_mix:
+                product_family_stats = product_family_stats.sort_values('Marge %', ascending=False)
+            elif "Anzahl" in sort_product_mix:
+                product_family_stats = product_family_stats.sort_values('Anzahl', ascending=False)
+            else:
+                product_family_stats = product_family_stats.sort_values('Kosten YTD', ascending=False)
         
-        st.dataframe(display_products, use_container_width=True, hide_index=True)
+            family_formats = dict(
+                money=['Kosten YTD', 'Umsätze YTD', 'DB YTD'], percent=['Marge %'], counts=['Anzahl'], rounded=True
+            )
+            show_table(product_family_stats, **family_formats)
         
-        st.download_button(
-            label="📥 Export Produktanalyse (Excel)",
-            data=to_excel(product_family_stats),
-            file_name=f'produktanalyse_{master_nl_filter}_{pd.Timestamp.now().strftime("%Y%m%d")}.xlsx',
-            mime='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        )
+            st.download_button(
+                label="📥 Export Produktanalyse (Excel)",
+                data=to_excel(product_family_stats, formats=excel_formats(**family_formats)),
+                file_name=f'produktanalyse_{master_nl_filter}_{pd.Timestamp.now().strftime("%Y%m%d")}.xlsx',
+                mime='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+            )
         
-        # TOP 20 PRODUCT GROUPS
-        if '2. Product Group' in df_products.columns:
-            st.markdown("---")
-            st.markdown("#### 🏅 Top 20 Product Groups")
+            # TOP 20 PRODUCT GROUPS
+            if '2. Product Group' in cube_base.columns:
+                st.markdown("---")
+                st.markdown("#### 🏅 Top 20 Product Groups")
             
-            st.markdown("### 🔽 Sortieren nach:")
-            sort_groups = st.selectbox(
-                "Wähle Sortierung für Product Groups:",
-                ["Umsätze YTD (Höchster)", "DB YTD (Höchster Gewinn)", "Marge % (Beste)", "Anzahl (Meiste Maschinen)"],
-                key='sort_product_groups'
-            )
+                st.markdown("### 🔽 Sortieren nach:")
+                sort_groups = st.selectbox(
+                    "Wähle Sortierung für Product Groups:",
+                    ["Umsätze YTD (Höchster)", "DB YTD (Höchster Gewinn)", "Marge % (Beste)", "Anzahl (Meiste Maschinen)"],
+                    key='sort_product_groups'
+                )
             
-            product_group_stats = df_products.groupby('2. Product Group').agg({
-                'VH-nr.': 'count',
-                'Umsätze YTD': 'sum',
-                'DB YTD': 'sum'
-            }).reset_index()
+                product_group_stats = get_product_stats(query_backend, dataset_version(df_all), '2. Product Group', base_filters)[
+                    ['2. Product Group', 'Anzahl', 'Umsätze YTD', 'DB YTD']
+                ]
             
-            product_group_stats.columns = ['Product Group', 'Anzahl', 'Umsätze YTD', 'DB YTD']
-            product_group_stats['Marge %'] = (product_group_stats['DB YTD'] / product_group_stats['Umsätze YTD'] * 100).fillna(0)
+                product_group_stats.columns = ['Product Group', 'Anzahl', 'Umsätze YTD', 'DB YTD']
+                product_group_stats['Marge %'] = (product_group_stats['DB YTD'] / product_group_stats['Umsätze YTD'] * 100).fillna(0)
             
-            if "Umsätze YTD" in sort_groups:
-                product_group_stats = product_group_stats.sort_values('Umsätze YTD', ascending=False).head(20)
-            elif "DB YTD" in sort_groups:
-                product_group_stats = product_group_stats.sort_values('DB YTD', ascending=False).head(20)
-            elif "Marge %" in sort_groups:
-                product_group_stats = product_group_stats.sort_values('Marge %', ascending=False).head(20)
-            else:
-                product_group_stats = product_group_stats.sort_values('Anzahl', ascending=False).head(20)
+                if "Umsätze YTD" in sort_groups:
+                    product_group_stats = product_group_stats.sort_values('Umsätze YTD', ascending=False).head(20)
+                elif "DB YTD" in sort_groups:
+                    product_group_stats = product_group_stats.sort_values('DB YTD', ascending=False).head(20)
+                elif "Marge %" in sort_groups:
+                    product_group_stats = product_group_stats.sort_values('Marge %', ascending=False).head(20)
+                else:
+                    product_group_stats = product_group_stats.sort_values('Anzahl', ascending=False).head(20)
             
-            col1, col2 = st.columns([1, 1])
+                col1, col2 = st.columns([1, 1])
             
-            with col1:
-                display_groups = product_group_stats.copy()
-                display_groups['Anzahl'] = display_groups['Anzahl'].apply(lambda x: f"{x:,}")
-                display_groups['Umsätze YTD'] = display_groups['Umsätze YTD'].apply(lambda x: f"€ {x:,.0f}")
-                display_groups['DB YTD'] = display_groups['DB YTD'].apply(lambda x: f"€ {x:,.0f}")
-                display_groups['Marge %'] = display_groups['Marge %'].apply(lambda x: f"{x:.1f}%")
-                
-                st.dataframe(display_groups, use_container_width=True, hide_index=True, height=400)
+                with col1:
+                    show_table(
+                        product_group_stats, money=['Umsätze YTD', 'DB YTD'], percent=['Marge %'],
+                        counts=['Anzahl'], rounded=True, height=400
+                    )
             
-            with col2:
-                fig_groups = go.Figure()
+                with col2:
+                    def build_groups_chart():
+                        fig_groups = go.Figure()
                 
-                fig_groups.add_trace(go.Bar(
-                    y=product_group_stats['Product Group'],
-                    x=product_group_stats['Umsätze YTD'],
-                    orientation='h',
-                    marker_color='#3b82f6',
-                    text=product_group_stats['Umsätze YTD'].apply(lambda x: f'€{x/1000:.0f}k'),
-                    textposition='outside'
-                ))
+                        fig_groups.add_trace(go.Bar(
+                            y=product_group_stats['Product Group'],
+                            x=product_group_stats['Umsätze YTD'],
+                            orientation='h',
+                            marker_color='#3b82f6',
+                            text=product_group_stats['Umsätze YTD'].apply(lambda x: f'€{x/1000:.0f}k'),
+                            textposition='outside'
+                        ))
                 
-                fig_groups.update_layout(
-                    height=400,
-                    xaxis_title='Umsatz (€)',
-                    yaxis=dict(autorange='reversed'),
-                    showlegend=False
-                )
-                
-                st.plotly_chart(fig_groups, use_container_width=True)
-    else:
-        st.info("Keine Daten für Produktanalyse verfügbar. Bitte Filter anpassen.")
+                        fig_groups.update_layout(
+                            height=400,
+                            xaxis_title='Umsatz (€)',
+                            yaxis=dict(autorange='reversed'),
+                            showlegend=False
+                        )
+                        return fig_groups
+
+                    fig_groups = figure_cache.figure(
+                        figure_key('product_groups', dataset_version(df_all), base_filters, sort=sort_groups),
+                        build_groups_chart
+                    )
+                    st.plotly_chart(fig_groups, use_container_width=True)
+        else:
+            st.info("Keine Daten für Produktanalyse verfügbar. Bitte Filter anpassen.")
 
-st.markdown("---")
 
 # ============================================================================
 # DETAILLIERTE MONATSDATEN
 # ============================================================================
 
-st.header("📋 Detaillierte Monatsdaten")
-
-df_table_base = df_base.copy()
-
-monthly_table = []
-for month in months:
-    monthly_table.append({
-        'Monat': month,
-        'Kosten': df_table_base[f'Kosten {month}'].sum(),
-        'Umsaetze': df_table_base[f'Umsätze {month}'].sum(),
-        'DB': df_table_base[f'DB {month}'].sum()
-    })
+@st.fragment
+def monthly_table_section():
+    st.header("📋 Detaillierte Monatsdaten")
 
-df_table = pd.DataFrame(monthly_table)
-df_table['Marge %'] = (df_table['DB'] / df_table['Umsaetze'] * 100).fillna(0)
+    # Gleiche Filter wie oben → gleiche Monatssummen
+    df_table = df_monthly[['Monat', 'Kosten', 'Umsaetze', 'DB', 'Marge %']].copy()
 
-col1, col2 = st.columns(2)
+    col1, col2 = st.columns(2)
 
-with col1:
-    def highlight_marge(val):
-        if isinstance(val, str) and '%' in val:
-            num = float(val.replace('%', '').replace(',', '.'))
-            if num >= 10:
-                return 'background-color: #d1fae5; color: #065f46; font-weight: bold'
-            elif num >= 5:
-                return 'background-color: #fef3c7; color: #92400e'
-            else:
-                return 'background-color: #fee2e2; color: #991b1b; font-weight: bold'
-        return ''
-    
-    def highlight_db(val):
-        if isinstance(val, str) and '€' in val:
-            num = float(val.replace('€', '').replace(',', '').strip())
-            if num >= 0:
-                return 'color: #059669; font-weight: bold'
-            else:
-                return 'color: #dc2626; font-weight: bold'
-        return ''
+    with col1:
+        # Hervorhebung aus den Zahlen (Marge 10 % / 5 %, Vorzeichen DB) - gleiche Regeln im Excel-Export
+        table_rules = {'Marge %': marge_classes, 'DB': sign_classes}
     
-    styled_table = df_table.style.format({
-        'Kosten': '€ {:,.0f}',
-        'Umsaetze': '€ {:,.0f}',
-        'DB': '€ {:,.0f}',
-        'Marge %': '{:.1f}%'
-    }).applymap(highlight_marge, subset=['Marge %']).applymap(highlight_db, subset=['DB'])
+        table_formats = dict(money=['Kosten', 'Umsaetze', 'DB'], percent=['Marge %'], rounded=True)
+        styled_table = style_table(df_table, table_rules, column_formats(**table_formats))
     
-    st.dataframe(styled_table, use_container_width=True, height=400)
+        st.dataframe(styled_table, use_container_width=True, height=400)
     
-    st.download_button(
-        label="📥 Export Monatsdaten (Excel)",
-        data=to_excel(df_table),
-        file_name=f'monatsdaten_{master_nl_filter}_{pd.Timestamp.now().strftime("%Y%m%d")}.xlsx',
-        mime='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-        use_container_width=True
-    )
+        st.download_button(
+            label="📥 Export Monatsdaten (Excel)",
+            data=to_excel(df_table, cell_classes(df_table, table_rules), excel_formats(**table_formats)),
+            file_name=f'monatsdaten_{master_nl_filter}_{pd.Timestamp.now().strftime("%Y%m%d")}.xlsx',
+            mime='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+            use_container_width=True
+        )
 
-with col2:
-    fig_mini = make_subplots(rows=2, cols=1, subplot_titles=('Monatliche Marge %', 'DB-Entwicklung (€)'), row_heights=[0.5, 0.5])
-    
-    colors_trend = ['#22c55e' if x >= 10 else '#f59e0b' if x >= 5 else '#ef4444' for x in df_table['Marge %']]
-    fig_mini.add_trace(go.Bar(x=df_table['Monat'], y=df_table['Marge %'], marker_color=colors_trend,
-        text=df_table['Marge %'].apply(lambda x: f'{x:.1f}%'), textposition='outside', showlegend=False), row=1, col=1)
+    with col2:
+        def build_mini_chart():
+            fig_mini = make_subplots(rows=2, cols=1, subplot_titles=('Monatliche Marge %', 'DB-Entwicklung (€)'), row_heights=[0.5, 0.5])
     
-    fig_mini.add_trace(go.Scatter(x=df_table['Monat'], y=df_table['DB'], mode='lines+markers',
-        line=dict(color='#3b82f6', width=3), marker=dict(size=10), fill='tozeroy',
-        fillcolor='rgba(59, 130, 246, 0.2)', showlegend=False), row=2, col=1)
+            colors_trend = ['#22c55e' if x >= 10 else '#f59e0b' if x >= 5 else '#ef4444' for x in df_table['Marge %']]
+            fig_mini.add_trace(go.Bar(x=df_table['Monat'], y=df_table['Marge %'], marker_color=colors_trend,
+                text=df_table['Marge %'].apply(lambda x: f'{x:.1f}%'), textposition='outside', showlegend=False), row=1, col=1)
     
-    fig_mini.update_layout(height=400, showlegend=False)
-    fig_mini.update_yaxes(title_text="Marge (%)", row=1, col=1)
-    fig_mini.update_yaxes(title_text="DB (€)", row=2, col=1)
+            fig_mini.add_trace(go.Scatter(x=df_table['Monat'], y=df_table['DB'], mode='lines+markers',
+                line=dict(color='#3b82f6', width=3), marker=dict(size=10), fill='tozeroy',
+                fillcolor='rgba(59, 130, 246, 0.2)', showlegend=False), row=2, col=1)
     
-    st.plotly_chart(fig_mini, use_container_width=True)
+            fig_mini.update_layout(height=400, showlegend=False)
+            fig_mini.update_yaxes(title_text="Marge (%)", row=1, col=1)
+            fig_mini.update_yaxes(title_text="DB (€)", row=2, col=1)
+            return fig_mini
 
-st.markdown("### 💡 Monatliche Insights")
-col1, col2, col3, col4 = st.columns(4)
+        fig_mini = figure_cache.figure(figure_key('monthly_mini', dataset_version(df_all), base_filters), build_mini_chart)
+        st.plotly_chart(fig_mini, use_container_width=True)
 
-best_month = df_table.loc[df_table['Marge %'].idxmax()]
-worst_month = df_table.loc[df_table['Marge %'].idxmin()]
-highest_revenue = df_table.loc[df_table['Umsaetze'].idxmax()]
-total_db = df_table['DB'].sum()
+    st.markdown("### 💡 Monatliche Insights")
+    col1, col2, col3, col4 = st.columns(4)
 
-with col1:
-    st.metric("🏆 Bester Monat (Marge)", best_month['Monat'], f"{best_month['Marge %']:.1f}%")
-with col2:
-    st.metric("📉 Schlechtester Monat (Marge)", worst_month['Monat'], f"{worst_month['Marge %']:.1f}%")
-with col3:
-    st.metric("💰 Höchster Umsatz", highest_revenue['Monat'], f"€ {highest_revenue['Umsaetze']:,.0f}")
-with col4:
-    st.metric("💎 Gesamt DB (YTD)", f"€ {total_db:,.0f}", f"{(total_db/df_table['Umsaetze'].sum()*100):.1f}%")
+    best_month = df_table.loc[df_table['Marge %'].idxmax()]
+    worst_month = df_table.loc[df_table['Marge %'].idxmin()]
+    highest_revenue = df_table.loc[df_table['Umsaetze'].idxmax()]
+    total_db = df_table['DB'].sum()
+
+    with col1:
+        st.metric("🏆 Bester Monat (Marge)", best_month['Monat'], f"{best_month['Marge %']:.1f}%")
+    with col2:
+        st.metric("📉 Schlechtester Monat (Marge)", worst_month['Monat'], f"{worst_month['Marge %']:.1f}%")
+    with col3:
+        st.metric("💰 Höchster Umsatz", highest_revenue['Monat'], f"€ {highest_revenue['Umsaetze']:,.0f}")
+    with col4:
+        st.metric("💎 Gesamt DB (YTD)", f"€ {total_db:,.0f}", f"{(total_db/df_table['Umsaetze'].sum()*100):.1f}%")
 
-st.markdown("---")
 
 # ============================================================================
 # MASCHINEN OHNE UMSÄTZE (PARETO)
 # ============================================================================
 
-st.header("⚠️ Maschinen ohne Umsätze (nur Kosten)")
-st.markdown("Diese Maschinen verursachen Kosten aber generieren keinen Umsatz")
-
-df_no_revenue = df_base[(df_base['Kosten YTD'] > 0) & (df_base['Umsätze YTD'] == 0)].copy()
-df_no_revenue = df_no_revenue.sort_values('Kosten YTD', ascending=False)
-
-total_cost = df_no_revenue['Kosten YTD'].sum()
-target_cost = total_cost * 0.8
-
-cumulative_cost = 0
-pareto_count = 0
-for idx, cost in enumerate(df_no_revenue['Kosten YTD']):
-    cumulative_cost += cost
-    pareto_count = idx + 1
-    if cumulative_cost >= target_cost:
-        break
-
-df_no_revenue_pareto = df_no_revenue.head(pareto_count)
-df_no_revenue_display = df_no_revenue_pareto[['VH-nr.', 'Code', 'Omschrijving', 'Kosten YTD', 'Niederlassung']].copy()
-
-col_sum1, col_sum2, col_sum3, col_sum4 = st.columns(4)
-with col_sum1:
-    st.metric("📊 Gesamt Maschinen", len(df_no_revenue))
-with col_sum2:
-    st.metric("💰 Gesamtkosten", f"€ {total_cost:,.0f}")
-with col_sum3:
-    pareto_percentage = (pareto_count / len(df_no_revenue) * 100) if len(df_no_revenue) > 0 else 0
-    st.metric("🎯 Top Maschinen (80/20)", f"{pareto_count} ({pareto_percentage:.0f}%)")
-with col_sum4:
-    pareto_cost = df_no_revenue_pareto['Kosten YTD'].sum()
-    pareto_cost_percentage = (pareto_cost / total_cost * 100) if total_cost > 0 else 0
-    st.metric("💸 Deren Kosten", f"€ {pareto_cost:,.0f} ({pareto_cost_percentage:.0f}%)")
-
-if len(df_no_revenue_pareto) > 0:
-    col1, col2 = st.columns([1, 1])
+@st.fragment
+def no_revenue_section():
+    st.header("⚠️ Maschinen ohne Umsätze (nur Kosten)")
+    st.markdown("Diese Maschinen verursachen Kosten aber generieren keinen Umsatz")
+
+    df_no_revenue = get_no_revenue_pareto(query_backend, dataset_version(df_all), base_filters)
+
+    total_cost = df_no_revenue['Kosten YTD'].sum()
+
+    # Klasse A = Maschinen, die zusammen 80 % der Kosten verursachen
+    df_no_revenue_pareto = df_no_revenue[df_no_revenue['Klasse'] == 'A']
+    pareto_count = len(df_no_revenue_pareto)
+    df_no_revenue_display = df_no_revenue_pareto[['VH-nr.', 'Code', 'Omschrijving', 'Kosten YTD', 'Niederlassung']].copy()
+
+    col_sum1, col_sum2, col_sum3, col_sum4 = st.columns(4)
+    with col_sum1:
+        st.metric("📊 Gesamt Maschinen", len(df_no_revenue))
+    with col_sum2:
+        st.metric("💰 Gesamtkosten", f"€ {total_cost:,.0f}")
+    with col_sum3:
+        pareto_percentage = (pareto_count / len(df_no_revenue) * 100) if len(df_no_revenue) > 0 else 0
+        st.metric("🎯 Top Maschinen (80/20)", f"{pareto_count} ({pareto_percentage:.0f}%)")
+    with col_sum4:
+        pareto_cost = df_no_revenue_pareto['Kosten YTD'].sum()
+        pareto_cost_percentage = (pareto_cost / total_cost * 100) if total_cost > 0 else 0
+        st.metric("💸 Deren Kosten", f"€ {pareto_cost:,.0f} ({pareto_cost_percentage:.0f}%)")
+
+    if len(df_no_revenue_pareto) > 0:
+        col1, col2 = st.columns([1, 1])
     
-    with col1:
-        display_no_rev = df_no_revenue_display.copy()
-        display_no_rev['VH-nr.'] = display_no_rev['VH-nr.'].astype(str)
-        display_no_rev['Kosten YTD'] = display_no_rev['Kosten YTD'].apply(lambda x: f"€ {x:,.2f}")
-        st.dataframe(display_no_rev, use_container_width=True, hide_index=True, height=400)
+        with col1:
+            show_table(df_no_revenue_display, money=['Kosten YTD'], height=400)
         
-        st.download_button(
-            label="📥 Export Maschinen ohne Umsätze (Excel)",
-            data=to_excel(df_no_revenue_display),
-            file_name=f'maschinen_ohne_umsaetze_{master_nl_filter}_{pd.Timestamp.now().strftime("%Y%m%d")}.xlsx',
-            mime='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-            use_container_width=True
-        )
+            st.download_button(
+                label="📥 Export Maschinen ohne Umsätze (Excel)",
+                data=to_excel(df_no_revenue_display, formats=excel_formats(money=['Kosten YTD'])),
+                file_name=f'maschinen_ohne_umsaetze_{master_nl_filter}_{pd.Timestamp.now().strftime("%Y%m%d")}.xlsx',
+                mime='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+                use_container_width=True
+            )
     
-    with col2:
-        fig_pareto = go.Figure()
-        
-        df_no_revenue_pareto_sorted = df_no_revenue_pareto.sort_values('Kosten YTD', ascending=True)
-        y_labels_pareto = df_no_revenue_pareto_sorted['VH-nr.'].astype(str) + ' | ' + df_no_revenue_pareto_sorted['Code'].astype(str)
+        with col2:
+            def build_pareto_chart():
+                fig_pareto = go.Figure()
         
-        fig_pareto.add_trace(go.Bar(
-            y=y_labels_pareto,
-            x=df_no_revenue_pareto_sorted['Kosten YTD'],
-            orientation='h',
-            marker_color='#ef4444',
-            text=df_no_revenue_pareto_sorted['Kosten YTD'].apply(lambda x: f'€{x/1000:.0f}k'),
-            textposition='outside'
-        ))
+                df_no_revenue_pareto_sorted = df_no_revenue_pareto.sort_values('Kosten YTD', ascending=True)
+                y_labels_pareto = df_no_revenue_pareto_sorted['VH-nr.'].astype(str) + ' | ' + df_no_revenue_pareto_sorted['Code'].astype(str)
         
-        fig_pareto.update_layout(
-            height=400,
-            xaxis_title='Kosten (€)',
-            showlegend=False
-        )
+                fig_pareto.add_trace(go.Bar(
+                    y=y_labels_pareto,
+                    x=df_no_revenue_pareto_sorted['Kosten YTD'],
+                    orientation='h',
+                    marker_color='#ef4444',
+                    text=df_no_revenue_pareto_sorted['Kosten YTD'].apply(lambda x: f'€{x/1000:.0f}k'),
+                    textposition='outside'
+                ))
         
-        st.plotly_chart(fig_pareto, use_container_width=True)
+                fig_pareto.update_layout(
+                    height=400,
+                    xaxis_title='Kosten (€)',
+                    showlegend=False
+                )
+                return fig_pareto
+
+            fig_pareto = figure_cache.figure(figure_key('pareto', dataset_version(df_all), base_filters), build_pareto_chart)
+            st.plotly_chart(fig_pareto, use_container_width=True)
+    else:
+        st.success("✅ Keine Maschinen ohne Umsätze gefunden!")
+
+# ============================================================================
+# SCHWERE SEKTIONEN (Layout "scroll" = untereinander, "tabs" = nur die gewählte)
+# ============================================================================
+
+HEAVY_SECTIONS = {
+    "📦 Produktanalyse": product_section,
+    "📋 Detaillierte Monatsdaten": monthly_table_section,
+    "⚠️ Maschinen ohne Umsätze": no_revenue_section
+}
+
+if CONFIG.get('layout', 'scroll') == 'tabs':
+    # st.tabs würde alle Tabs berechnen - die Auswahl führt nur die geöffnete Sektion aus
+    selected_section = st.radio(
+        "Auswertung", list(HEAVY_SECTIONS), horizontal=True,
+        key='heavy_section', label_visibility='collapsed'
+    )
+    HEAVY_SECTIONS[selected_section]()
 else:
-    st.success("✅ Keine Maschinen ohne Umsätze gefunden!")
+    for position, section in enumerate(HEAVY_SECTIONS.values()):
+        if position > 0:
+            st.markdown("---")
+        section()
 
 # ============================================================================
 # FOOTER
@@ -8,9 +8,12 @@ import streamlit as st
 def get_config():
     """
     Gibt Config basierend auf Environment zurück
-    Liest 'environment' aus secrets.toml
+    Liest 'environment' aus secrets.toml (ohne secrets.toml: production)
     """
-    env = st.secrets.get("environment", {}).get("environment", "production")
+    try:
+        env = st.secrets.get("environment", {}).get("environment", "production")
+    except FileNotFoundError:
+        env = "production"
     
     config = {
         "development": {
@@ -18,6 +21,12 @@ def get_config():
             "allowed_domains": ["gmail.com", "colle.eu"],  # Gmail für Developer + Firma
             "require_workspace": False,
             "cache_ttl": 300,  # 5 Min (schnelleres Testing)
+            "excel_engine": "stream",  # "stream" (schnell) oder "openpyxl"
+            "cache_dir": ".cache",  # Snapshots & lokale Kopien
+            "download_chunk_size": 8 * 1024 * 1024,  # 8 MB pro Drive-Request
+            "query_backend": "pandas",  # "pandas", "duckdb" oder "polars" (Fallback: pandas)
+            "figure_cache_size": 64,  # Plotly-Figures im gemeinsamen LRU-Cache
+            "layout": "tabs",  # "scroll" (alle Sektionen) oder "tabs" (schwere Sektionen erst beim Öffnen)
             "show_debug": True
         },
         "production": {
@@ -25,6 +34,12 @@ def get_config():
             "allowed_domains": ["colle.eu"],  # NUR Firmen-Domain
             "require_workspace": False,  # False, falls kein Google Workspace
             "cache_ttl": 3600,  # 1 Stunde
+            "excel_engine": "stream",  # "stream" (schnell) oder "openpyxl"
+            "cache_dir": ".cache",  # Snapshots & lokale Kopien
+            "download_chunk_size": 8 * 1024 * 1024,  # 8 MB pro Drive-Request
+            "query_backend": "pandas",  # "pandas", "duckdb" oder "polars" (Fallback: pandas)
+            "figure_cache_size": 64,  # Plotly-Figures im gemeinsamen LRU-Cache
+            "layout": "scroll",  # "scroll" (alle Sektionen) oder "tabs" (schwere Sektionen erst beim Öffnen)
             "show_debug": False
         }
     }
@@ -0,0 +1 @@
+"""pytest: Repo-Wurzel als Importpfad für die flachen Module (data_prep, query_backend, ...)"""
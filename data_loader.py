@@ -4,101 +4,299 @@ Unterstützt Excel (.xlsx) und Google Sheets
 """
 
 import streamlit as st
-import pandas as pd
 from googleapiclient.discovery import build
 from googleapiclient.http import MediaIoBaseDownload
-import io
+import os
+import json
+import tempfile
 from config import CONFIG
+from xlsx_reader import read_excel, MappedFile
+from data_prep import (
+    prepare_dataframe, compact_dataframe, format_memory_report,
+    validate_schema, has_errors
+)
+from snapshot import file_key, load_or_build
+from dataset_cache import DatasetCache
 
-@st.cache_data(ttl=CONFIG["cache_ttl"], show_spinner="📥 Lade Daten von Google Drive...")
-def load_from_drive(_credentials, file_id):
+SNAPSHOT_DIR = os.path.join(CONFIG["cache_dir"], "snapshots")
+DRIVE_CACHE_DIR = os.path.join(CONFIG["cache_dir"], "drive")
+
+def get_revision_id(file_metadata):
     """
-    Lädt Excel/Sheets von Google Drive
+    Eindeutige Kennung für den Stand einer Drive-Datei
+    
+    Binärdateien haben eine md5Checksum, Google Sheets nur version/modifiedTime.
+    """
+    if file_metadata.get('md5Checksum'):
+        return f"md5:{file_metadata['md5Checksum']}"
+    return f"v{file_metadata.get('version', '')}:{file_metadata.get('modifiedTime', '')}"
+
+def _local_copy_paths(file_id):
+    """Pfade der lokalen Kopie (Excel-Bytes + Metadaten)"""
+    base = os.path.join(DRIVE_CACHE_DIR, file_id)
+    return base + '.xlsx', base + '.json'
+
+def read_local_copy_info(file_id):
+    """
+    Liest die Metadaten der zuletzt heruntergeladenen Version
+    
+    Returns:
+        dict mit revision, content_key, modified_time oder None
+    """
+    data_path, info_path = _local_copy_paths(file_id)
+    
+    if not (os.path.exists(data_path) and os.path.exists(info_path)):
+        return None
+    
+    try:
+        with open(info_path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def download_to_file(request, chunk_size):
+    """
+    Lädt einen Drive-Download in Chunks direkt in eine temporäre Datei
+    
+    Im Speicher liegt dabei immer nur ein Chunk, nicht die ganze Datei.
     
     Args:
-        _credentials: Google OAuth Credentials (mit _ = nicht cachen)
-        file_id: Drive File ID
+        request: Drive-Request (get_media / export_media)
+        chunk_size: Bytes pro Request
     
     Returns:
-        DataFrame oder None
+        (Pfad der temporären Datei, Liste mit Fortschritts-Zeilen)
     """
+    os.makedirs(DRIVE_CACHE_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=DRIVE_CACHE_DIR, suffix='.download')
+    progress = []
+    
     try:
-        # Drive API Service
-        service = build('drive', 'v3', credentials=_credentials)
-        
-        # File Metadata holen
-        file_metadata = service.files().get(
-            fileId=file_id, 
-            fields='name,mimeType,size'
-        ).execute()
-        
-        file_name = file_metadata.get('name', 'Unknown')
-        mime_type = file_metadata.get('mimeType', '')
-        file_size = int(file_metadata.get('size', 0))
-        
-        if CONFIG["show_debug"]:
-            st.sidebar.write("📄 Datei-Info:")
-            st.sidebar.write(f"- Name: {file_name}")
-            st.sidebar.write(f"- Typ: {mime_type}")
-            st.sidebar.write(f"- Größe: {file_size / 1024:.1f} KB")
-        
-        # Google Sheets oder normale Datei?
-        if mime_type == 'application/vnd.google-apps.spreadsheet':
-            # Echtes Google Sheets → Als Excel exportieren
-            if CONFIG["show_debug"]:
-                st.sidebar.write("📊 Lade als Google Sheets (export)...")
+        with os.fdopen(fd, 'wb') as f:
+            downloader = MediaIoBaseDownload(f, request, chunksize=chunk_size)
             
-            request = service.files().export_media(
-                fileId=file_id,
-                mimeType='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-            )
-        else:
-            # Normale Datei (Excel, PDF, etc.) → Direkter Download
-            if CONFIG["show_debug"]:
-                st.sidebar.write(f"📁 Lade Datei direkt (Type: {mime_type})...")
-            
-            request = service.files().get_media(fileId=file_id)
-        
-        # Download
-        file_buffer = io.BytesIO()
-        downloader = MediaIoBaseDownload(file_buffer, request)
-        
-        done = False
-        with st.spinner('📥 Downloade Datei...'):
+            done = False
             while not done:
                 status, done = downloader.next_chunk()
-                if status and CONFIG["show_debug"]:
-                    progress = int(status.progress() * 100)
-                    st.sidebar.write(f"⏳ Download: {progress}%")
-        
-        # Excel laden
-        file_buffer.seek(0)
-        df = pd.read_excel(file_buffer, engine='openpyxl')
+                if status:
+                    progress.append(f"⏳ Download: {int(status.progress() * 100)}%")
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    
+    return tmp_path, progress
+
+def write_local_copy(file_id, downloaded_path, revision, key, modified_time):
+    """Übernimmt eine heruntergeladene Datei als lokale Kopie + Metadaten (atomar via rename)"""
+    data_path, info_path = _local_copy_paths(file_id)
+    os.makedirs(DRIVE_CACHE_DIR, exist_ok=True)
+    
+    os.replace(downloaded_path, data_path)
+    
+    with open(info_path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump({'revision': revision, 'content_key': key, 'modified_time': modified_time}, f)
+    os.replace(info_path + '.tmp', info_path)
+
+def parse_workbook(source, columns=None):
+    """
+    Liest die Excel-Datei und bereitet sie auf (= Inhalt eines Snapshots)
+    
+    Args:
+        source: Dateipfad oder File-like Objekt
+        columns: ColumnSelection des Dashboards (None = alle Spalten)
+    
+    Returns:
+        Aufbereiteter, kompakter DataFrame
+    """
+    df = read_excel(source, engine=CONFIG["excel_engine"], usecols=columns)
+    return compact_dataframe(prepare_dataframe(df))
+
+def projected_key(key, columns=None):
+    """Snapshot-Key für eine Spaltenauswahl (jede Auswahl hat eigene Snapshots)"""
+    return key if columns is None else f"{key}-{columns.key}"
+
+def fetch_drive_dataset(credentials, file_id, columns=None):
+    """
+    Lädt Excel/Sheets von Google Drive (ohne UI-Ausgaben, auch im Hintergrund-Thread nutzbar)
+    
+    Args:
+        credentials: Google OAuth Credentials
+        file_id: Drive File ID
+        columns: ColumnSelection des Dashboards (None = alle Spalten)
+    
+    Returns:
+        dict mit df, file_name, revision und debug (Liste von Debug-Zeilen)
+    """
+    debug = []
+    
+    # Drive API Service
+    service = build('drive', 'v3', credentials=credentials)
+    
+    # File Metadata holen (günstiger Call - entscheidet ob Download nötig ist)
+    file_metadata = service.files().get(
+        fileId=file_id, 
+        fields='name,mimeType,size,modifiedTime,md5Checksum,version'
+    ).execute()
+    
+    file_name = file_metadata.get('name', 'Unknown')
+    mime_type = file_metadata.get('mimeType', '')
+    file_size = int(file_metadata.get('size', 0))
+    revision = get_revision_id(file_metadata)
+    
+    debug.append("📄 Datei-Info:")
+    debug.append(f"- Name: {file_name}")
+    debug.append(f"- Typ: {mime_type}")
+    debug.append(f"- Größe: {file_size / 1024:.1f} KB")
+    debug.append(f"- Stand: {file_metadata.get('modifiedTime', '?')} (Version {file_metadata.get('version', '?')})")
+    
+    result = {'file_name': file_name, 'revision': revision, 'debug': debug}
+    
+    # Unverändert seit letztem Download? → lokale Kopie verwenden
+    local_info = read_local_copy_info(file_id)
+    
+    if local_info and local_info.get('revision') == revision:
+        local_path, _ = _local_copy_paths(file_id)
+        df, from_snapshot = load_or_build(
+            projected_key(local_info['content_key'], columns),
+            lambda: parse_workbook(local_path, columns),
+            SNAPSHOT_DIR
+        )
+        debug.append(f"♻️ Unverändert - lokale Kopie ({'Snapshot' if from_snapshot else 'neu geparst'})")
+        if 'memory_report' in df.attrs:
+            debug.append(format_memory_report(df.attrs['memory_report']))
+        result['df'] = df
+        return result
+    
+    # Google Sheets oder normale Datei?
+    if mime_type == 'application/vnd.google-apps.spreadsheet':
+        # Echtes Google Sheets → Als Excel exportieren
+        debug.append("📊 Lade als Google Sheets (export)...")
         
-        # Erfolg!
-        st.success(f"✅ {len(df):,} Zeilen geladen: {file_name}")
+        request = service.files().export_media(
+            fileId=file_id,
+            mimeType='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        )
+    else:
+        # Normale Datei (Excel, PDF, etc.) → Direkter Download
+        debug.append(f"📁 Lade Datei direkt (Type: {mime_type})...")
         
-        if CONFIG["show_debug"]:
-            st.sidebar.write(f"📊 Spalten: {len(df.columns)}")
-            st.sidebar.write(f"📏 Zeilen: {len(df):,}")
+        request = service.files().get_media(fileId=file_id)
+    
+    # Download auf Platte statt in den Speicher
+    download_path, progress = download_to_file(request, CONFIG["download_chunk_size"])
+    debug.extend(progress)
+    
+    try:
+        # Excel per Memory-Mapping lesen (oder Snapshot bei unverändertem Inhalt)
+        def parse():
+            with MappedFile.open(download_path) as mapped:
+                return parse_workbook(mapped, columns)
         
-        return df
+        key = file_key(download_path)
+        df, from_snapshot = load_or_build(projected_key(key, columns), parse, SNAPSHOT_DIR)
         
+        try:
+            write_local_copy(file_id, download_path, revision, key, file_metadata.get('modifiedTime'))
+        except OSError as e:
+            # Ohne lokale Kopie wird beim nächsten Mal einfach wieder geladen
+            debug.append(f"⚠️ Lokale Kopie nicht gespeichert: {e}")
+    finally:
+        if os.path.exists(download_path):
+            os.remove(download_path)
+    
+    debug.append(f"⚡ Snapshot: {'Treffer' if from_snapshot else 'neu erstellt'} ({key[:8]})")
+    debug.append(f"📊 Spalten: {len(df.columns)}")
+    debug.append(f"📏 Zeilen: {len(df):,}")
+    if 'memory_report' in df.attrs:
+        debug.append(format_memory_report(df.attrs['memory_report']))
+    
+    result['df'] = df
+    return result
+
+@st.cache_resource
+def get_dataset_cache():
+    """Prozessweiter Datensatz-Cache (geteilt von allen Sessions)"""
+    return DatasetCache(ttl=CONFIG["cache_ttl"])
+
+def load_from_drive(credentials, file_id, columns=None):
+    """
+    Lädt Excel/Sheets von Google Drive über den gemeinsamen Cache
+    
+    Ist ein Datensatz vorhanden, wird er sofort zurückgegeben - auch wenn er
+    gerade im Hintergrund aktualisiert wird. Der User wartet nur beim ersten Laden
+    und wenn die Aktualisierungen so lange fehlschlagen, dass der Stand abgelaufen ist.
+    
+    Args:
+        credentials: Google OAuth Credentials
+        file_id: Drive File ID
+        columns: ColumnSelection des Dashboards (None = alle Spalten)
+    
+    Returns:
+        DataFrame oder None
+    """
+    cache = get_dataset_cache()
+    cache_key = projected_key(file_id, columns)
+    loader = lambda: fetch_drive_dataset(credentials, file_id, columns)
+    
+    try:
+        if cache.can_serve(cache_key):
+            result = cache.get(cache_key, loader)
+        else:
+            with st.spinner("📥 Lade Daten von Google Drive..."):
+                result = cache.get(cache_key, loader)
     except Exception as e:
         st.error(f"❌ Fehler beim Laden von Drive: {e}")
         if CONFIG["show_debug"]:
             st.exception(e)
         return None
+    
+    df = result['df']
+    
+    # Erfolg!
+    st.success(f"✅ {len(df):,} Zeilen geladen: {result['file_name']}")
+    
+    if CONFIG["show_debug"]:
+        for line in result['debug']:
+            st.sidebar.write(line)
+        
+        status = cache.status(cache_key)
+        if status:
+            st.sidebar.write(f"🕒 Datenstand-Alter: {status['age'] / 60:.0f} Min")
+            if 'last_load_seconds' in status:
+                st.sidebar.write(
+                    f"⏱️ Ladezeit: {status['last_load_seconds']:.1f}s "
+                    f"({status['last_coalesced']} wartende Sessions zusammengefasst, "
+                    f"gesamt {status['coalesced']} bei {status['loads']} Loads)"
+                )
+            if status['refreshing']:
+                st.sidebar.write("🔄 Aktualisierung läuft im Hintergrund...")
+            if status['last_error']:
+                st.sidebar.write(f"⚠️ Letzte Aktualisierung fehlgeschlagen: {status['last_error']}")
+    
+    return df
+
+def clear_data_cache():
+    """Verwirft alle geladenen Daten (Button "Daten neu laden")"""
+    get_dataset_cache().invalidate()
+    st.cache_data.clear()
 
 @st.cache_data(ttl=CONFIG["cache_ttl"])
-def load_local_fallback(file_path):
+def load_local_fallback(file_path, _columns=None, columns_key=None):
     """
     Fallback: Lädt lokale Excel-Datei
     Für Entwicklung ohne Drive-Zugriff
+    
+    _columns wird nicht gehasht (ColumnSelection); columns_key = _columns.key trennt die Cache-Einträge.
     """
     try:
-        df = pd.read_excel(file_path, engine='openpyxl')
+        df, _ = load_or_build(
+            projected_key(file_key(file_path), _columns),
+            lambda: parse_workbook(file_path, _columns),
+            SNAPSHOT_DIR
+        )
         st.warning(f"⚠️ Lokale Datei geladen: {file_path}")
+        if CONFIG["show_debug"] and 'memory_report' in df.attrs:
+            st.sidebar.write(format_memory_report(df.attrs['memory_report']))
         return df
     except FileNotFoundError:
         st.error(f"❌ Datei nicht gefunden: {file_path}")
@@ -107,13 +305,16 @@ def load_local_fallback(file_path):
         st.error(f"❌ Fehler beim Laden: {e}")
         return None
 
-def load_data():
+def load_data(columns=None):
     """
     Haupt-Loader mit Smart Fallback
     
     1. Versucht von Google Drive zu laden (wenn credentials vorhanden)
     2. Fallback zu lokaler Datei (für Development)
     
+    Args:
+        columns: ColumnSelection des Dashboards (None = alle Spalten)
+    
     Returns:
         DataFrame oder None
     """
@@ -133,56 +334,55 @@ def load_data():
     file_id = st.secrets['google_drive']['file_id']
     
     # Von Drive laden
-    df = load_from_drive(credentials, file_id)
+    df = load_from_drive(credentials, file_id, columns)
     
     # Fallback zu lokal (falls Drive fehlschlägt)
     if df is None and CONFIG["show_debug"]:
         st.warning("⚠️ Drive-Laden fehlgeschlagen, versuche lokale Datei...")
-        df = load_local_fallback("Dashboard_Master_DE_v2.xlsx")
+        df = load_local_fallback("Dashboard_Master_DE_v2.xlsx", columns, columns.key if columns else None)
     
     return df
 
-def validate_dataframe(df):
+def show_schema_errors(errors):
     """
-    Prüft ob DataFrame die erwarteten Spalten hat
+    Zeigt Fehler/Hinweise aus validate_schema an
+    
+    Args:
+        errors: Liste aus validate_schema
     
     Returns:
-        (bool, list) - (is_valid, missing_columns)
+        bool: True wenn die Daten unbrauchbar sind
     """
-    required_columns = [
-        'VH-nr.',
-        'Niederlassung',
-        'Kosten YTD',
-        'Umsätze YTD',
-        'DB YTD'
-    ]
-    
-    missing = [col for col in required_columns if col not in df.columns]
-    
-    if missing:
-        st.error(f"❌ Fehlende Spalten: {', '.join(missing)}")
-        if CONFIG["show_debug"]:
-            st.write("Verfügbare Spalten:", list(df.columns))
-        return False, missing
+    for error in errors:
+        if error['level'] == 'error':
+            st.error(f"❌ {error['message']}")
+        elif CONFIG["show_debug"]:
+            st.sidebar.warning(f"⚠️ {error['message']}")
     
-    return True, []
+    return has_errors(errors)
 
-def get_data():
+def get_data(columns=None):
     """
     Convenience Function: Lädt und validiert Daten
     
+    Args:
+        columns: ColumnSelection des Dashboards - nur diese Spalten werden
+                 geparst und im Cache gehalten (None = alle Spalten)
+    
     Returns:
         DataFrame oder None
     """
-    df = load_data()
+    df = load_data(columns)
     
     if df is None:
         return None
     
-    # Validierung
-    is_valid, missing = validate_dataframe(df)
+    # Validierung gegen das Schema (Niederlassung ist Pflicht für die Row-Level-Security)
+    errors = validate_schema(df, required=['Niederlassung'])
     
-    if not is_valid:
+    if show_schema_errors(errors):
+        if CONFIG["show_debug"]:
+            st.write("Verfügbare Spalten:", list(df.columns))
         return None
     
     return df
@@ -0,0 +1,357 @@
+"""
+Datenaufbereitung für die Maschinen-Tabelle
+Wird von allen Loadern genutzt, damit Snapshots bereits aufbereitete Daten enthalten
+"""
+
+import re
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+# Kennzahlen mit Monatsspalten ("Kosten Jan 25", "Umsätze Jan 25", "DB Jan 25")
+MONTHLY_KINDS = ['Kosten', 'Umsätze', 'DB']
+
+# Monatsnamen wie in der Excel-Datei (deutsch, teils englisch abgekürzt)
+MONTH_NAMES = ['Jan', 'Feb', 'Mar', 'Apr', 'Mai', 'Jun', 'Jul', 'Aug', 'Sep', 'Okt', 'Nov', 'Dez']
+MONTH_ALIASES = {'Mär': 3, 'May': 5, 'Oct': 10, 'Dec': 12}
+
+MONTHLY_COLUMN_PATTERN = re.compile(r'^(Kosten|Umsätze|DB) ([A-Za-zäÄ]{3}) (\d{2}|\d{4})$')
+
+# Erwartete Struktur der Maschinen-Tabelle
+# - required: Spalten ohne die kein Dashboard funktioniert (weitere Pflichtspalten
+#   gibt jedes Dashboard bei validate_schema an, z.B. Niederlassung für die RLS)
+# - id: Schlüssel, werden als getrimmter String geführt
+# - money: Geldspalten (YTD + alle Monatsspalten), NaN → 0, 2 Nachkommastellen
+MACHINE_SCHEMA = {
+    'required': ['VH-nr.', 'Kosten YTD', 'Umsätze YTD', 'DB YTD'],
+    'id': ['VH-nr.'],
+    'money': [f'{kind} YTD' for kind in MONTHLY_KINDS],
+}
+
+
+# Spalten, die die Dashboards (app.py, v2, v4) tatsächlich anzeigen oder filtern
+DASHBOARD_COLUMNS = [
+    'VH-nr.', 'Code', 'Omschrijving', 'Niederlassung',
+    'Kosten YTD', 'Umsätze YTD', 'DB YTD', 'Marge YTD %',
+    '1. Product Family', '2. Product Group'
+]
+
+
+class ColumnSelection:
+    """
+    Spaltenauswahl eines Dashboards für read_excel(usecols=...)
+
+    Unterstützt "in" wie eine Liste; Monatsspalten werden über das
+    Namensmuster erkannt, damit neue Monate ohne Code-Änderung geladen werden.
+    """
+
+    def __init__(self, columns, monthly=True):
+        """
+        Args:
+            columns: Feste Spaltennamen
+            monthly: Alle Monatsspalten (Kosten/Umsätze/DB <Monat>) mitladen
+        """
+        self.columns = tuple(columns)
+        self.monthly = monthly
+
+    def __contains__(self, name):
+        if name in self.columns:
+            return True
+        return self.monthly and MONTHLY_COLUMN_PATTERN.match(str(name)) is not None
+
+    def __repr__(self):
+        return f"ColumnSelection({list(self.columns)!r}, monthly={self.monthly})"
+
+    @property
+    def key(self):
+        """Kurzer, stabiler Key für Snapshot- und Cache-Namen"""
+        return hashlib.md5(repr(self).encode('utf-8')).hexdigest()[:8]
+
+
+def schema_error(message, column=None, level='error'):
+    """
+    Strukturierter Fehler/Hinweis aus Aufbereitung oder Validierung
+
+    Args:
+        message: Text für die Anzeige
+        column: Betroffene Spalte (optional)
+        level: 'error' (Daten unbrauchbar) oder 'warning'
+
+    Returns:
+        dict mit level, column, message
+    """
+    return {'level': level, 'column': column, 'message': message}
+
+
+def has_errors(errors):
+    """Prüft ob eine Fehlerliste mindestens einen echten Fehler enthält"""
+    return any(error['level'] == 'error' for error in errors)
+
+
+def money_columns(columns, schema=MACHINE_SCHEMA):
+    """
+    Geldspalten laut Schema (YTD-Spalten + Monatsspalten nach Namensmuster)
+
+    Args:
+        columns: Spaltennamen des DataFrames
+        schema: Schema-Definition
+
+    Returns:
+        Liste der Geldspalten in Tabellen-Reihenfolge
+    """
+    fixed = set(schema['money'])
+    return [col for col in columns if col in fixed or MONTHLY_COLUMN_PATTERN.match(col)]
+
+
+def coerce_money(df, columns):
+    """
+    Konvertiert alle Geldspalten in einem vektorisierten Durchgang
+
+    Der ganze Block wird als eine Matrix umgewandelt, gerundet und in einem
+    Schritt zurückgeschrieben. Nicht-numerische Werte werden zu 0 und pro Spalte
+    in df.attrs['coercion_issues'] gezählt.
+
+    Args:
+        df: DataFrame
+        columns: Geldspalten (z.B. aus money_columns)
+
+    Returns:
+        DataFrame mit float64-Geldspalten
+    """
+    if not columns:
+        return df
+
+    block = df[columns]
+    if all(pd.api.types.is_numeric_dtype(dtype) for dtype in block.dtypes):
+        values = block.to_numpy(dtype='float64')
+        invalid = np.zeros(values.shape, dtype=bool)
+    else:
+        raw = block.to_numpy(dtype=object)
+        flat = pd.to_numeric(pd.Series(raw.ravel()), errors='coerce')
+        values = flat.to_numpy(dtype='float64').reshape(raw.shape)
+        invalid = np.isnan(values) & pd.notna(raw)
+
+    values = np.round(np.nan_to_num(values, nan=0.0), 2)
+    df[columns] = pd.DataFrame(values, index=df.index, columns=columns)
+
+    counts = invalid.sum(axis=0)
+    df.attrs['coercion_issues'] = {col: int(n) for col, n in zip(columns, counts) if n}
+    return df
+
+
+def prepare_dataframe(df, schema=MACHINE_SCHEMA):
+    """
+    Bereitet die Rohdaten aus der Excel-Datei auf
+
+    - ID-Spalten (VH-nr.) als String (ohne Leerzeichen)
+    - Geldspalten laut Schema numerisch, NaN → 0, auf 2 Stellen gerundet
+    - Text-Spalten mit gemischten Typen einheitlich als String
+
+    Args:
+        df: Roh-DataFrame aus read_excel
+        schema: Schema-Definition
+
+    Returns:
+        Aufbereiteter DataFrame
+    """
+    for col in schema['id']:
+        if col in df.columns:
+            df[col] = df[col].astype(str).str.strip()
+
+    df = coerce_money(df, money_columns(df.columns, schema))
+
+    # Gemischte Text-Spalten (z.B. Produkt-Level mit Zahlen) vereinheitlichen
+    for col in df.columns[df.dtypes == object]:
+        values = df[col].dropna()
+        if not values.map(type).eq(str).all():
+            df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+
+    return df
+
+
+def validate_schema(df, schema=MACHINE_SCHEMA, required=()):
+    """
+    Prüft den aufbereiteten DataFrame gegen das Schema (ohne UI-Ausgaben)
+
+    Args:
+        df: Aufbereiteter DataFrame
+        schema: Schema-Definition
+        required: Zusätzliche Pflichtspalten des Dashboards (z.B. ['Niederlassung'])
+
+    Returns:
+        Liste von Fehlern/Hinweisen (siehe schema_error), leer wenn alles passt
+    """
+    errors = []
+
+    missing = [col for col in [*schema['required'], *required] if col not in df.columns]
+    if missing:
+        errors.append(schema_error(f"Fehlende Spalten: {', '.join(missing)}"))
+
+    for col in money_columns(df.columns, schema):
+        if df[col].dtype != 'float64':
+            errors.append(schema_error(f"Spalte '{col}' ist nicht numerisch ({df[col].dtype})", col))
+
+    if not monthly_columns(df):
+        errors.append(schema_error("Keine Monatsspalten gefunden (z.B. 'Kosten Jan 25')", level='warning'))
+
+    for col, count in df.attrs.get('coercion_issues', {}).items():
+        errors.append(schema_error(f"{count} ungültige Werte in '{col}' als 0 übernommen", col, level='warning'))
+
+    return errors
+
+
+def compact_dataframe(df, max_category_ratio=0.5):
+    """
+    Verkleinert den DataFrame im Speicher (für billigere Kopien, Masken und Groupbys)
+
+    - Text-Spalten mit wenigen Ausprägungen (Niederlassung, Status, Product-Level, ...)
+      werden zu Kategorien
+    - Ganzzahl-Spalten (Aantal, Contract) auf den kleinsten passenden Typ
+    - Geldspalten bleiben float64: float32 ist nur bis ~167.000 € centgenau und
+      verfälscht Summen über viele Maschinen
+
+    Args:
+        df: Aufbereiteter DataFrame
+        max_category_ratio: Höchstanteil eindeutiger Werte für Kategorien
+
+    Returns:
+        Kompakter DataFrame, Speicherbericht in df.attrs['memory_report']
+    """
+    before = int(df.memory_usage(deep=True).sum())
+
+    for col in df.columns[df.dtypes == object]:
+        if df[col].nunique() <= max_category_ratio * len(df):
+            df[col] = df[col].astype('category')
+
+    for col in df.select_dtypes(include='integer').columns:
+        df[col] = pd.to_numeric(df[col], downcast='integer')
+
+    df.attrs['memory_report'] = {
+        'before': before,
+        'after': int(df.memory_usage(deep=True).sum())
+    }
+    return df
+
+
+def format_memory_report(report):
+    """Debug-Zeile für den Speicherbericht aus compact_dataframe"""
+    before, after = report['before'], report['after']
+    return (
+        f"🧮 Speicher: {before / 1024 ** 2:.1f} MB → {after / 1024 ** 2:.1f} MB "
+        f"(-{(1 - after / before) * 100:.0f}%)"
+    )
+
+
+def parse_month_label(label):
+    """
+    Wandelt ein Monatslabel aus den Spaltennamen in eine Period um
+
+    Args:
+        label: z.B. "Jan 25" oder "Mai 2025"
+
+    Returns:
+        pd.Period (Monat) oder None wenn nicht erkannt
+    """
+    parts = label.split()
+    if len(parts) != 2:
+        return None
+
+    name, year = parts
+    month = MONTH_ALIASES.get(name)
+    if month is None and name in MONTH_NAMES:
+        month = MONTH_NAMES.index(name) + 1
+    if month is None or not year.isdigit():
+        return None
+
+    year = int(year)
+    if year < 100:
+        year += 2000
+    return pd.Period(year=year, month=month, freq='M')
+
+
+def format_month(period):
+    """Label für Charts/Tabellen im Stil der Excel-Datei (z.B. "Jan 25")"""
+    return f"{MONTH_NAMES[period.month - 1]} {period.year % 100:02d}"
+
+
+def monthly_columns(df):
+    """
+    Findet alle Monatsspalten der Tabelle
+
+    Args:
+        df: Aufbereiteter DataFrame
+
+    Returns:
+        Liste von (Spaltenname, Kennzahl, Period), sortiert nach Monat und Kennzahl
+    """
+    columns = []
+    for col in df.columns:
+        match = MONTHLY_COLUMN_PATTERN.match(col)
+        if not match:
+            continue
+        period = parse_month_label(f"{match.group(2)} {match.group(3)}")
+        if period is not None:
+            columns.append((col, match.group(1), period))
+
+    return sorted(columns, key=lambda c: (c[2], MONTHLY_KINDS.index(c[1])))
+
+
+def build_fact_table(df):
+    """
+    Erzeugt die Faktentabelle im Long-Format (Maschine × Monat × Kennzahl)
+
+    Args:
+        df: Aufbereiteter DataFrame (Index = Zeilen-ID der Maschine)
+
+    Returns:
+        DataFrame mit Spalten:
+        - Zeile: Index-Label der Maschine im Haupt-DataFrame (int32)
+        - Monat: Kategorie mit Period[M]-Kategorien (chronologisch geordnet)
+        - Art: Kategorie (Kosten / Umsätze / DB)
+        - Wert: Betrag
+    """
+    columns = monthly_columns(df)
+    n_rows = len(df)
+
+    if not columns:
+        return pd.DataFrame({
+            'Zeile': pd.Series(dtype='int32'),
+            'Monat': pd.Categorical(pd.PeriodIndex([], freq='M'), ordered=True),
+            'Art': pd.Categorical([], categories=MONTHLY_KINDS),
+            'Wert': pd.Series(dtype='float64')
+        })
+
+    names = [col for col, _, _ in columns]
+    values = df[names].to_numpy(dtype='float64')
+
+    # Spaltenweise ausrollen: erst alle Maschinen für Spalte 1, dann Spalte 2, ...
+    zeile = np.tile(df.index.to_numpy().astype('int32'), len(columns))
+    periods = pd.PeriodIndex([period for _, _, period in columns], freq='M')
+    months = pd.Categorical(periods, categories=periods.unique().sort_values(), ordered=True)
+    kinds = pd.Categorical([kind for _, kind, _ in columns], categories=MONTHLY_KINDS)
+    column_ids = np.repeat(np.arange(len(columns)), n_rows)
+
+    return pd.DataFrame({
+        'Zeile': zeile,
+        'Monat': months.take(column_ids),
+        'Art': kinds.take(column_ids),
+        'Wert': values.ravel(order='F')
+    })
+
+
+def dataset_version(df):
+    """
+    Versions-Key eines geladenen Datensatzes (für abgeleitete Strukturen im Cache)
+
+    Args:
+        df: DataFrame aus dem Loader
+
+    Returns:
+        str: Snapshot-Key aus df.attrs oder Hash über den Inhalt
+    """
+    key = df.attrs.get('dataset_key')
+    if key is None:
+        key = str(pd.util.hash_pandas_object(df, index=True).sum())
+        df.attrs['dataset_key'] = key
+    return key
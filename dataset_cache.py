@@ -0,0 +1,213 @@
+"""
+Prozessweiter Daten-Cache mit Stale-While-Revalidate
+Alle Sessions teilen sich einen Datensatz. Vor Ablauf der TTL wird er in einem
+Hintergrund-Thread neu geladen; bis dahin bekommen alle Nutzer die bisherige
+Version und der neue Stand wird atomar eingetauscht.
+Pro Key läuft höchstens ein Ladevorgang gleichzeitig (Single-Flight) - weitere
+Aufrufer warten auf dasselbe Ergebnis statt selbst herunterzuladen.
+Schlagen die Hintergrund-Refreshes dauerhaft fehl, wird ein Datensatz nach
+max_stale × TTL nicht mehr ausgeliefert, sondern synchron neu geladen.
+invalidate() erhöht die Generation eines Keys; Ladevorgänge, die vorher
+gestartet wurden, können den verworfenen Stand nicht zurückschreiben.
+"""
+
+import time
+import threading
+from concurrent.futures import Future
+
+
+class DatasetCache:
+    """Cache für geladene Datensätze mit Hintergrund-Aktualisierung"""
+
+    def __init__(self, ttl, refresh_after=0.8, max_stale=2.0):
+        """
+        Args:
+            ttl: Maximales Alter eines Datensatzes in Sekunden
+            refresh_after: Anteil der TTL, nach dem im Hintergrund neu geladen wird
+            max_stale: Vielfaches der TTL, ab dem ein veralteter Datensatz nicht mehr
+                       ausgeliefert, sondern synchron neu geladen wird
+        """
+        self.ttl = ttl
+        self.refresh_after = refresh_after
+        self.max_stale = max_stale
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._loaders = {}
+        self._timers = {}
+        self._refreshing = set()
+        self._inflight = {}
+        self._metrics = {}
+        self._generations = {}
+
+    def can_serve(self, key):
+        """Prüft ob get() sofort antwortet (Datensatz vorhanden und jünger als max_stale × TTL)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and not self._expired(entry)
+
+    def _expired(self, entry):
+        """Datensatz ist zu alt, um ihn weiter auszuliefern"""
+        return time.monotonic() - entry['loaded_at'] >= self.ttl * self.max_stale
+
+    def get(self, key, loader):
+        """
+        Gibt den Datensatz zurück - lädt nur synchron, wenn noch keiner existiert
+        oder der vorhandene älter als max_stale × TTL ist
+
+        Args:
+            key: Cache-Key (z.B. Drive File ID)
+            loader: Funktion ohne Argumente, die den Datensatz lädt
+
+        Returns:
+            Rückgabewert des Loaders (aktuell oder bisheriger Stand)
+
+        Raises:
+            Exception des Loaders, wenn synchron geladen werden muss und das Laden fehlschlägt
+        """
+        with self._lock:
+            self._loaders[key] = loader
+            entry = self._entries.get(key)
+
+        # Kein Datensatz oder Refreshes schlagen seit max_stale × TTL fehl: synchron laden
+        # (ein laufender Hintergrund-Refresh wird dabei mitgenutzt)
+        if entry is None or self._expired(entry):
+            return self._load(key, loader)
+
+        # Falls der Timer nicht gegriffen hat: spätestens jetzt im Hintergrund laden
+        if time.monotonic() - entry['loaded_at'] >= self.ttl * self.refresh_after:
+            self._start_refresh(key)
+
+        return entry['value']
+
+    def status(self, key):
+        """
+        Status-Infos für das Debug-Panel
+
+        Returns:
+            dict mit age, refreshing, last_error und Lade-Metriken
+            (oder None ohne Eintrag)
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            return {
+                'age': time.monotonic() - entry['loaded_at'],
+                'refreshing': key in self._refreshing,
+                'last_error': entry.get('last_error'),
+                **self._metrics.get(key, {})
+            }
+
+    def invalidate(self, key=None):
+        """
+        Verwirft einen (oder alle) Datensätze - nächster Zugriff lädt synchron
+
+        Laufende Ladevorgänge werden abgekoppelt: ihr Ergebnis geht nur noch an
+        die bereits Wartenden und wird nicht mehr gespeichert.
+        """
+        with self._lock:
+            keys = [key] if key is not None else list(set(self._entries) | set(self._inflight))
+            for k in keys:
+                self._generations[k] = self._generations.get(k, 0) + 1
+                self._inflight.pop(k, None)
+                self._entries.pop(k, None)
+                timer = self._timers.pop(k, None)
+                if timer:
+                    timer.cancel()
+
+    def _load(self, key, loader):
+        """
+        Lädt einen Datensatz - gleichzeitige Aufrufer teilen sich einen Ladevorgang
+
+        Args:
+            key: Cache-Key
+            loader: Funktion ohne Argumente, die den Datensatz lädt
+
+        Returns:
+            Rückgabewert des Loaders (Exceptions werden an alle Wartenden weitergereicht)
+        """
+        with self._lock:
+            flight = self._inflight.get(key)
+            if flight is None:
+                flight = {'future': Future(), 'waiters': 0, 'generation': self._generations.get(key, 0)}
+                self._inflight[key] = flight
+                owner = True
+            else:
+                flight['waiters'] += 1
+                owner = False
+
+        if not owner:
+            return flight['future'].result()
+
+        started = time.monotonic()
+        try:
+            value = loader()
+        except BaseException as e:
+            self._end_flight(key, flight)
+            flight['future'].set_exception(e)
+            raise
+
+        with self._lock:
+            metrics = self._metrics.setdefault(key, {'loads': 0, 'coalesced': 0})
+            metrics['loads'] += 1
+            metrics['coalesced'] += flight['waiters']
+            metrics['last_coalesced'] = flight['waiters']
+            metrics['last_load_seconds'] = time.monotonic() - started
+
+        # Eintrag speichern, bevor der Flight endet - neue Aufrufer sehen sonst keins von beiden
+        self._store(key, value, flight['generation'])
+        self._end_flight(key, flight)
+        flight['future'].set_result(value)
+        return value
+
+    def _end_flight(self, key, flight):
+        """Entfernt den Flight (nicht, wenn invalidate ihn bereits abgekoppelt hat)"""
+        with self._lock:
+            if self._inflight.get(key) is flight:
+                del self._inflight[key]
+
+    def _store(self, key, value, generation):
+        """
+        Tauscht den Datensatz atomar aus und plant die nächste Aktualisierung
+
+        Ergebnisse von Ladevorgängen, die vor einem invalidate() gestartet wurden, werden verworfen.
+        """
+        with self._lock:
+            if self._generations.get(key, 0) != generation:
+                return
+            self._entries[key] = {'value': value, 'loaded_at': time.monotonic(), 'last_error': None}
+            old_timer = self._timers.pop(key, None)
+            timer = threading.Timer(self.ttl * self.refresh_after, self._start_refresh, args=(key,))
+            timer.daemon = True
+            self._timers[key] = timer
+
+        if old_timer:
+            old_timer.cancel()
+        timer.start()
+
+    def _start_refresh(self, key):
+        """Startet genau einen Hintergrund-Refresh pro Key"""
+        with self._lock:
+            if key in self._refreshing or key in self._inflight or key not in self._loaders:
+                return
+            self._refreshing.add(key)
+
+        thread = threading.Thread(
+            target=self._refresh, args=(key,), name=f"dataset-refresh-{key}", daemon=True
+        )
+        thread.start()
+
+    def _refresh(self, key):
+        """Lädt im Hintergrund neu; bei Fehlern bleibt der alte Stand aktiv"""
+        try:
+            with self._lock:
+                loader = self._loaders[key]
+            self._load(key, loader)
+        except Exception as e:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    entry['last_error'] = str(e)
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
@@ -0,0 +1,190 @@
+"""
+Anzeige-Formate für Tabellen
+Die Daten bleiben numerisch; Währungs-, Prozent- und Anzahl-Formate werden pro
+Spalte einmal deklariert und als Styler-Format (Anzeige) bzw. Excel-Zahlenformat
+(Export) angewendet. Die Spalten sortieren numerisch, Beträge behalten die
+Tausendertrennzeichen ("€ 1,234,567"). column_config kennt in Streamlit 1.40 nur
+printf-Formate ohne Gruppierung und wird daher für Zahlen nicht verwendet.
+Bedingte Hervorhebungen werden als Zell-Klassen aus den numerischen Arrays
+berechnet und für Styler (Anzeige) und Excel-Export gleichermaßen verwendet.
+"""
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from openpyxl.styles import Font, PatternFill
+
+# Formate für Styler.format (Anzeige) und openpyxl number_format (Export)
+# Prozentwerte sind bereits ×100 - in Excel daher als Zahl mit "%"-Text
+DISPLAY_FORMATS = {
+    'money': "€ {:,.2f}",
+    'money_rounded': "€ {:,.0f}",
+    'percent': "{:.1f}%",
+    'count': "{:,.0f}"
+}
+EXCEL_FORMATS = {
+    'money': '"€ "#,##0.00',
+    'money_rounded': '"€ "#,##0',
+    'percent': '0.0"%"',
+    'count': '#,##0'
+}
+
+# Marge-Schwellen in % (≥ 10 gut, ≥ 5 mittel, sonst schlecht)
+MARGE_THRESHOLDS = (10, 5)
+
+# Zell-Klassen: Hintergrund, Schriftfarbe, fett (Hex ohne #)
+CELL_STYLES = {
+    'marge_gut': {'background': 'd1fae5', 'color': '065f46', 'bold': True},
+    'marge_mittel': {'background': 'fef3c7', 'color': '92400e', 'bold': False},
+    'marge_schlecht': {'background': 'fee2e2', 'color': '991b1b', 'bold': True},
+    'positiv': {'background': None, 'color': '059669', 'bold': True},
+    'negativ': {'background': None, 'color': 'dc2626', 'bold': True}
+}
+
+
+def column_formats(money=(), percent=(), counts=(), rounded=False, formats=DISPLAY_FORMATS):
+    """
+    Formate für numerische Spalten
+
+    Args:
+        money: Spalten in Euro
+        percent: Spalten in Prozent (Werte bereits ×100)
+        counts: Ganzzahlige Spalten (z.B. Anzahl)
+        rounded: Euro ohne Nachkommastellen
+        formats: DISPLAY_FORMATS (Styler) oder EXCEL_FORMATS (Export)
+
+    Returns:
+        dict {Spalte: Format}
+    """
+    money_format = formats['money_rounded'] if rounded else formats['money']
+
+    by_column = {col: money_format for col in money}
+    by_column.update({col: formats['percent'] for col in percent})
+    by_column.update({col: formats['count'] for col in counts})
+    return by_column
+
+
+def excel_formats(money=(), percent=(), counts=(), rounded=False):
+    """Wie column_formats, aber als Excel-Zahlenformate für den Export"""
+    return column_formats(money, percent, counts, rounded, EXCEL_FORMATS)
+
+
+def show_table(df, money=(), percent=(), counts=(), rounded=False, **kwargs):
+    """
+    Zeigt einen DataFrame mit numerischen Spalten und formatierter Anzeige
+
+    Args:
+        df: Anzuzeigende Daten (unverändert numerisch, sortiert numerisch)
+        money, percent, counts, rounded: Wie column_formats
+        **kwargs: Weitere Argumente für st.dataframe (height, hide_index, ...)
+
+    Returns:
+        Rückgabewert von st.dataframe
+    """
+    kwargs.setdefault('use_container_width', True)
+    kwargs.setdefault('hide_index', True)
+    formats = {col: fmt for col, fmt in column_formats(money, percent, counts, rounded).items() if col in df.columns}
+    return st.dataframe(df.style.format(formats, na_rep=''), **kwargs)
+
+
+def marge_classes(values, thresholds=MARGE_THRESHOLDS):
+    """Zell-Klassen für Margen in % (ein vektorisierter Schritt)"""
+    good, medium = thresholds
+    values = np.asarray(values, dtype='float64')
+    return np.select([values >= good, values >= medium], ['marge_gut', 'marge_mittel'], default='marge_schlecht')
+
+
+def sign_classes(values):
+    """Zell-Klassen nach Vorzeichen (≥ 0 positiv, sonst negativ)"""
+    return np.where(np.asarray(values, dtype='float64') >= 0, 'positiv', 'negativ')
+
+
+def cell_classes(df, rules):
+    """
+    Zell-Klassen einer Tabelle
+
+    Args:
+        df: Numerische Daten
+        rules: {Spalte: Klassifizierer}, z.B. {'Marge %': marge_classes, 'DB': sign_classes}
+
+    Returns:
+        DataFrame wie df mit Klassennamen ('' = kein Stil)
+    """
+    classes = pd.DataFrame('', index=df.index, columns=df.columns)
+    for column, classify in rules.items():
+        if column in df.columns:
+            classes[column] = classify(df[column].to_numpy())
+    return classes
+
+
+def _css(style):
+    """CSS-Text einer Zell-Klasse"""
+    parts = []
+    if style['background']:
+        parts.append(f"background-color: #{style['background']}")
+    parts.append(f"color: #{style['color']}")
+    if style['bold']:
+        parts.append('font-weight: bold')
+    return '; '.join(parts)
+
+
+def style_table(df, rules, formats):
+    """
+    Styler mit Zahlenformaten und bedingter Hervorhebung
+
+    Args:
+        df: Numerische Daten
+        rules: Wie cell_classes
+        formats: Formate für Styler.format, z.B. column_formats(money=['DB'], rounded=True)
+
+    Returns:
+        pandas Styler (CSS für alle Zellen in einem Aufruf)
+    """
+    css = {name: _css(style) for name, style in CELL_STYLES.items()}
+    css[''] = ''
+    styles = cell_classes(df, rules).apply(lambda column: column.map(css))
+    return df.style.format(formats).apply(lambda _: styles, axis=None)
+
+
+def apply_excel_styles(worksheet, classes, header_rows=1):
+    """
+    Überträgt Zell-Klassen auf ein openpyxl-Arbeitsblatt
+
+    Args:
+        worksheet: Arbeitsblatt, in das df mit index=False geschrieben wurde
+        classes: Ergebnis von cell_classes für denselben DataFrame
+        header_rows: Anzahl Kopfzeilen über den Daten
+    """
+    fills = {
+        name: PatternFill('solid', start_color=style['background']) if style['background'] else None
+        for name, style in CELL_STYLES.items()
+    }
+    fonts = {name: Font(color=style['color'], bold=style['bold']) for name, style in CELL_STYLES.items()}
+
+    values = classes.to_numpy()
+    for row, col in zip(*np.nonzero(values != '')):
+        name = values[row, col]
+        cell = worksheet.cell(row=row + header_rows + 1, column=col + 1)
+        cell.font = fonts[name]
+        if fills[name] is not None:
+            cell.fill = fills[name]
+
+
+def apply_excel_formats(worksheet, df, formats, header_rows=1):
+    """
+    Setzt Excel-Zahlenformate spaltenweise (Werte bleiben Zahlen)
+
+    Args:
+        worksheet: Arbeitsblatt, in das df mit index=False geschrieben wurde
+        df: Exportierte Daten
+        formats: Ergebnis von excel_formats
+        header_rows: Anzahl Kopfzeilen über den Daten
+    """
+    for col, column in enumerate(df.columns, start=1):
+        number_format = formats.get(column)
+        if number_format is None:
+            continue
+        for (cell,) in worksheet.iter_rows(
+            min_row=header_rows + 1, max_row=header_rows + len(df), min_col=col, max_col=col
+        ):
+            cell.number_format = number_format
@@ -0,0 +1,108 @@
+"""
+Figure-Cache für Plotly-Charts
+Speichert die fertige go.Figure pro Datenstand, effektivem Filterzustand und
+Chart. Unveränderte Charts werden bei einem Rerun nicht neu gebaut (und nicht
+erneut aus JSON geparst); Sessions mit gleichem Zustand (z.B. Admins mit
+"Gesamt") teilen sich die Einträge. Älteste Einträge werden verdrängt (LRU).
+
+Die Figures werden geteilt und dürfen nach dem Abruf nicht verändert werden -
+st.plotly_chart liest sie nur (to_dict).
+
+Teilweise Umsetzung: gespart wird nur der Aufbau der Figure. st.plotly_chart
+serialisiert auch bei einem Treffer erneut (to_dict + to_json). Ein Rendern
+direkt aus gespeichertem Plotly-JSON bietet Streamlit 1.40 nicht an; ein als
+dict übergebenes Spec wird sogar erneut über go.Figure validiert. Die
+Auswahl-Events (on_select) gibt es nur über st.plotly_chart.
+"""
+
+import threading
+from collections import OrderedDict
+
+
+def freeze(value):
+    """
+    Macht Filter-/Parameterwerte hashbar (Listen → Tupel, dict → sortierte Tupel)
+
+    Args:
+        value: Beliebig verschachtelte Werte aus Filtern und Widgets
+
+    Returns:
+        Hashbarer Wert
+    """
+    if isinstance(value, dict):
+        return tuple(sorted((key, freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(freeze(item) for item in value))
+    return value
+
+
+class FigureCache:
+    """LRU-Cache: (Chart, Datenstand, Filter, Parameter) → go.Figure"""
+
+    def __init__(self, max_entries=64):
+        """
+        Args:
+            max_entries: Maximale Anzahl gespeicherter Figures
+        """
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def figure(self, key, build):
+        """
+        Figure aus dem Cache oder neu gebaut
+
+        Args:
+            key: Hashbarer Key (siehe figure_key)
+            build: Funktion ohne Argumente, die die go.Figure erstellt
+
+        Returns:
+            go.Figure (geteilt - nur lesen, z.B. an st.plotly_chart übergeben)
+        """
+        with self._lock:
+            figure = self._entries.get(key)
+            if figure is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return figure
+            self.misses += 1
+
+        # Außerhalb des Locks bauen - im Zweifel baut eine zweite Session dieselbe Figure
+        figure = build()
+
+        with self._lock:
+            self._entries[key] = figure
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+        return figure
+
+    def clear(self):
+        """Leert den Cache"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+def figure_key(chart_id, version, filters, **params):
+    """
+    Cache-Key eines Charts
+
+    Args:
+        chart_id: Name des Charts (z.B. 'top_10')
+        version: Datenstand (data_prep.dataset_version)
+        filters: Effektiver Filterzustand (z.B. base_filters)
+        **params: Weitere Einflüsse auf den Chart (z.B. Sortierung)
+
+    Returns:
+        Hashbares Tupel
+    """
+    return (chart_id, version, freeze(filters), freeze(params))
@@ -0,0 +1,193 @@
+"""
+Filter-Index für die Sidebar-Filter
+Pro Filter-Dimension und Wert wird einmal pro Datenstand eine Bitmap (bool-Array)
+berechnet. Eine Auswahl ist das bitweise UND der passenden Bitmaps und wird als
+schreibgeschützte Liste von Zeilenpositionen weitergegeben - der DataFrame selbst
+wird nicht kopiert.
+"""
+
+import numpy as np
+import pandas as pd
+
+from aggregates import is_active
+
+# Spalten, nach denen in der Sidebar gefiltert wird
+FILTER_DIMENSIONS = ['Niederlassung', '1. Product Family', '2. Product Group']
+
+
+class FilterIndex:
+    """Bitmaps pro Filter-Wert für schnelle Zeilenauswahl ohne Kopien"""
+
+    def __init__(self, df, dimensions=FILTER_DIMENSIONS):
+        """
+        Args:
+            df: Aufbereiteter DataFrame (alle Maschinen)
+            dimensions: Spalten, für die Bitmaps erstellt werden
+        """
+        self.n_rows = len(df)
+        self.bitmaps = {}
+
+        for dim in dimensions:
+            if dim not in df.columns:
+                continue
+            # factorize: fehlende Werte bekommen Code -1 und damit keine Bitmap
+            codes, uniques = pd.factorize(df[dim])
+            self.bitmaps[dim] = {value: codes == i for i, value in enumerate(uniques)}
+
+        self.active = is_active(df).to_numpy()
+
+    def value_mask(self, dim, values):
+        """
+        Bitmap für "Spalte hat einen der Werte"
+
+        Args:
+            dim: Filter-Dimension
+            values: Liste erlaubter Werte
+
+        Returns:
+            bool-Array über alle Zeilen
+        """
+        mask = np.zeros(self.n_rows, dtype=bool)
+        for value in values:
+            bitmap = self.bitmaps.get(dim, {}).get(value)
+            if bitmap is not None:
+                mask |= bitmap
+        return mask
+
+    def mask(self, niederlassungen=None, family=None, group=None, active_only=False):
+        """
+        Kombiniert die Filter per bitweisem UND
+
+        Args:
+            niederlassungen: Erlaubte/gewählte Niederlassungen (None = alle)
+            family: Product Family (None = alle)
+            group: Product Group (None = alle)
+            active_only: Nur Maschinen mit YTD-Aktivität
+
+        Returns:
+            bool-Array über alle Zeilen
+        """
+        mask = np.ones(self.n_rows, dtype=bool)
+
+        if niederlassungen is not None and 'Niederlassung' in self.bitmaps:
+            mask &= self.value_mask('Niederlassung', niederlassungen)
+        if family is not None and '1. Product Family' in self.bitmaps:
+            mask &= self.value_mask('1. Product Family', [family])
+        if group is not None and '2. Product Group' in self.bitmaps:
+            mask &= self.value_mask('2. Product Group', [group])
+        if active_only:
+            mask &= self.active
+
+        return mask
+
+    def select(self, **filters):
+        """
+        Zeilenpositionen einer Auswahl (Argumente wie mask)
+
+        Returns:
+            Schreibgeschütztes int-Array mit Positionen (für df.iloc / take)
+        """
+        rows = np.flatnonzero(self.mask(**filters))
+        rows.setflags(write=False)
+        return rows
+
+
+def build_dimensions(df):
+    """
+    Dimensions-Wörterbücher für die abhängigen Dropdowns (einmal pro Datenstand)
+
+    Args:
+        df: Aufbereiteter DataFrame (alle Maschinen)
+
+    Returns:
+        dict mit:
+        - branches: sortierte Niederlassungen
+        - families: sortierte Product Families
+        - family_groups: {Family: [Groups]}
+        - branch_family_groups: {Niederlassung: {Family: [Groups]}}
+    """
+    dims = [dim for dim in FILTER_DIMENSIONS if dim in df.columns]
+    combos = df.groupby(dims, observed=True, dropna=False).size().index.to_frame(index=False)
+    combos = combos.reindex(columns=FILTER_DIMENSIONS)
+
+    branch_family_groups = {}
+    family_groups = {}
+    for branch, family, group in combos.itertuples(index=False):
+        if pd.isna(branch) or pd.isna(family):
+            continue
+        groups = branch_family_groups.setdefault(branch, {}).setdefault(family, set())
+        all_groups = family_groups.setdefault(family, set())
+        if not pd.isna(group):
+            groups.add(group)
+            all_groups.add(group)
+
+    return {
+        'branches': sorted(combos['Niederlassung'].dropna().unique()),
+        'families': sorted(family_groups),
+        'family_groups': {family: sorted(groups) for family, groups in family_groups.items()},
+        'branch_family_groups': {
+            branch: {family: sorted(groups) for family, groups in families.items()}
+            for branch, families in branch_family_groups.items()
+        }
+    }
+
+
+def dropdown_options(dimensions, niederlassungen=None, family=None):
+    """
+    Product-Family- und Product-Group-Optionen für die Sidebar
+
+    Args:
+        dimensions: Ergebnis von build_dimensions
+        niederlassungen: Erlaubte Niederlassungen des Users (None = alle)
+        family: Gewählte Family (None = alle)
+
+    Returns:
+        (families, groups) - sortierte Listen
+    """
+    if niederlassungen is None:
+        families = dimensions['families']
+        if family is None:
+            groups = sorted({g for groups in dimensions['family_groups'].values() for g in groups})
+        else:
+            groups = dimensions['family_groups'].get(family, [])
+        return families, groups
+
+    scoped = [dimensions['branch_family_groups'].get(nl, {}) for nl in niederlassungen]
+    families = sorted({fam for per_branch in scoped for fam in per_branch})
+    groups = sorted({
+        group
+        for per_branch in scoped
+        for fam, fam_groups in per_branch.items() if family is None or fam == family
+        for group in fam_groups
+    })
+    return families, groups
+
+
+def column_values(df, column, rows):
+    """
+    Werte einer Spalte für die ausgewählten Zeilen
+
+    Args:
+        df: DataFrame, auf den sich der Index bezieht
+        column: Spaltenname
+        rows: Zeilenpositionen aus FilterIndex.select
+
+    Returns:
+        numpy-Array
+    """
+    return df[column].to_numpy()[rows]
+
+
+def take(df, rows, columns):
+    """
+    Holt nur die benötigten Spalten der ausgewählten Zeilen
+
+    Args:
+        df: DataFrame, auf den sich der Index bezieht
+        rows: Zeilenpositionen aus FilterIndex.select
+        columns: Benötigte Spalten
+
+    Returns:
+        Kleiner DataFrame (Index-Labels wie im Original)
+    """
+    return df.iloc[rows, [df.columns.get_loc(col) for col in columns]]
@@ -0,0 +1,100 @@
+"""
+Maschinen-Index für die Einzelansicht
+Hash-Index von VH-nr. und Code auf Zeilenpositionen plus Monatsverlauf pro
+Maschine (Zeile der MonthlyMatrix). Suche und Verlauf kosten damit unabhängig
+von der Flottengröße nur einen Dict-Zugriff bzw. eine Array-Zeile.
+"""
+
+import numpy as np
+import pandas as pd
+
+from aggregates import MonthlyMatrix
+
+# Spalten, über die eine Maschine gefunden wird (VH-nr. ist nicht eindeutig)
+KEY_COLUMNS = ['VH-nr.', 'Code']
+
+
+def normalize_key(value):
+    """Vergleichbarer Suchschlüssel (Text ohne Leerzeichen am Rand)"""
+    return str(value).strip()
+
+
+class MachineIndex:
+    """VH-nr./Code → Zeilenpositionen und Monatsverlauf pro Maschine"""
+
+    def __init__(self, df, key_columns=KEY_COLUMNS):
+        """
+        Args:
+            df: Aufbereiteter DataFrame (alle Maschinen)
+            key_columns: Spalten, die als Suchschlüssel dienen
+        """
+        self.df = df
+        self.keys = {}
+
+        for column in key_columns:
+            if column not in df.columns:
+                continue
+            values = df[column].astype('string').str.strip()
+            # indices liefert Positionen; fehlende Werte werden nicht indiziert
+            self.keys[column] = {
+                key: positions.astype(np.int64)
+                for key, positions in values.groupby(values, sort=False).indices.items()
+            }
+
+        self.monthly = MonthlyMatrix(df)
+
+    def lookup(self, query, allowed=None):
+        """
+        Sucht Maschinen über VH-nr. oder Code
+
+        Args:
+            query: VH-nr. oder Code (exakt; Code auch in Kleinbuchstaben)
+            allowed: Optionale bool-Maske der sichtbaren Zeilen (Row-Level-Security)
+
+        Returns:
+            int-Array mit Zeilenpositionen (leer = kein Treffer)
+        """
+        key = normalize_key(query)
+        if not key:
+            return np.empty(0, dtype=np.int64)
+
+        found = [
+            positions
+            for column in self.keys
+            for positions in (self.keys[column].get(key), self.keys[column].get(key.upper()))
+            if positions is not None
+        ]
+        if not found:
+            return np.empty(0, dtype=np.int64)
+
+        positions = np.unique(np.concatenate(found))
+        if allowed is not None:
+            positions = positions[allowed[positions]]
+        return positions
+
+    def record(self, position):
+        """Stammdaten und YTD-Werte einer Maschine (Series)"""
+        return self.df.iloc[position]
+
+    def label(self, position):
+        """Anzeigename "VH-nr. | Code | Omschrijving" einer Maschine"""
+        row = self.record(position)
+        return ' | '.join(str(row[col]) for col in ['VH-nr.', 'Code', 'Omschrijving'] if col in row.index)
+
+    def history(self, position):
+        """
+        Monatsverlauf einer Maschine
+
+        Args:
+            position: Zeilenposition im DataFrame
+
+        Returns:
+            DataFrame mit Monat, Kosten, Umsaetze, DB
+        """
+        kosten, umsaetze, db = self.monthly.values[position]
+        return pd.DataFrame({
+            'Monat': self.monthly.labels,
+            'Kosten': kosten,
+            'Umsaetze': umsaetze,
+            'DB': db
+        })
@@ -0,0 +1,71 @@
+"""
+Pareto-/ABC-Analyse
+Kumulierte Anteile werden vektorisiert (cumsum) berechnet - für
+beliebige Kennzahlen, konfigurierbare A/B/C-Schwellen und optional getrennt pro
+Niederlassung oder Product Group in einem gruppierten Durchgang.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Kumulierte Anteile für A (80 %) und B (95 %), Rest = C
+ABC_THRESHOLDS = (0.8, 0.95)
+
+ABC_CLASSES = ['A', 'B', 'C']
+
+
+def pareto_table(df, metric, thresholds=ABC_THRESHOLDS, by=None):
+    """
+    ABC-Klassifizierung nach einer Kennzahl
+
+    Eine Zeile gehört zur Klasse A, solange die Summe aller größeren Werte
+    der Partition den A-Anteil noch nicht erreicht hat (die Zeile, mit der der
+    Anteil erreicht wird, zählt also noch zu A) - analog für B, Rest ist C.
+
+    Args:
+        df: DataFrame (z.B. Maschinen ohne Umsatz); Kennzahl sollte ≥ 0 sein
+        metric: Spalte, nach der klassifiziert wird (Kosten, Umsätze, DB ...)
+        thresholds: Kumulierte Anteile für (A, B)
+        by: Partition(en), z.B. 'Niederlassung' oder '2. Product Group' (None = gesamt)
+
+    Returns:
+        DataFrame, absteigend nach Kennzahl sortiert (je Partition), mit
+        zusätzlichen Spalten 'Anteil %', 'Kumuliert %' und 'Klasse'
+    """
+    keys = [] if by is None else ([by] if isinstance(by, str) else list(by))
+
+    sort_columns = keys + [metric]
+    table = df.sort_values(sort_columns, ascending=[True] * len(keys) + [False], kind='mergesort')
+    values = table[metric].to_numpy(dtype='float64')
+
+    if keys:
+        grouped = pd.Series(values, index=table.index).groupby([table[key] for key in keys], observed=True, sort=False)
+        cumulative = grouped.cumsum().to_numpy()
+        totals = grouped.transform('sum').to_numpy()
+    else:
+        cumulative = np.cumsum(values)
+        totals = np.full(len(values), cumulative[-1] if len(values) else 0.0)
+
+    # Summe aller größeren Werte der Partition = Vorgänger der laufenden Summe
+    # (nicht cumulative - values, damit die Schwelle exakt wie bei einer Schleife greift)
+    before = np.concatenate(([0.0], cumulative[:-1]))
+    if keys and len(values):
+        codes = table.groupby(keys, observed=True, sort=False).ngroup().to_numpy()
+        before[1:][codes[1:] != codes[:-1]] = 0.0
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        share = np.where(totals != 0, values / totals * 100, 0.0)
+        cumulative_share = np.where(totals != 0, cumulative / totals * 100, 0.0)
+
+    limit_a, limit_b = thresholds
+    klasse = np.select(
+        [before < totals * limit_a, before < totals * limit_b],
+        ABC_CLASSES[:2],
+        default=ABC_CLASSES[2]
+    )
+
+    table = table.copy()
+    table['Anteil %'] = share
+    table['Kumuliert %'] = cumulative_share
+    table['Klasse'] = pd.Categorical(klasse, categories=ABC_CLASSES)
+    return table
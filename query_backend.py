@@ -0,0 +1,432 @@
+"""
+Abfrage-Backends für Übersicht, Produktanalyse, Top/Worst und Pareto
+"pandas" nutzt Cube, Filter- und Ranking-Index im Speicher, "duckdb" registriert
+die aufbereitete Maschinen-Tabelle einmal pro Datenstand in einer In-Process-
+DuckDB und beantwortet die Sektionen mit parametrisierten SQL-Abfragen,
+"polars" baut dieselbe Kette als LazyFrame (Predicate Pushdown, parallele
+Group-Bys). Alle Backends liefern dieselben DataFrames/Series; gewählt wird über
+CONFIG['query_backend'], fehlt die Bibliothek, wird automatisch pandas verwendet.
+"""
+
+import threading
+
+import numpy as np
+import pandas as pd
+
+from aggregates import COUNT_COLUMN, build_cube, slice_cube, rollup
+from data_prep import money_columns
+from filters import FilterIndex, column_values, take
+from pareto import ABC_CLASSES, ABC_THRESHOLDS, pareto_table
+from ranking import RANKING_METRICS, RankingIndex
+
+try:
+    import duckdb
+    DUCKDB_AVAILABLE = True
+except ImportError:  # duckdb optional - ohne duckdb wird das pandas-Backend genutzt
+    DUCKDB_AVAILABLE = False
+
+try:
+    import polars as pl
+    POLARS_AVAILABLE = True
+except ImportError:  # polars optional - ohne polars wird das pandas-Backend genutzt
+    POLARS_AVAILABLE = False
+
+# Tabellen- und Positionsspalte in DuckDB (Position = Zeile im DataFrame, für stabile Sortierung)
+TABLE_NAME = 'maschinen'
+POSITION_COLUMN = '_pos'
+
+
+class PandasBackend:
+    """Abfragen über Cube, FilterIndex und RankingIndex"""
+
+    name = 'pandas'
+
+    def __init__(self, df, cube=None, filter_index=None, ranking_index=None):
+        """
+        Args:
+            df: Aufbereiteter DataFrame (alle Maschinen)
+            cube: Cube aus build_cube (None = wird gebaut)
+            filter_index: FilterIndex über df (None = wird gebaut)
+            ranking_index: RankingIndex über df (None = wird gebaut)
+        """
+        self.df = df
+        self.cube = build_cube(df) if cube is None else cube
+        self.filter_index = FilterIndex(df) if filter_index is None else filter_index
+        self.ranking_index = RankingIndex(df, self.filter_index) if ranking_index is None else ranking_index
+
+    def overview(self, filters):
+        """
+        Gesamtsummen der Auswahl
+
+        Args:
+            filters: Filter wie bei FilterIndex.mask (niederlassungen, family, group, active_only)
+
+        Returns:
+            Series mit allen Geldspalten und Anzahl
+        """
+        return rollup(slice_cube(self.cube, **filters))
+
+    def product_stats(self, by, filters):
+        """
+        Summen pro Ausprägung einer Dimension
+
+        Args:
+            by: Dimension (z.B. '1. Product Family')
+            filters: Filter wie bei overview
+
+        Returns:
+            DataFrame mit Dimension, Geldspalten und Anzahl (fehlende Werte ausgelassen)
+        """
+        return rollup(slice_cube(self.cube, **filters), by)
+
+    def top_n(self, metric, columns, n=10, filters=None, ascending=False, min_values=None):
+        """
+        Top- (oder Bottom-) N Maschinen einer Kennzahl
+
+        Args:
+            metric: Kennzahl (z.B. 'DB YTD')
+            columns: Spalten des Ergebnisses
+            n: Anzahl Treffer
+            filters: Filter wie bei overview
+            ascending: True = kleinste Werte zuerst
+            min_values: Relevanz-Schwellen {Spalte: Mindestwert}
+
+        Returns:
+            DataFrame in Rangfolge
+        """
+        rows = self.ranking_index.top_n(metric, n, filters, ascending=ascending, min_values=min_values)
+        return take(self.df, rows, columns)
+
+    def no_revenue_pareto(self, columns, filters, metric='Kosten YTD', thresholds=ABC_THRESHOLDS):
+        """
+        ABC-Klassifizierung der Maschinen mit Kosten, aber ohne Umsatz
+
+        Args:
+            columns: Spalten des Ergebnisses (inkl. metric)
+            filters: Filter wie bei overview
+            metric: Kennzahl der Klassifizierung
+            thresholds: Kumulierte Anteile für (A, B)
+
+        Returns:
+            DataFrame wie pareto.pareto_table
+        """
+        rows = self.filter_index.select(**filters)
+        rows = rows[
+            (column_values(self.df, 'Kosten YTD', rows) > 0) & (column_values(self.df, 'Umsätze YTD', rows) == 0)
+        ]
+        return pareto_table(take(self.df, rows, columns), metric, thresholds)
+
+
+class DuckDBBackend:
+    """Abfragen per parametrisiertem SQL auf einer In-Process-DuckDB"""
+
+    name = 'duckdb'
+
+    def __init__(self, df):
+        """
+        Args:
+            df: Aufbereiteter DataFrame (alle Maschinen) - wird einmal in DuckDB kopiert
+        """
+        self.columns = list(df.columns)
+        self.measures = money_columns(df.columns)
+        self.index = df.index
+
+        self._lock = threading.Lock()
+        self._con = duckdb.connect(database=':memory:')
+
+        source = df.reset_index(drop=True)
+        source[POSITION_COLUMN] = np.arange(len(source), dtype='int64')
+        self._con.register('source_df', source)
+        self._con.execute(f"CREATE TABLE {TABLE_NAME} AS SELECT * FROM source_df")
+        self._con.unregister('source_df')
+
+    def _query(self, sql, params=()):
+        """Führt eine vorbereitete Abfrage aus (eigener Cursor pro Aufruf, threadsicher)"""
+        with self._lock:
+            cursor = self._con.cursor()
+        try:
+            return cursor.execute(sql, list(params)).df()
+        finally:
+            cursor.close()
+
+    def _where(self, niederlassungen=None, family=None, group=None, active_only=False):
+        """
+        WHERE-Klausel mit Platzhaltern für die Sidebar-Filter
+
+        Returns:
+            (sql, params)
+        """
+        clauses, params = ['TRUE'], []
+
+        if niederlassungen is not None and 'Niederlassung' in self.columns:
+            clauses.append('list_contains(?, CAST("Niederlassung" AS VARCHAR))')
+            params.append([str(nl) for nl in niederlassungen])
+        if family is not None and '1. Product Family' in self.columns:
+            clauses.append('CAST("1. Product Family" AS VARCHAR) = ?')
+            params.append(str(family))
+        if group is not None and '2. Product Group' in self.columns:
+            clauses.append('CAST("2. Product Group" AS VARCHAR) = ?')
+            params.append(str(group))
+        if active_only:
+            # Wie aggregates.is_active: fehlende Werte zählen als aktiv
+            clauses.append('("Kosten YTD" IS DISTINCT FROM 0 OR "Umsätze YTD" IS DISTINCT FROM 0)')
+
+        return ' AND '.join(clauses), params
+
+    def overview(self, filters):
+        """Wie PandasBackend.overview"""
+        where, params = self._where(**filters)
+        sums = ', '.join(f'coalesce(sum({_quote(col)}), 0) AS {_quote(col)}' for col in self.measures)
+        result = self._query(
+            f'SELECT {sums}, count(*) AS {_quote(COUNT_COLUMN)} FROM {TABLE_NAME} WHERE {where}',
+            params
+        )
+        return result.iloc[0]
+
+    def product_stats(self, by, filters):
+        """Wie PandasBackend.product_stats"""
+        where, params = self._where(**filters)
+        sums = ', '.join(f'sum({_quote(col)}) AS {_quote(col)}' for col in self.measures)
+        return self._query(
+            f'SELECT {_quote(by)}, {sums}, count(*) AS {_quote(COUNT_COLUMN)} FROM {TABLE_NAME} '
+            f'WHERE {where} AND {_quote(by)} IS NOT NULL '
+            f'GROUP BY {_quote(by)} ORDER BY {_quote(by)}',
+            params
+        )
+
+    def top_n(self, metric, columns, n=10, filters=None, ascending=False, min_values=None):
+        """Wie PandasBackend.top_n"""
+        where, params = self._where(**(filters or {}))
+        for column, minimum in (min_values or {}).items():
+            where += f' AND {_quote(column)} >= ?'
+            params.append(minimum)
+
+        # Gleichstand → kleinere Zeilenposition zuerst (wie ranking.RankingIndex)
+        result = self._query(
+            f'SELECT {POSITION_COLUMN}, {_select(columns)} FROM {TABLE_NAME} '
+            f'WHERE {where} AND {_quote(metric)} IS NOT NULL '
+            f'ORDER BY {_quote(metric)} {"ASC" if ascending else "DESC"}, {POSITION_COLUMN} LIMIT ?',
+            params + [int(n)]
+        )
+        return self._restore_index(result)
+
+    def no_revenue_pareto(self, columns, filters, metric='Kosten YTD', thresholds=ABC_THRESHOLDS):
+        """Wie PandasBackend.no_revenue_pareto (Klassifizierung per Fensterfunktion)"""
+        where, params = self._where(**filters)
+        limit_a, limit_b = thresholds
+        value = _quote(metric)
+
+        result = self._query(
+            f'''
+            WITH auswahl AS (
+                SELECT {POSITION_COLUMN}, {_select(columns)} FROM {TABLE_NAME}
+                WHERE {where} AND "Kosten YTD" > 0 AND "Umsätze YTD" = 0
+            ), kumuliert AS (
+                SELECT *,
+                    sum({value}) OVER (ORDER BY {value} DESC, {POSITION_COLUMN}
+                                       ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW) AS _kum,
+                    coalesce(sum({value}) OVER (ORDER BY {value} DESC, {POSITION_COLUMN}
+                                                ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING), 0) AS _vorher,
+                    sum({value}) OVER () AS _gesamt
+                FROM auswahl
+            )
+            SELECT * EXCLUDE (_kum, _vorher, _gesamt),
+                CASE WHEN _gesamt <> 0 THEN {value} / _gesamt * 100 ELSE 0 END AS "Anteil %",
+                CASE WHEN _gesamt <> 0 THEN _kum / _gesamt * 100 ELSE 0 END AS "Kumuliert %",
+                CASE WHEN _vorher < _gesamt * ? THEN 'A'
+                     WHEN _vorher < _gesamt * ? THEN 'B'
+                     ELSE 'C' END AS "Klasse"
+            FROM kumuliert
+            ORDER BY {value} DESC, {POSITION_COLUMN}
+            ''',
+            params + [limit_a, limit_b]
+        )
+        result['Klasse'] = pd.Categorical(result['Klasse'], categories=ABC_CLASSES)
+        return self._restore_index(result)
+
+    def _restore_index(self, result):
+        """Ersetzt die Positionsspalte durch die Index-Labels des DataFrames"""
+        positions = result.pop(POSITION_COLUMN).to_numpy()
+        result.index = self.index[positions]
+        return result
+
+
+class PolarsBackend:
+    """Abfragen als Polars-LazyFrame (Aktivität → Niederlassung → Family → Group → Aggregat)"""
+
+    name = 'polars'
+
+    def __init__(self, df):
+        """
+        Args:
+            df: Aufbereiteter DataFrame (alle Maschinen) - wird einmal nach Polars konvertiert
+        """
+        self.columns = list(df.columns)
+        self.measures = money_columns(df.columns)
+        self.index = df.index
+        self.frame = pl.from_pandas(df.reset_index(drop=True)).with_row_index(POSITION_COLUMN).lazy()
+
+    def _filtered(self, niederlassungen=None, family=None, group=None, active_only=False):
+        """LazyFrame mit den Sidebar-Filtern (wird erst bei collect ausgeführt)"""
+        frame = self.frame
+
+        if active_only:
+            # Wie aggregates.is_active: fehlende Werte zählen als aktiv
+            frame = frame.filter(pl.col('Kosten YTD').ne_missing(0) | pl.col('Umsätze YTD').ne_missing(0))
+        if niederlassungen is not None and 'Niederlassung' in self.columns:
+            frame = frame.filter(pl.col('Niederlassung').cast(pl.String).is_in([str(nl) for nl in niederlassungen]))
+        if family is not None and '1. Product Family' in self.columns:
+            frame = frame.filter(pl.col('1. Product Family').cast(pl.String) == str(family))
+        if group is not None and '2. Product Group' in self.columns:
+            frame = frame.filter(pl.col('2. Product Group').cast(pl.String) == str(group))
+
+        return frame
+
+    def _sums(self):
+        """Summen aller Geldspalten + Anzahl"""
+        return [pl.col(col).sum() for col in self.measures] + [pl.len().alias(COUNT_COLUMN)]
+
+    def overview(self, filters):
+        """Wie PandasBackend.overview"""
+        result = self._filtered(**filters).select(self._sums()).collect().to_pandas()
+        return result.iloc[0]
+
+    def product_stats(self, by, filters):
+        """Wie PandasBackend.product_stats"""
+        return (
+            self._filtered(**filters)
+            .filter(pl.col(by).is_not_null())
+            .group_by(pl.col(by).cast(pl.String))
+            .agg(self._sums())
+            .sort(by)
+            .collect()
+            .to_pandas()
+        )
+
+    def top_n(self, metric, columns, n=10, filters=None, ascending=False, min_values=None):
+        """Wie PandasBackend.top_n"""
+        frame = self._filtered(**(filters or {}))
+        for column, minimum in (min_values or {}).items():
+            frame = frame.filter(pl.col(column) >= minimum)
+
+        # Gleichstand → kleinere Zeilenposition zuerst (wie ranking.RankingIndex)
+        result = (
+            frame
+            .filter(pl.col(metric).is_not_null() & pl.col(metric).is_not_nan())
+            .sort([metric, POSITION_COLUMN], descending=[not ascending, False])
+            .head(n)
+            .select([POSITION_COLUMN] + list(columns))
+            .collect()
+            .to_pandas()
+        )
+        return self._restore_index(result)
+
+    def no_revenue_pareto(self, columns, filters, metric='Kosten YTD', thresholds=ABC_THRESHOLDS):
+        """Wie PandasBackend.no_revenue_pareto"""
+        limit_a, limit_b = thresholds
+        value = pl.col(metric)
+        total = value.sum()
+        cumulative = value.cum_sum()
+        before = cumulative.shift(1, fill_value=0.0)
+
+        result = (
+            self._filtered(**filters)
+            .filter((pl.col('Kosten YTD') > 0) & (pl.col('Umsätze YTD') == 0))
+            .select([POSITION_COLUMN] + list(columns))
+            .sort([metric, POSITION_COLUMN], descending=[True, False])
+            .with_columns(
+                pl.when(total != 0).then(value / total * 100).otherwise(0.0).alias('Anteil %'),
+                pl.when(total != 0).then(cumulative / total * 100).otherwise(0.0).alias('Kumuliert %'),
+                pl.when(before < total * limit_a).then(pl.lit('A'))
+                  .when(before < total * limit_b).then(pl.lit('B'))
+                  .otherwise(pl.lit('C')).alias('Klasse')
+            )
+            .collect()
+            .to_pandas()
+        )
+        result['Klasse'] = pd.Categorical(result['Klasse'], categories=ABC_CLASSES)
+        return self._restore_index(result)
+
+    def _restore_index(self, result):
+        """Ersetzt die Positionsspalte durch die Index-Labels des DataFrames"""
+        positions = result.pop(POSITION_COLUMN).to_numpy()
+        result.index = self.index[positions]
+        return result
+
+
+def _quote(column):
+    """SQL-Bezeichner in Anführungszeichen (Spaltennamen mit Leer- und Sonderzeichen)"""
+    return '"' + str(column).replace('"', '""') + '"'
+
+
+def _select(columns):
+    """Spaltenliste für SELECT"""
+    return ', '.join(_quote(col) for col in columns)
+
+
+def create_backend(name, df, cube=None, filter_index=None, ranking_index=None):
+    """
+    Erstellt das konfigurierte Abfrage-Backend
+
+    Args:
+        name: 'pandas', 'duckdb' oder 'polars' (CONFIG['query_backend'])
+        df: Aufbereiteter DataFrame (alle Maschinen)
+        cube, filter_index, ranking_index: Bereits gebaute Strukturen für pandas
+
+    Returns:
+        DuckDBBackend, PolarsBackend oder PandasBackend (Fallback, wenn die Bibliothek fehlt)
+    """
+    if name == 'duckdb' and DUCKDB_AVAILABLE:
+        return DuckDBBackend(df)
+    if name == 'polars' and POLARS_AVAILABLE:
+        return PolarsBackend(df)
+    return PandasBackend(df, cube, filter_index, ranking_index)
+
+
+def check_parity(reference, candidate, filters, ranking_columns, pareto_columns, metrics=RANKING_METRICS, min_values=None):
+    """
+    Vergleicht die Ergebnisse zweier Backends für einen Filterzustand
+
+    Args:
+        reference: PandasBackend als Referenz
+        candidate: Zu prüfendes Backend
+        filters: Filter wie bei overview
+        ranking_columns: Spalten für top_n (inkl. der Kennzahlen)
+        pareto_columns: Spalten für no_revenue_pareto
+        metrics: Kennzahlen für Top/Worst
+        min_values: Relevanz-Schwellen für top_n wie in der App (z.B. {'Umsätze YTD': 1000})
+
+    Returns:
+        Liste der abweichenden Sektionen (leer = identische Ergebnisse)
+    """
+    differences = []
+
+    expected, actual = reference.overview(filters), candidate.overview(filters)
+    if not np.allclose(expected.astype('float64'), actual[expected.index].astype('float64')):
+        differences.append('overview')
+
+    for by in ['1. Product Family', '2. Product Group']:
+        if by not in reference.df.columns:
+            continue
+        expected, actual = reference.product_stats(by, filters), candidate.product_stats(by, filters)
+        measures = [col for col in expected.columns if col != by]
+        if (len(expected) != len(actual)
+                or not (expected[by].astype(str).to_numpy() == actual[by].astype(str).to_numpy()).all()
+                or not np.allclose(expected[measures].astype('float64'), actual[measures].astype('float64'))):
+            differences.append(f'product_stats[{by}]')
+
+    for metric in metrics:
+        for ascending in (False, True):
+            expected = reference.top_n(metric, ranking_columns, 10, filters, ascending, min_values)
+            actual = candidate.top_n(metric, ranking_columns, 10, filters, ascending, min_values)
+            if not expected.index.equals(actual.index):
+                differences.append(f'top_n[{metric}, ascending={ascending}, min_values={min_values}]')
+
+    expected = reference.no_revenue_pareto(pareto_columns, filters)
+    actual = candidate.no_revenue_pareto(pareto_columns, filters)
+    if (not expected.index.equals(actual.index)
+            or not (expected['Klasse'].to_numpy() == actual['Klasse'].to_numpy()).all()
+            or not np.allclose(expected['Kumuliert %'], actual['Kumuliert %'])):
+        differences.append('no_revenue_pareto')
+
+    return differences
@@ -0,0 +1,109 @@
+"""
+Ranking-Index für Top/Worst-Auswertungen
+Pro Kennzahl und Niederlassung werden die Maschinen einmal pro Datenstand
+vorsortiert. Eine Top-N-Abfrage mischt nur noch die sortierten Läufe der
+gewählten Niederlassungen (k-Wege-Merge) und bricht nach N Treffern ab.
+"""
+
+import heapq
+from itertools import islice
+
+import numpy as np
+
+# Kennzahlen, für die vorsortiert wird
+RANKING_METRICS = ['DB YTD', 'Umsätze YTD', 'Marge YTD %', 'Kosten YTD']
+
+# Zeilen pro Schritt beim Durchlaufen eines sortierten Laufs
+SCAN_CHUNK = 256
+
+
+class RankingIndex:
+    """Vorsortierte Läufe pro Kennzahl × Niederlassung"""
+
+    def __init__(self, df, filter_index, metrics=RANKING_METRICS):
+        """
+        Args:
+            df: Aufbereiteter DataFrame (alle Maschinen)
+            filter_index: FilterIndex über denselben DataFrame
+            metrics: Kennzahlen, für die Läufe gebaut werden
+        """
+        self.df = df
+        self.filter_index = filter_index
+        self.values = {}
+        self.runs = {}
+        self._min_masks = {}
+
+        branches = filter_index.bitmaps.get('Niederlassung')
+        if branches is None:
+            slices = {None: np.arange(len(df))}
+        else:
+            slices = {value: np.flatnonzero(bitmap) for value, bitmap in branches.items()}
+
+        for metric in metrics:
+            if metric not in df.columns:
+                continue
+            values = df[metric].to_numpy(dtype='float64')
+            self.values[metric] = values
+
+            for branch, rows in slices.items():
+                # Fehlende Werte werden wie bei nlargest/nsmallest ignoriert
+                rows = rows[~np.isnan(values[rows])]
+                # Gleichstand → kleinere Zeilenposition zuerst (wie keep='first')
+                ascending = rows[np.lexsort((rows, values[rows]))]
+                descending = rows[np.lexsort((rows, -values[rows]))]
+                self.runs[(metric, branch, True)] = ascending
+                self.runs[(metric, branch, False)] = descending
+
+    def _min_mask(self, column, minimum):
+        """Maske "Spalte >= Mindestwert" (einmal berechnet, dann wiederverwendet)"""
+        key = (column, minimum)
+        mask = self._min_masks.get(key)
+        if mask is None:
+            mask = self.df[column].to_numpy() >= minimum
+            self._min_masks[key] = mask
+        return mask
+
+    def top_n(self, metric, n=10, filters=None, ascending=False, min_values=None):
+        """
+        Top- (oder Bottom-) N Maschinen einer Kennzahl
+
+        Args:
+            metric: Kennzahl (z.B. 'DB YTD')
+            n: Anzahl Treffer (beliebig, nicht nur 10)
+            filters: Filter wie bei FilterIndex.mask (niederlassungen, family,
+                     group, active_only) - None = keine
+            ascending: True = kleinste Werte zuerst (Worst-Listen)
+            min_values: Relevanz-Schwellen {Spalte: Mindestwert}, z.B. {'Umsätze YTD': 1000}
+
+        Returns:
+            Zeilenpositionen (int-Array), sortiert nach der Kennzahl
+        """
+        filters = filters or {}
+        values = self.values[metric]
+
+        mask = self.filter_index.mask(**filters)
+        for column, minimum in (min_values or {}).items():
+            mask = mask & self._min_mask(column, minimum)
+
+        # Nur die Läufe der ausgewählten Niederlassungen mischen
+        branches = filters.get('niederlassungen')
+        if (metric, None, ascending) in self.runs:
+            keys = [None]
+        elif branches is None:
+            keys = [key[1] for key in self.runs if key[0] == metric and key[2] == ascending]
+        else:
+            keys = [branch for branch in branches if (metric, branch, ascending) in self.runs]
+
+        sign = 1.0 if ascending else -1.0
+        merged = heapq.merge(
+            *(_iter_run(self.runs[(metric, branch, ascending)], mask) for branch in keys),
+            key=lambda pos: (sign * values[pos], pos)
+        )
+        return np.fromiter(islice(merged, n), dtype=np.int64)
+
+
+def _iter_run(run, mask, chunk=SCAN_CHUNK):
+    """Liefert die Positionen eines sortierten Laufs, die in der Maske liegen"""
+    for start in range(0, len(run), chunk):
+        part = run[start:start + chunk]
+        yield from part[mask[part]]
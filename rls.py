@@ -0,0 +1,78 @@
+"""
+Row-Level-Security: ein gemeinsamer View pro erlaubter Niederlassungs-Menge
+Es gibt nur wenige verschiedene Mengen (einzelne Niederlassung, Region, alle).
+Pro Datenstand wird jede Menge einmal gefiltert; alle Sessions mit denselben
+Rechten bekommen denselben DataFrame, statt bei jedem Rerun neu zu filtern.
+"""
+
+import threading
+
+# Kennzeichnung "alle Niederlassungen" in auth_simple (['alle'])
+ALL_BRANCHES = 'alle'
+
+
+def allowed_key(niederlassungen):
+    """
+    Normalisierter Key einer Niederlassungs-Menge
+
+    Args:
+        niederlassungen: Liste erlaubter Niederlassungen (oder ['alle'])
+
+    Returns:
+        Sortiertes Tupel oder None für "alle"
+    """
+    if any(str(nl).lower() == ALL_BRANCHES for nl in niederlassungen):
+        return None
+    return tuple(sorted(set(niederlassungen)))
+
+
+class RLSViews:
+    """
+    Gefilterte DataFrames pro erlaubter Niederlassungs-Menge
+
+    Die Views werden zwischen Sessions geteilt und dürfen nicht verändert
+    werden (nur lesen / weiter filtern).
+    """
+
+    def __init__(self, df, allowed_sets=(), column='Niederlassung'):
+        """
+        Args:
+            df: Aufbereiteter DataFrame (alle Maschinen)
+            allowed_sets: Bekannte Niederlassungs-Mengen (werden vorab gefiltert)
+            column: Spalte mit der Niederlassung
+        """
+        self.df = df
+        self.column = column
+        self._views = {}
+        self._lock = threading.Lock()
+
+        for niederlassungen in allowed_sets:
+            self.view(niederlassungen)
+
+    def view(self, niederlassungen):
+        """
+        View für eine Niederlassungs-Menge (beim ersten Zugriff gefiltert)
+
+        Args:
+            niederlassungen: Liste erlaubter Niederlassungen (oder ['alle'])
+
+        Returns:
+            DataFrame - für "alle" der ungefilterte DataFrame selbst
+        """
+        key = allowed_key(niederlassungen)
+        if key is None or self.column not in self.df.columns:
+            return self.df
+
+        with self._lock:
+            view = self._views.get(key)
+        if view is not None:
+            return view
+
+        view = self.df[self.df[self.column].isin(key)]
+        with self._lock:
+            return self._views.setdefault(key, view)
+
+    def keys(self):
+        """Bereits gefilterte Niederlassungs-Mengen"""
+        with self._lock:
+            return list(self._views)
@@ -0,0 +1,142 @@
+"""
+Snapshot-Cache für aufbereitete DataFrames
+Speichert die Maschinen-Tabelle als Arrow-Datei (Feather v2, unkomprimiert),
+adressiert über den Inhalt der Excel-Datei. Spätere Loads lesen den Snapshot
+per Memory-Mapping statt die Excel-Datei neu zu parsen.
+"""
+
+import os
+import hashlib
+import tempfile
+
+import numpy as np
+
+# Erhöhen, wenn sich prepare_dataframe/compact_dataframe ändert → alte Snapshots werden ignoriert
+SNAPSHOT_FORMAT = 3
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    SNAPSHOTS_AVAILABLE = True
+except ImportError:  # pyarrow optional - ohne Snapshots wird immer geparst
+    SNAPSHOTS_AVAILABLE = False
+
+
+def content_key(data):
+    """
+    Erzeugt einen Snapshot-Key aus dem Dateiinhalt
+
+    Args:
+        data: Bytes oder bytes-like Objekt (z.B. BytesIO.getbuffer())
+
+    Returns:
+        str: MD5-Hex-Digest
+    """
+    return hashlib.md5(data).hexdigest()
+
+
+def file_key(file_path, chunk_size=1 << 20):
+    """
+    Erzeugt einen Snapshot-Key aus einer lokalen Datei
+
+    Args:
+        file_path: Pfad zur Datei
+
+    Returns:
+        str: MD5-Hex-Digest
+    """
+    digest = hashlib.md5()
+    with open(file_path, 'rb') as handle:
+        for chunk in iter(lambda: handle.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def snapshot_path(key, directory):
+    """Pfad der Snapshot-Datei für einen Key"""
+    return os.path.join(directory, f"{key}-v{SNAPSHOT_FORMAT}.arrow")
+
+
+def load_snapshot(key, directory):
+    """
+    Lädt einen Snapshot per Memory-Mapping
+
+    Args:
+        key: Snapshot-Key (Inhalts-Hash)
+        directory: Snapshot-Verzeichnis
+
+    Returns:
+        DataFrame oder None (kein Snapshot / pyarrow fehlt / Datei defekt)
+    """
+    if not SNAPSHOTS_AVAILABLE:
+        return None
+
+    path = snapshot_path(key, directory)
+    if not os.path.exists(path):
+        return None
+
+    try:
+        table = feather.read_table(path, memory_map=True)
+        df = table.to_pandas()
+    except (OSError, pa.ArrowException):
+        # Defekter Snapshot → ignorieren, wird beim nächsten Parse überschrieben
+        return None
+
+    # Arrow liefert fehlende Texte als None - wie beim Excel-Parse NaN verwenden
+    for col in df.columns[df.dtypes == object]:
+        df[col] = df[col].where(df[col].notna(), np.nan)
+
+    return df
+
+
+def save_snapshot(key, df, directory):
+    """
+    Speichert einen DataFrame als Snapshot (atomar via temp-Datei + rename)
+
+    Args:
+        key: Snapshot-Key (Inhalts-Hash)
+        df: Aufbereiteter DataFrame
+        directory: Snapshot-Verzeichnis
+
+    Returns:
+        bool: True wenn gespeichert
+    """
+    if not SNAPSHOTS_AVAILABLE:
+        return False
+
+    try:
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        os.close(fd)
+        feather.write_feather(df, tmp_path, compression='uncompressed')
+        os.replace(tmp_path, snapshot_path(key, directory))
+        return True
+    except (OSError, pa.ArrowException):
+        if 'tmp_path' in locals() and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return False
+
+
+def load_or_build(key, build, directory):
+    """
+    Gibt den Snapshot zu einem Key zurück oder baut ihn neu auf
+
+    Args:
+        key: Snapshot-Key (Inhalts-Hash)
+        build: Funktion ohne Argumente, die den aufbereiteten DataFrame liefert
+        directory: Snapshot-Verzeichnis
+
+    Returns:
+        (DataFrame, bool) - (Daten, aus Snapshot geladen)
+        Der Key steht in df.attrs['dataset_key'] (Version für abgeleitete Caches)
+    """
+    df = load_snapshot(key, directory)
+    if df is not None:
+        df.attrs['dataset_key'] = key
+        return df, True
+
+    df = build()
+    if df is not None:
+        save_snapshot(key, df, directory)
+        df.attrs['dataset_key'] = key
+    return df, False
@@ -0,0 +1,73 @@
+"""
+Parität der Abfrage-Backends
+DuckDB und Polars müssen auf der Beispiel-Datei für mehrere Filterzustände
+dieselben Ergebnisse liefern wie das pandas-Backend (Referenz).
+"""
+
+import os
+
+import pytest
+
+from data_prep import prepare_dataframe, compact_dataframe
+from query_backend import (
+    DUCKDB_AVAILABLE, POLARS_AVAILABLE,
+    PandasBackend, DuckDBBackend, PolarsBackend, check_parity
+)
+from xlsx_reader import read_excel
+
+SAMPLE_WORKBOOK = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'Dashboard_Master_DE_v2.xlsx')
+
+# Spalten wie in app.py (Top/Worst bzw. Maschinen ohne Umsätze)
+RANKING_COLUMNS = ['VH-nr.', 'Code', 'Omschrijving', 'Kosten YTD', 'Umsätze YTD', 'DB YTD', 'Marge YTD %']
+PARETO_COLUMNS = ['VH-nr.', 'Code', 'Omschrijving', 'Kosten YTD', 'Niederlassung']
+
+# Relevanz-Schwellen wie in app.py (Top 10 / Worst 10) plus ohne Schwelle
+MIN_VALUES = {
+    'ohne': None,
+    'top': {'Umsätze YTD': 1000},
+    'worst': {'Kosten YTD': 1000},
+}
+
+BACKENDS = [
+    pytest.param(DuckDBBackend, marks=pytest.mark.skipif(not DUCKDB_AVAILABLE, reason='duckdb nicht installiert')),
+    pytest.param(PolarsBackend, marks=pytest.mark.skipif(not POLARS_AVAILABLE, reason='polars nicht installiert')),
+]
+
+
+@pytest.fixture(scope='module')
+def df():
+    if not os.path.exists(SAMPLE_WORKBOOK):
+        pytest.skip('Beispiel-Datei fehlt')
+    return compact_dataframe(prepare_dataframe(read_excel(SAMPLE_WORKBOOK)))
+
+
+@pytest.fixture(scope='module')
+def reference(df):
+    return PandasBackend(df)
+
+
+def filter_states(df):
+    """Alle Maschinen, eine Niederlassung, Family + Group (mit und ohne Aktiv-Filter)"""
+    niederlassung = df['Niederlassung'].value_counts().index[0]
+    products = df[['1. Product Family', '2. Product Group']].dropna().value_counts().index[0]
+    family, group = products
+
+    return {
+        'alle': dict(niederlassungen=None, family=None, group=None, active_only=False),
+        'niederlassung': dict(niederlassungen=[niederlassung], family=None, group=None, active_only=False),
+        'family_group': dict(niederlassungen=None, family=family, group=group, active_only=False),
+        'family_group_aktiv': dict(niederlassungen=None, family=family, group=group, active_only=True),
+    }
+
+
+@pytest.mark.parametrize('min_values', MIN_VALUES.values(), ids=MIN_VALUES.keys())
+@pytest.mark.parametrize('backend_class', BACKENDS)
+def test_backend_matches_pandas(df, reference, backend_class, min_values):
+    candidate = backend_class(df)
+
+    differences = {
+        name: check_parity(reference, candidate, filters, RANKING_COLUMNS, PARETO_COLUMNS, min_values=min_values)
+        for name, filters in filter_states(df).items()
+    }
+
+    assert all(not diff for diff in differences.values()), differences
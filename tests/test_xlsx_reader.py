@@ -0,0 +1,64 @@
+"""
+Streaming-Reader gegen openpyxl
+Shared Strings mit Rich-Text-Runs und phonetischen Hinweisen (<rPh>) müssen
+denselben Zelltext ergeben wie bei pandas.read_excel(engine='openpyxl').
+"""
+
+import io
+import zipfile
+
+import pandas as pd
+
+from xlsx_reader import read_xlsx_stream
+
+SHARED_STRINGS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" count="4" uniqueCount="4">'
+    '<si><t>Name</t></si>'
+    '<si><t>東京</t><rPh sb="0" eb="2"><t>トウキョウ</t></rPh><phoneticPr fontId="1"/></si>'
+    '<si><r><t>Rich </t></r><r><rPr><b/></rPr><t>Text</t></r><rPh sb="0" eb="4"><t>リッチ</t></rPh></si>'
+    '<si><t xml:space="preserve"> Plain </t></si>'
+    '</sst>'
+)
+
+# Spalte A: Kopf + drei Zeilen, alle als Verweis auf die Shared Strings 0-3
+SHEET = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+    + ''.join(f'<row r="{i + 1}"><c r="A{i + 1}" t="s"><v>{i}</v></c></row>' for i in range(4))
+    + '</sheetData></worksheet>'
+)
+
+SHARED_STRINGS_TYPE = (
+    '<Override PartName="/xl/sharedStrings.xml" ContentType='
+    '"application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/>'
+)
+
+
+def phonetic_workbook():
+    """Arbeitsmappe, deren einziges Blatt Shared Strings mit Rich Text und <rPh> nutzt"""
+    buffer = io.BytesIO()
+    pd.DataFrame({'Name': ['x']}).to_excel(buffer, index=False, engine='openpyxl')
+
+    source = zipfile.ZipFile(io.BytesIO(buffer.getvalue()))
+    patched = io.BytesIO()
+    with zipfile.ZipFile(patched, 'w', zipfile.ZIP_DEFLATED) as target:
+        for item in source.infolist():
+            data = source.read(item.filename)
+            if item.filename == 'xl/worksheets/sheet1.xml':
+                data = SHEET.encode('utf-8')
+            elif item.filename == '[Content_Types].xml':
+                data = data.replace(b'</Types>', SHARED_STRINGS_TYPE.encode('utf-8') + b'</Types>')
+            target.writestr(item, data)
+        target.writestr('xl/sharedStrings.xml', SHARED_STRINGS)
+    return patched.getvalue()
+
+
+def test_shared_strings_ignore_phonetic_runs():
+    data = phonetic_workbook()
+
+    expected = pd.read_excel(io.BytesIO(data), engine='openpyxl')
+    actual = read_xlsx_stream(io.BytesIO(data))
+
+    assert expected['Name'].tolist() == ['東京', 'Rich Text', ' Plain ']
+    pd.testing.assert_frame_equal(actual, expected)
@@ -123,16 +123,29 @@ def get_user_region(email):
     return user.get("region") if user else None
 
 
-def filter_dataframe_by_user(df, email):
+def get_allowed_sets():
+    """
+    Alle verschiedenen Niederlassungs-Mengen aus USERS (für vorberechnete RLS-Views)
+    
+    Returns:
+        list: Listen erlaubter Niederlassungen (ohne Duplikate)
+    """
+    sets = {tuple(sorted(user.get("niederlassungen", []))) for user in USERS.values()}
+    return [list(nls) for nls in sets if nls]
+
+
+def filter_dataframe_by_user(df, email, rls_views=None):
     """
     Filtert DataFrame basierend auf User-Rechten
     
     Args:
         df: Pandas DataFrame
         email: User Email
+        rls_views: Optional RLSViews über df - liefert den gemeinsamen,
+                   vorgefilterten View statt neu zu filtern
     
     Returns:
-        Gefilterter DataFrame
+        Gefilterter DataFrame (bei rls_views geteilt - nicht verändern!)
     """
     if 'Niederlassung' not in df.columns:
         st.warning("⚠️ Spalte 'Niederlassung' nicht gefunden!")
@@ -150,7 +163,10 @@ def filter_dataframe_by_user(df, email):
         st.warning("⚠️ Keine Niederlassungen zugewiesen!")
         return pd.DataFrame()
     
-    # Filtern
+    # Filtern (bzw. gemeinsamen View verwenden)
+    if rls_views is not None:
+        return rls_views.view(allowed_nl)
+    
     df_filtered = df[df['Niederlassung'].isin(allowed_nl)]
     
     return df_filtered
@@ -0,0 +1,501 @@
+"""
+Streaming-Reader für XLSX-Dateien
+Liest das erste Arbeitsblatt blockweise direkt aus dem ZIP-Stream in typisierte
+Spalten, ohne den kompletten openpyxl-Zellbaum aufzubauen.
+Fällt bei nicht unterstützten Arbeitsmappen automatisch auf openpyxl zurück.
+"""
+
+import re
+import html
+import mmap
+import zipfile
+import posixpath
+from functools import lru_cache
+import xml.etree.ElementTree as ET
+
+import numpy as np
+import pandas as pd
+
+# XML Namespaces (SpreadsheetML + Relationships)
+NS_MAIN = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+NS_REL = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+NS_PKG_REL = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+TAG_TEXT = NS_MAIN + 't'
+TAG_RUN = NS_MAIN + 'r'
+
+# Excel Builtin-Formate, die Datumswerte darstellen
+BUILTIN_DATE_FORMATS = set(range(14, 23)) | {45, 46, 47}
+
+# Gleiche Standard-NA-Werte wie pandas.read_excel
+NA_STRINGS = {
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan',
+    '1.#IND', '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None',
+    'n/a', 'nan', 'null'
+}
+
+# Start-Tag des Wurzelelements (ggf. mit Namespace-Präfix)
+ROOT_TAG_PATTERN = re.compile(rb'<([A-Za-z_][\w.-]*:)?worksheet\b[^>]*>')
+
+# Eine Zelle: Spalte, Zeile, Style, Typ, weitere Attribute, Inhalt (None bei <c .../>)
+# Erwartet die übliche Attribut-Reihenfolge r, s, t (Excel, openpyxl, xlsxwriter)
+CELL_PATTERN = re.compile(
+    r'<c r="([A-Z]{1,3})([0-9]+)"(?: s="([0-9]+)")?(?: t="([a-zA-Z]+)")?([^>/]*)(?:/>|>(.*?)</c>)',
+    re.S
+)
+TEXT_PATTERN = re.compile(r'<t(?:\s[^>]*)?>(.*?)</t>', re.S)
+
+ENGINES = ('stream', 'openpyxl')
+
+
+class UnsupportedWorkbookError(ValueError):
+    """Arbeitsmappe kann vom Streaming-Reader nicht gelesen werden"""
+
+
+class MappedFile(mmap.mmap):
+    """Memory-Mapping einer Datei, als file-like Objekt für zipfile/openpyxl nutzbar"""
+
+    def seekable(self):
+        # mmap kann seek(), meldet es aber erst ab Python 3.13
+        return True
+
+    @classmethod
+    def open(cls, path):
+        """
+        Mappt eine Datei schreibgeschützt in den Speicher
+
+        Args:
+            path: Dateipfad
+
+        Returns:
+            MappedFile (als Context-Manager verwendbar)
+        """
+        with open(path, 'rb') as handle:
+            return cls(handle.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def read_excel(source, engine='stream', usecols=None, dtype=None):
+    """
+    Liest das erste Arbeitsblatt einer XLSX-Datei als DataFrame
+
+    Args:
+        source: Dateipfad oder file-like Objekt (BytesIO, mmap, ...)
+        engine: 'stream' (Streaming-Reader mit openpyxl-Fallback) oder 'openpyxl'
+        usecols: Optionale Liste von Spaltennamen, die geladen werden sollen
+        dtype: Optionales Dict {Spalte: Typ} wie bei pd.read_excel
+
+    Returns:
+        DataFrame
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unbekannte Excel-Engine: {engine}")
+
+    if engine == 'stream':
+        try:
+            return read_xlsx_stream(source, usecols=usecols, dtype=dtype)
+        except (UnsupportedWorkbookError, zipfile.BadZipFile, ET.ParseError):
+            # Zurück an den Anfang, damit openpyxl die Datei neu lesen kann
+            if hasattr(source, 'seek'):
+                source.seek(0)
+
+    return pd.read_excel(
+        source,
+        engine='openpyxl',
+        usecols=(lambda col: col in usecols) if usecols is not None else None,
+        dtype=dtype
+    )
+
+
+def read_xlsx_stream(source, usecols=None, dtype=None):
+    """
+    Streaming-Reader: erstes Arbeitsblatt → DataFrame
+
+    Args:
+        source: Dateipfad oder file-like Objekt
+        usecols: Optionale Liste von Spaltennamen
+        dtype: Optionales Dict {Spalte: Typ}
+
+    Returns:
+        DataFrame
+
+    Raises:
+        UnsupportedWorkbookError: Wenn die Arbeitsmappe Features nutzt,
+            die der Reader nicht abbildet
+    """
+    with zipfile.ZipFile(source) as archive:
+        sheet_path, date1904 = _first_sheet_path(archive)
+        shared_strings = _read_shared_strings(archive)
+        date_styles = _read_date_styles(archive)
+
+        with archive.open(sheet_path) as sheet:
+            header, columns, n_rows = _parse_sheet(sheet, shared_strings, date_styles, usecols)
+
+    dtype = dtype or {}
+    data = {}
+    for idx, name in header:
+        values = columns.get(idx, [])
+        values.extend([None] * (n_rows - len(values)))
+        data[name] = _to_typed_array(values, dtype.get(name), date1904)
+
+    return pd.DataFrame(data, columns=[name for _, name in header])
+
+
+# ============================================================================
+# WORKBOOK-STRUKTUR
+# ============================================================================
+
+def _first_sheet_path(archive):
+    """Ermittelt den Pfad des ersten Arbeitsblatts und das Datumssystem"""
+    try:
+        workbook = ET.fromstring(archive.read('xl/workbook.xml'))
+    except KeyError:
+        raise UnsupportedWorkbookError("xl/workbook.xml fehlt")
+
+    workbook_pr = workbook.find(NS_MAIN + 'workbookPr')
+    date1904 = workbook_pr is not None and workbook_pr.get('date1904') in ('1', 'true')
+
+    sheet = workbook.find(f'{NS_MAIN}sheets/{NS_MAIN}sheet')
+    if sheet is None:
+        raise UnsupportedWorkbookError("Kein Arbeitsblatt gefunden")
+    rel_id = sheet.get(NS_REL + 'id')
+
+    try:
+        rels = ET.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+    except KeyError:
+        raise UnsupportedWorkbookError("Workbook-Relationships fehlen")
+
+    for rel in rels.iter(NS_PKG_REL + 'Relationship'):
+        if rel.get('Id') == rel_id:
+            target = rel.get('Target')
+            if target.startswith('/'):
+                path = target.lstrip('/')
+            else:
+                path = posixpath.normpath(posixpath.join('xl', target))
+            if path not in archive.namelist():
+                raise UnsupportedWorkbookError(f"Arbeitsblatt fehlt: {path}")
+            return path, date1904
+
+    raise UnsupportedWorkbookError("Arbeitsblatt-Relationship nicht gefunden")
+
+
+def _read_shared_strings(archive):
+    """Liest sharedStrings.xml (falls vorhanden) als Liste"""
+    try:
+        handle = archive.open('xl/sharedStrings.xml')
+    except KeyError:
+        return []
+
+    strings = []
+    with handle:
+        for _, elem in ET.iterparse(handle):
+            if elem.tag == NS_MAIN + 'si':
+                strings.append(_shared_string_text(elem))
+                elem.clear()
+    return strings
+
+
+def _shared_string_text(si):
+    """
+    Text eines <si>-Eintrags wie bei openpyxl
+
+    Nur <t> direkt unter <si> bzw. unter Rich-Text-Runs <r>; phonetische
+    Hinweise (<rPh>) gehören nicht zum Zellinhalt.
+    """
+    parts = []
+    for child in si:
+        if child.tag == TAG_TEXT:
+            parts.append(child.text or '')
+        elif child.tag == TAG_RUN:
+            text = child.find(TAG_TEXT)
+            if text is not None:
+                parts.append(text.text or '')
+    return ''.join(parts)
+
+
+def _is_date_format(format_code):
+    """Prüft ob ein benutzerdefiniertes Zahlenformat ein Datum darstellt"""
+    # Text in Anführungszeichen, Escapes und [Farben/Bedingungen] ignorieren
+    cleaned = re.sub(r'"[^"]*"|\\.|\[[^\]]*\]', '', format_code)
+    return re.search(r'[dmyhs]', cleaned, re.IGNORECASE) is not None
+
+
+def _read_date_styles(archive):
+    """Gibt die Menge der Style-Indizes (cellXfs) zurück, die Datumsformate nutzen"""
+    try:
+        styles = ET.fromstring(archive.read('xl/styles.xml'))
+    except KeyError:
+        return set()
+
+    custom_dates = set()
+    num_fmts = styles.find(NS_MAIN + 'numFmts')
+    if num_fmts is not None:
+        for fmt in num_fmts:
+            if _is_date_format(fmt.get('formatCode', '')):
+                custom_dates.add(int(fmt.get('numFmtId')))
+
+    date_styles = set()
+    cell_xfs = styles.find(NS_MAIN + 'cellXfs')
+    if cell_xfs is not None:
+        for idx, xf in enumerate(cell_xfs):
+            fmt_id = int(xf.get('numFmtId', 0))
+            if fmt_id in BUILTIN_DATE_FORMATS or fmt_id in custom_dates:
+                date_styles.add(idx)
+    return date_styles
+
+
+# ============================================================================
+# SHEET PARSING
+# ============================================================================
+
+@lru_cache(maxsize=None)
+def _column_index(letters):
+    """Wandelt Spaltenbuchstaben wie 'AQ' in einen 0-basierten Spaltenindex um"""
+    idx = 0
+    for char in letters:
+        idx = idx * 26 + (ord(char) - 64)
+    return idx - 1
+
+
+def _text(raw):
+    """XML-Entities in Text auflösen"""
+    return html.unescape(raw) if '&' in raw else raw
+
+
+def _cell_value(style, cell_type, inner, shared_strings, date_styles):
+    """
+    Liest den Wert einer Zelle aus Style, Typ und Inhalt
+
+    Returns:
+        str, int, float, bool, ('date', float) oder None
+    """
+    if not inner:
+        return None
+
+    if cell_type == 'inlineStr':
+        if inner.startswith('<is><t>') and inner.endswith('</t></is>') and inner.count('<') == 4:
+            return _text(inner[7:-9])
+        if '<rPh' in inner:
+            raise UnsupportedWorkbookError("Phonetische Texte nicht unterstützt")
+        return _text(''.join(TEXT_PATTERN.findall(inner)))
+
+    if inner.startswith('<v>'):
+        value = inner[3:inner.index('</v>')]
+    else:
+        start = inner.find('<v>')
+        if start == -1:
+            return None
+        value = inner[start + 3:inner.index('</v>', start)]
+
+    if cell_type is None or cell_type == 'n':
+        if style is not None and int(style) in date_styles:
+            return ('date', float(value))
+        if '.' in value or 'E' in value or 'e' in value:
+            return float(value)
+        return int(value)
+    if cell_type == 's':
+        return shared_strings[int(value)]
+    if cell_type == 'str':
+        return _text(value)
+    if cell_type == 'b':
+        return value == '1'
+    if cell_type == 'e':
+        return None
+
+    raise UnsupportedWorkbookError(f"Zelltyp nicht unterstützt: {cell_type}")
+
+
+def _iter_row_blocks(sheet, chunk_size=1 << 20):
+    """
+    Liest das Arbeitsblatt blockweise und liefert Text-Blöcke aus ganzen <row>-Elementen
+
+    Der Datenstrom wird an </row>-Grenzen geschnitten, damit keine Zelle
+    über zwei Blöcke verteilt ist. Der Speicherbedarf bleibt auf einen Block begrenzt.
+    """
+    buffer = b''
+    in_data = False
+
+    while True:
+        chunk = sheet.read(chunk_size)
+        buffer += chunk
+
+        if not in_data:
+            match = ROOT_TAG_PATTERN.search(buffer)
+            if match and match.group(1):
+                raise UnsupportedWorkbookError("Namespace-Präfixe nicht unterstützt")
+            data_start = buffer.find(b'<sheetData', match.end()) if match else -1
+            if data_start == -1 or buffer.find(b'>', data_start) == -1:
+                if not chunk:
+                    raise UnsupportedWorkbookError("sheetData nicht gefunden")
+                continue
+            in_data = True
+            buffer = buffer[buffer.find(b'>', data_start) + 1:]
+
+        cut = buffer.rfind(b'</row>')
+        if cut != -1:
+            cut += len(b'</row>')
+            yield buffer[:cut].decode('utf-8')
+            buffer = buffer[cut:]
+
+        if not chunk:
+            break
+
+
+def _parse_sheet(sheet, shared_strings, date_styles, usecols):
+    """
+    Liest ein Arbeitsblatt zellenweise
+
+    Returns:
+        (header, columns, n_rows)
+        header: Liste von (Spaltenindex, Name)
+        columns: Dict {Spaltenindex: Liste der Werte}
+        n_rows: Anzahl Datenzeilen (ohne leere Zeilen am Ende)
+    """
+    header_cells = {}
+    header_row = None
+    header = None
+    wanted = None
+    columns = {}
+    last_row = 0
+
+    for block in _iter_row_blocks(sheet):
+        n_cells = 0
+        for match in CELL_PATTERN.finditer(block):
+            n_cells += 1
+            letters, row_ref, style, cell_type, rest, inner = match.groups()
+            if rest and (' s=' in rest or ' t=' in rest):
+                raise UnsupportedWorkbookError("Attribut-Reihenfolge nicht unterstützt")
+            row_number = int(row_ref)
+
+            if header_row is None:
+                header_row = row_number
+            if row_number == header_row:
+                header_cells[_column_index(letters)] = (style, cell_type, inner)
+                continue
+            if header is None:
+                header = _build_header(header_cells, shared_strings, date_styles)
+                if usecols is not None:
+                    header = [(idx, name) for idx, name in header if name in usecols]
+                wanted = {idx for idx, _ in header}
+
+            idx = _column_index(letters)
+            if idx not in wanted:
+                continue
+
+            value = _cell_value(style, cell_type, inner, shared_strings, date_styles)
+            if value is None:
+                continue
+
+            position = row_number - header_row - 1
+            values = columns.get(idx)
+            if values is None:
+                values = columns[idx] = []
+            if len(values) < position:
+                values.extend([None] * (position - len(values)))
+            values.append(value)
+            if position >= last_row:
+                last_row = position + 1
+
+        # Jede Zelle muss vom Muster erfasst worden sein, sonst lieber openpyxl
+        if n_cells != block.count('<c ') + block.count('<c>'):
+            raise UnsupportedWorkbookError("Zellformat nicht unterstützt")
+
+    if header is None:
+        if header_row is None:
+            raise UnsupportedWorkbookError("Arbeitsblatt ist leer")
+        header = _build_header(header_cells, shared_strings, date_styles)
+        if usecols is not None:
+            header = [(idx, name) for idx, name in header if name in usecols]
+
+    for values in columns.values():
+        del values[last_row:]
+
+    return header, columns, last_row
+
+
+def _build_header(header_cells, shared_strings, date_styles):
+    """Erzeugt Spaltennamen aus der Kopfzeile (wie pandas: Unnamed / .1-Suffixe)"""
+    names = {}
+    for idx, (style, cell_type, inner) in header_cells.items():
+        value = _cell_value(style, cell_type, inner, shared_strings, date_styles)
+        if isinstance(value, tuple):
+            raise UnsupportedWorkbookError("Datumswerte in der Kopfzeile nicht unterstützt")
+        names[idx] = value
+
+    header = []
+    seen = {}
+    for idx in range(max(names) + 1 if names else 0):
+        name = names.get(idx)
+        if name is None or name == '':
+            name = f"Unnamed: {idx}"
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        header.append((idx, name))
+    return header
+
+
+# ============================================================================
+# TYPISIERUNG
+# ============================================================================
+
+def _to_typed_array(values, dtype, date1904):
+    """
+    Wandelt eine Werteliste in ein typisiertes Array um
+    (int64 / float64 / datetime64 / object), analog zu pd.read_excel
+    """
+    kinds = {type(v) for v in values}
+    kinds.discard(type(None))
+
+    if dtype is str:
+        return np.array([np.nan if v is None else _to_text(v, date1904) for v in values], dtype=object)
+
+    if kinds == {tuple}:
+        origin = pd.Timestamp('1904-01-01' if date1904 else '1899-12-30')
+        serials = np.array([np.nan if v is None else v[1] for v in values], dtype='float64')
+        millis = np.round(serials * 86400 * 1000)
+        result = origin + pd.to_timedelta(millis, unit='ms')
+        return result.values if dtype is None else result.astype(dtype).values
+
+    if kinds == {bool}:
+        if None not in values:
+            array = np.array(values, dtype=bool)
+        else:
+            array = np.array([np.nan if v is None else v for v in values], dtype='float64')
+        return array if dtype is None else array.astype(dtype)
+
+    if kinds <= {int, float} and kinds:
+        if kinds == {int} and None not in values:
+            array = np.array(values, dtype='int64')
+        else:
+            array = np.array([np.nan if v is None else v for v in values], dtype='float64')
+        return array if dtype is None else array.astype(dtype)
+
+    array = np.empty(len(values), dtype=object)
+    for i, value in enumerate(values):
+        if value is None or (isinstance(value, str) and value in NA_STRINGS):
+            array[i] = np.nan
+        elif isinstance(value, tuple):
+            array[i] = _to_text(value, date1904)
+        else:
+            array[i] = value
+
+    if not kinds:
+        array = array.astype('float64')
+    elif kinds <= {str, int, float}:
+        # pandas versucht rein numerische Text-Spalten als Zahlen zu lesen
+        try:
+            array = np.asarray(pd.to_numeric(array))
+        except (ValueError, TypeError):
+            pass
+
+    return array if dtype is None else pd.Series(array).astype(dtype).values
+
+
+def _to_text(value, date1904):
+    """Text-Darstellung eines Zellwerts (Datumswerte als Timestamp-String)"""
+    if isinstance(value, tuple):
+        origin = pd.Timestamp('1904-01-01' if date1904 else '1899-12-30')
+        return str(origin + pd.Timedelta(days=value[1]))
+    return str(value)